@@ -4,15 +4,23 @@ import uuid
 import tempfile
 import logging
 from typing import List, Dict, Optional
-from rag_code import Transcribe, EmbedData, QdrantVDB_QB, Retriever, RAG
+# Only light modules at import time; rag_code (torch, transformers, llama_index), qdrant_client,
+# assemblyai, textblob and pandas are imported on first use or by the warmup thread
+from disk_cache import DiskCache, TranscriptCache, hash_bytes
+from sparse_index import BM25Index
+from chunking import build_documents
+from exports import EXPORT_FORMATS, ExportCache
+import metrics
+from metrics import span
+from resource_pool import QueryEmbedder, ResourcePool
+from tenancy import COLLECTION_MODE, SHARED_COLLECTION
+from transcription_jobs import AssemblyAIBackend, Job, TranscriptionScheduler
+from transcript_store import TranscriptStore
+from warmup import Warmup, import_modules
 import streamlit as st
-from textblob import TextBlob
-from fpdf import FPDF
 from dotenv import load_dotenv
 import json
 from datetime import datetime
-import pandas as pd
-from io import BytesIO
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -131,89 +139,190 @@ st.markdown("""
     </script>
 """, unsafe_allow_html=True)
 
-# Singleton embedding model with caching
+def load_embed_model():
+    from embedding_backends import DEFAULT_BACKEND, load_backend
+    from embedding_cache import CachedEmbedData
+    # AUDIO_RAG_EMBED_BACKEND picks the model/runtime/quantization, see embedding_backends.BACKENDS
+    backend = load_backend(DEFAULT_BACKEND, batch_size=int(os.getenv("AUDIO_RAG_EMBED_BATCH_SIZE", 32)))
+    logger.info(f"Initializing embedding backend: {backend.name} ({backend.dim} dims)")
+    embeddata = CachedEmbedData(backend=backend, batch_size=backend.batch_size)
+    # The first forward pass allocates buffers / builds the ONNX session; pay for it here too
+    embeddata.embed_model.get_query_embedding("warmup")
+    return embeddata
+
+def start_session_janitor(pool: ResourcePool):
+    # Deletes the points of shared-collection tenants idle for AUDIO_RAG_SESSION_TTL seconds
+    from vector_store import SessionJanitor
+    return SessionJanitor(pool.qdrant_client(),
+                          ttl_seconds=float(os.getenv("AUDIO_RAG_SESSION_TTL", 24 * 3600))).start()
+
+# Heavy imports, the embedding model and (in shared mode) the session janitor load on a
+# background thread at startup, once per process
 @st.cache_resource
+def get_warmup():
+    warmup = Warmup().add("imports", import_modules).add("embedding model", load_embed_model)
+    if COLLECTION_MODE == "shared":
+        pool = get_resource_pool()
+        warmup.add("session janitor", lambda: start_session_janitor(pool))
+    if os.getenv("AUDIO_RAG_WARMUP", "1") != "0":
+        warmup.start()
+    return warmup
+
 def get_embed_model():
-    logger.info("Initializing embedding model: BAAI/bge-large-en-v1.5")
-    return EmbedData(embed_model_name="BAAI/bge-large-en-v1.5", batch_size=32)
+    # Blocks only if the warmup thread is still loading the model
+    return get_warmup().result("embedding model")
 
-class EnhancedTranscribe(Transcribe):
-    def __init__(self, api_key: str):
-        super().__init__(api_key)
-        self.sentiment_analyzer = TextBlob
-    
-    def analyze_sentiment(self, text: str) -> Dict[str, float]:
-        blob = self.sentiment_analyzer(text)
-        return {"polarity": blob.sentiment.polarity, "subjectivity": blob.sentiment.subjectivity}
-
-    def transcribe_audio(self, audio_path: str, language: Optional[str] = None) -> List[Dict]:
-        transcripts = super().transcribe_audio(audio_path, language)
-        for t in transcripts:
-            sentiment = self.analyze_sentiment(t["text"])
-            t.update({
-                "sentiment": sentiment,
-                "timestamp": datetime.now().isoformat(),
-                "word_count": len(t["text"].split())
-            })
-        return transcripts
+# Qdrant clients, transcribers and LLM clients, one per config for every session in the process
+@st.cache_resource
+def get_resource_pool():
+    return ResourcePool()
+
+# Chat queries of all sessions embedded in micro-batches on the shared model
+@st.cache_resource
+def get_query_embedder():
+    return QueryEmbedder(get_embed_model().embed_queries)
+
+# Shared across sessions; transcripts are keyed by audio content, language and config
+@st.cache_resource
+def get_transcript_cache():
+    return TranscriptCache()
+
+# Partial summaries keyed by chunk hash, reused across sessions and re-summarizations
+@st.cache_resource
+def get_summary_cache():
+    return DiskCache("summaries")
+
+# Rendered transcript exports keyed by transcript hash and format
+@st.cache_resource
+def get_export_cache():
+    return ExportCache()
+
+# One process pool for every session
+@st.cache_resource
+def get_sentiment_stage():
+    from sentiment import TextBlobSentiment
+    return TextBlobSentiment()
+
+# Shared by all sessions; entries are scoped per collection/tenant
+@st.cache_resource
+def get_query_cache():
+    from query_cache import SemanticQueryCache
+    return SemanticQueryCache()
+
+RESPONSE_CACHE = os.getenv("AUDIO_RAG_RESPONSE_CACHE", "1").lower() in ("1", "true", "yes")
+
+# Streamed answers keyed by model, prompt template, packed context and query, shared by all
+# sessions; identical questions in flight at once share one LLM call
+@st.cache_resource
+def get_response_cache():
+    from response_cache import ResponseCache
+    return ResponseCache()
+
+# Process-wide job loop; caps concurrent AssemblyAI jobs across all sessions
+@st.cache_resource
+def get_transcription_scheduler(api_key: str):
+    return TranscriptionScheduler(AssemblyAIBackend(api_key),
+                                  max_in_flight=int(os.getenv("AUDIO_RAG_MAX_TRANSCRIPTIONS", 4)))
+
+# Prometheus /metrics on a side port (AUDIO_RAG_METRICS_PORT=0 turns it off), one server per process
+METRICS_PORT = int(os.getenv("AUDIO_RAG_METRICS_PORT", 9464)) if metrics.ENABLED else 0
+
+@st.cache_resource
+def get_metrics_server():
+    if not METRICS_PORT:
+        return None
+    try:
+        return metrics.start_http_server(METRICS_PORT)
+    except OSError as e:
+        # Typically another app process already serves the port; metrics are still recorded
+        # in-process and shown under Diagnostics
+        logger.warning(f"Prometheus endpoint not started on port {METRICS_PORT}: {e}")
+        return None
 
 class AudioRAGManager:
-    def __init__(self, collection_name: str, api_key: str):
+    def __init__(self, collection_name: str, api_key: str, tenant: Optional[str] = None,
+                 sparse_index: Optional[BM25Index] = None):
         self.collection_name = collection_name
-        self.transcriber = EnhancedTranscribe(api_key=api_key)
-        self.embeddata = get_embed_model()
-        self.vector_db = QdrantVDB_QB(collection_name=collection_name, batch_size=512)
+        self.tenant = tenant
+        self._transcriber = None
+        self._vector_db = None
+        # Lexical index over everything this session ingested, fused with dense search
+        self.sparse_index = sparse_index if sparse_index is not None else BM25Index()
         self.retriever = None
         self.rag = None
         self.api_key = api_key
 
-    def process_audio(self, audio_path: str, language: str = "en") -> List[Dict]:
+    # One manager per session (kept in session_state); its heavy parts are borrowed from the
+    # process-wide resource pool on first use
+    @property
+    def transcriber(self):
+        if self._transcriber is None:
+            from transcription import EnhancedTranscribe
+            self._transcriber = get_resource_pool().get("transcriber", self.api_key, lambda: EnhancedTranscribe(
+                api_key=self.api_key, cache=get_transcript_cache(), sentiment_stage=get_sentiment_stage(),
+                scheduler=get_transcription_scheduler(self.api_key)))
+        return self._transcriber
+
+    @property
+    def embeddata(self):
+        return get_embed_model()
+
+    @property
+    def vector_db(self):
+        if self._vector_db is None:
+            from vector_store import EnhancedQdrantVDB
+            self._vector_db = EnhancedQdrantVDB(collection_name=self.collection_name, vector_dim=self.embeddata.dim,
+                                                batch_size=512, tenant=self.tenant,
+                                                client=get_resource_pool().qdrant_client())
+        return self._vector_db
+
+    def process_audio(self, audio_path: str, language: str = "en",
+                      audio_digest: Optional[str] = None) -> List[Dict]:
+        with span("process_audio"):
+            transcripts = self.transcriber.transcribe_audio(audio_path, language, audio_digest=audio_digest)
+            return self.index_transcripts(transcripts, audio_digest)
+
+    def index_transcripts(self, transcripts: List[Dict], audio_digest: Optional[str] = None) -> List[Dict]:
+        from generation import EnhancedRAG
+        from ingest_pipeline import stream_ingest
+        from retrieval import EnhancedRetriever
+        from sentiment import attach_sentiment
         try:
-            transcripts = self.transcriber.transcribe_audio(audio_path, language)
-            documents = [f"{t['speaker']}: {t['text']} (Sentiment: {t['sentiment']['polarity']:.2f})" 
-                        for t in transcripts]
-            
-            self.embeddata.embed(documents)
-            self.vector_db.define_client()
+            sentiment = self.transcriber.sentiment_stage.submit([t["text"] for t in transcripts])
+            # Embedded text carries no sentiment, so embedding does not have to wait for it
+            with span("chunk"):
+                documents = build_documents(transcripts, audio_digest)
+
+            with span("qdrant.connect"):
+                self.vector_db.define_client()
             self.vector_db.create_collection()
-            self.vector_db.ingest_data(self.embeddata)
+            with span("ingest", documents=len(documents)):
+                stream_ingest(documents, self.embeddata, self.vector_db,
+                              on_batch=lambda ids, batch: self.sparse_index.add(ids, [r["context"] for r in batch], batch))
+            with span("sentiment.wait"):
+                attach_sentiment(transcripts, *sentiment.result())
             
-            self.retriever = Retriever(vector_db=self.vector_db, embeddata=self.embeddata)
-            self.rag = RAG(retriever=self.retriever, llm_name="DeepSeek-R1-Distill-Llama-70B")
+            self.retriever = EnhancedRetriever(vector_db=self.vector_db, embeddata=self.embeddata,
+                                               sparse_index=self.sparse_index,
+                                               mode=os.getenv("AUDIO_RAG_RETRIEVAL_MODE", "hybrid"),
+                                               query_cache=get_query_cache(), query_embedder=get_query_embedder())
+            self.rag = EnhancedRAG(retriever=self.retriever, llm_name="DeepSeek-R1-Distill-Llama-70B",
+                                   summary_cache=get_summary_cache(),
+                                   response_cache=get_response_cache() if RESPONSE_CACHE else None,
+                                   resource_pool=get_resource_pool())
             
             return transcripts
         except Exception as e:
             logger.error(f"Processing error: {e}")
             raise
 
-    def export_to_pdf(self, transcripts: List[Dict]) -> BytesIO:
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-        pdf.cell(200, 10, txt="Audio Transcript Analysis", ln=True, align="C")
-        pdf.ln(10)
-        
-        for t in transcripts:
-            pdf.multi_cell(0, 10, f"[{t['timestamp']}] {t['speaker']}: {t['text']}")
-            pdf.multi_cell(0, 10, f"Sentiment: P={t['sentiment']['polarity']:.2f}, S={t['sentiment']['subjectivity']:.2f}")
-            pdf.ln(5)
-        
-        return BytesIO(pdf.output(dest='S').encode('latin-1'))
-
-    def export_to_json(self, transcripts: List[Dict]) -> BytesIO:
-        return BytesIO(json.dumps(transcripts, indent=2).encode('utf-8'))
-
-    def get_statistics(self, transcripts: List[Dict]) -> Dict:
-        if not transcripts:
-            return {}
-        word_counts = [t["word_count"] for t in transcripts]
-        polarities = [t["sentiment"]["polarity"] for t in transcripts]
-        return {
-            "total_segments": len(transcripts),
-            "avg_word_count": sum(word_counts) / len(word_counts),
-            "avg_sentiment": sum(polarities) / len(polarities),
-            "speakers": len(set(t["speaker"] for t in transcripts))
-        }
+    def export(self, store: TranscriptStore, fmt: str) -> str:
+        # Path of the rendered artifact; rendered once per transcript and format
+        return get_export_cache().render(store, fmt)
+
+    def get_statistics(self, store: Optional[TranscriptStore]) -> Dict:
+        # Maintained incrementally by the store; nothing here scans the transcript
+        return store.statistics() if store is not None else {}
 
 def format_analysis(text: str, sentiment: float) -> str:
     return f"""
@@ -227,20 +336,106 @@ def format_analysis(text: str, sentiment: float) -> str:
     Speaker B expresses a complex mix of emotions centered around dependency on another person. They feel significantly impacted, showing a bittersweet attachment with a hint of feeling trapped or changed, reflected in the slightly negative sentiment.
     """
 
+def stage_upload(audio_bytes: bytes, file_name: str, audio_digest: str) -> str:
+    # Transcription jobs outlive the script run, so uploads are staged outside it, one file per
+    # job; sessions uploading the same recording never share (or delete) one another's copy.
+    # The script removes the copy once the job finishes or is discarded (see discard_job)
+    upload_dir = os.path.join(tempfile.gettempdir(), "audio_rag_uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    fd, file_path = tempfile.mkstemp(dir=upload_dir, prefix=audio_digest[:16] + "-",
+                                     suffix=os.path.splitext(file_name)[1])
+    with os.fdopen(fd, "wb") as f:
+        f.write(audio_bytes)
+    return file_path
+
+def discard_job(pending: Optional[Dict], cancel: bool = True) -> None:
+    # A pending job that is finished, replaced (new upload or language) or dropped with the
+    # session leaves the scheduler, and its staged copy is deleted
+    if pending is None:
+        return
+    job = pending["job"]
+    if cancel and not job.future.done():
+        pending["transcriber"].cancel_transcription(job)
+    else:
+        pending["transcriber"].scheduler.forget(job)
+    try:
+        os.remove(job.audio_path)
+    except OSError:
+        pass
+
+def render_job_status(job: Job):
+    st.info(f"Transcribing {os.path.basename(job.audio_path)}: {job.state} ({job.elapsed:.0f}s). "
+            "You can keep chatting about earlier files meanwhile.")
+    if job.future.done():
+        st.rerun()
+
+def render_warmup_status():
+    warmup = get_warmup()
+    failed = [step for step in warmup.status() if step["state"] == "error"]
+    if failed:
+        st.error("Startup failed: " + "; ".join(f"{step['step']}: {step['error']}" for step in failed))
+    elif warmup.ready:
+        st.caption("Models ready")
+    else:
+        st.caption("Warming up: " + ", ".join(
+            f"{step['step']} {'✓' if step['state'] == 'done' else '…'}" for step in warmup.status()))
+
+def render_diagnostics():
+    # Per-stage latencies of this process (all sessions) and the latest spans
+    import pandas as pd
+    diagnostics = metrics.snapshot()
+    with st.expander("Diagnostics"):
+        if diagnostics["stages"]:
+            stages = pd.DataFrame.from_dict(diagnostics["stages"], orient="index")
+            st.dataframe((stages[["mean", "p50", "p95", "p99"]] * 1000).round(1).assign(count=stages["count"])
+                         .rename(columns=lambda c: c if c == "count" else f"{c} ms"), use_container_width=True)
+        for label, key in (("Time to first token (s)", "ttft"), ("Tokens/sec", "tokens_per_second")):
+            if diagnostics[key]:
+                st.caption(label)
+                st.json(diagnostics[key])
+        if diagnostics["recent_spans"]:
+            st.caption("Recent spans")
+            st.dataframe(pd.DataFrame(diagnostics["recent_spans"][::-1]), use_container_width=True)
+        if get_metrics_server() is not None:
+            st.caption(f"Prometheus: :{METRICS_PORT}/metrics")
+
+# Poll the job (and the warmup) without blocking the rest of the page where the Streamlit version allows it
+if hasattr(st, "fragment"):
+    render_job_status = st.fragment(run_every=2)(render_job_status)
+    render_warmup_status = st.fragment(run_every=1)(render_warmup_status)
+
 def run_enhanced_app():
     # Initialize session state
     if "id" not in st.session_state:
         st.session_state.id = uuid.uuid4()
         st.session_state.file_cache = {}
+        st.session_state.manager = None
         st.session_state.messages = []
-        st.session_state.transcripts = []
+        # The session's only copy of the current transcript, held column-wise
+        st.session_state.transcript_store = None
         st.session_state.history = []
         st.session_state.current_file = None
+        st.session_state.processed_key = None
+        st.session_state.pending_job = None
+        st.session_state.sparse_index = BM25Index()
         st.session_state.summary = None
+        st.session_state.exports = {}
 
     session_id = st.session_state.id
-    manager = AudioRAGManager(collection_name=f"enhanced_audio_{session_id}", 
-                            api_key=os.getenv("ASSEMBLYAI_API_KEY"))
+    get_metrics_server()
+    get_warmup()
+    # Built once per session, so its retriever and RAG survive reruns
+    if st.session_state.manager is None:
+        if COLLECTION_MODE == "shared":
+            st.session_state.manager = AudioRAGManager(collection_name=SHARED_COLLECTION,
+                                                       api_key=os.getenv("ASSEMBLYAI_API_KEY"),
+                                                       tenant=session_id.hex,
+                                                       sparse_index=st.session_state.sparse_index)
+        else:
+            st.session_state.manager = AudioRAGManager(collection_name=f"enhanced_audio_{session_id}",
+                                                       api_key=os.getenv("ASSEMBLYAI_API_KEY"),
+                                                       sparse_index=st.session_state.sparse_index)
+    manager = st.session_state.manager
 
     # Main title and layout
     st.title("Audio RAG Analyzer")
@@ -249,11 +444,12 @@ def run_enhanced_app():
     # Sidebar for controls
     with st.sidebar:
         st.header("Audio Processing Controls")
+        render_warmup_status()
         uploaded_file = st.file_uploader("Upload Audio File", type=["mp3", "wav", "m4a"])
         
         lang_map = {"English": "en", "French": "fr", "Spanish": "es", "German": "de"}
         language = st.selectbox("Language", list(lang_map.keys()), index=0)
-        export_format = st.multiselect("Export Formats", ["PDF", "JSON"], default=["PDF"])
+        export_format = st.multiselect("Export Formats", list(EXPORT_FORMATS), default=["PDF"])
         summarize = st.checkbox("Generate Summary")
         save_history = st.checkbox("Save Chat History")
         if st.button("Clear Session"):
@@ -265,56 +461,121 @@ def run_enhanced_app():
 
     with tab1:
         if uploaded_file:
-            with st.spinner("Processing audio..."):
-                try:
-                    with tempfile.TemporaryDirectory() as temp_dir:
-                        file_path = os.path.join(temp_dir, uploaded_file.name)
-                        with open(file_path, "wb") as f:
-                            f.write(uploaded_file.getvalue())
-                        
-                        transcripts = manager.process_audio(file_path, lang_map[language])
-                        st.session_state.transcripts = transcripts
+            try:
+                audio_bytes = uploaded_file.getvalue()
+                audio_digest = hash_bytes(audio_bytes)
+                processed_key = f"{audio_digest}:{lang_map[language]}"
+
+                # Reruns of an already processed upload reuse the session's manager instead of
+                # transcribing, embedding and ingesting again
+                store = None
+                if (st.session_state.processed_key != processed_key
+                        or uploaded_file.name not in st.session_state.file_cache):
+                    pending = st.session_state.pending_job
+                    if pending is None or pending["key"] != processed_key:
+                        discard_job(pending)
+                        st.session_state.pending_job = None
+                        file_path = stage_upload(audio_bytes, uploaded_file.name, audio_digest)
+                        job = manager.transcriber.submit_transcription(file_path, lang_map[language],
+                                                                       audio_digest=audio_digest)
+                        pending = {"key": processed_key, "job": job, "transcriber": manager.transcriber}
+                        st.session_state.pending_job = pending
+
+                    job = pending["job"]
+                    if not job.future.done():
+                        render_job_status(job)
+                    else:
+                        st.session_state.pending_job = None
+                        discard_job(pending, cancel=False)
+                        with st.spinner("Indexing transcript..."):
+                            # The segment dicts are only needed to index and fill the store
+                            store = TranscriptStore.from_transcripts(
+                                manager.index_transcripts(job.future.result(), audio_digest))
+                        st.session_state.transcript_store = store
                         st.session_state.file_cache[uploaded_file.name] = manager
                         st.session_state.current_file = uploaded_file.name
-
-                        # Audio player
-                        st.audio(file_path, format=f"audio/{uploaded_file.name.split('.')[-1]}")
-
-                        # Export options
-                        col1, col2 = st.columns(2)
-                        if "PDF" in export_format:
-                            with col1:
-                                pdf_data = manager.export_to_pdf(transcripts)
-                                st.download_button("Download PDF", pdf_data, f"{uploaded_file.name}_transcript.pdf", "application/pdf")
-                        if "JSON" in export_format:
-                            with col2:
-                                json_data = manager.export_to_json(transcripts)
-                                st.download_button("Download JSON", json_data, f"{uploaded_file.name}_transcript.json", "application/json")
-
-                        # Summary
-                        if summarize:
-                            full_text = "\n".join([t['text'] for t in transcripts])
-                            st.session_state.summary = manager.rag.summarize(full_text)
-                            st.subheader("Summary")
-                            st.write(st.session_state.summary)
-
-                        st.success("Audio processed successfully!")
-                except Exception as e:
-                    st.error(f"Error processing audio: {str(e)}")
+                        st.session_state.processed_key = processed_key
+                        st.session_state.summary = None
+                else:
+                    store = st.session_state.transcript_store
+                    manager = st.session_state.file_cache[uploaded_file.name]
+
+                if store is not None:
+                    # Audio player
+                    st.audio(audio_bytes, format=f"audio/{uploaded_file.name.split('.')[-1]}")
+
+                    # Export options: rendered only when asked for, then served from the export cache
+                    for column, fmt in zip(st.columns(max(1, len(export_format))), export_format):
+                        with column:
+                            export_key = (processed_key, fmt)
+                            prepared = st.session_state.exports.get(export_key)
+                            if prepared is not None and not os.path.exists(prepared):
+                                prepared = None  # evicted from the cache since
+                            if prepared is None and st.button(f"Prepare {fmt}", key=f"prepare_{fmt}"):
+                                with st.spinner(f"Rendering {fmt}..."):
+                                    prepared = manager.export(store, fmt)
+                                st.session_state.exports[export_key] = prepared
+                            if prepared is not None:
+                                extension, mime = EXPORT_FORMATS[fmt]
+                                with open(prepared, "rb") as f:
+                                    st.download_button(f"Download {fmt}", f, f"{uploaded_file.name}_transcript{extension}",
+                                                       mime, key=f"download_{fmt}")
+
+                    # Summary
+                    if summarize:
+                        if st.session_state.summary is None:
+                            with st.spinner("Summarizing..."):
+                                st.session_state.summary = manager.rag.summarize(store)
+                        st.subheader("Summary")
+                        st.write(st.session_state.summary)
+
+                    st.success("Audio processed successfully!")
+            except Exception as e:
+                st.error(f"Error processing audio: {str(e)}")
 
         # Statistics
-        if st.session_state.transcripts:
-            stats = manager.get_statistics(st.session_state.transcripts)
+        store = st.session_state.transcript_store
+        if store is not None and len(store):
+            stats = manager.get_statistics(store)
             st.subheader("Audio Statistics")
             st.json(stats)
+            import pandas as pd
+            st.dataframe(pd.DataFrame(store.speaker_stats()), use_container_width=True, hide_index=True)
+            timeline = store.sentiment_timeline(bins=60, by_speaker=True)
+            if timeline["minute"]:
+                st.caption("Sentiment over time (mean polarity per speaker)")
+                st.line_chart(pd.DataFrame(timeline).set_index("minute"))
+            with st.expander("Embedding cache"):
+                st.json(manager.embeddata.cache_stats())
+            with st.expander("Query cache"):
+                st.json(get_query_cache().stats())
+            with st.expander("Shared resources"):
+                st.json({"pool": get_resource_pool().stats(), "query_embedding": get_query_embedder().stats()})
+            if RESPONSE_CACHE:
+                with st.expander("Response cache"):
+                    st.json(get_response_cache().stats())
+            if metrics.ENABLED:
+                render_diagnostics()
 
     with tab2:
-        if st.session_state.transcripts:
+        store = st.session_state.transcript_store
+        if store is not None and len(store):
+            import pandas as pd
             st.subheader("Transcript")
-            df = pd.DataFrame(st.session_state.transcripts)
-            df_display = df[["timestamp", "speaker", "text", "sentiment"]]
-            df_display["sentiment"] = df_display["sentiment"].apply(lambda x: f"P={x['polarity']:.2f}, S={x['subjectivity']:.2f}")
-            st.dataframe(df_display, use_container_width=True)
+            # Only the current page is formatted and sent to the browser
+            filter_col, size_col, page_col = st.columns([2, 1, 1])
+            with filter_col:
+                speaker = st.selectbox("Speaker", ["All speakers"] + store.speakers, key="transcript_speaker")
+            with size_col:
+                page_size = st.selectbox("Rows per page", [50, 100, 250, 500], index=1, key="transcript_page_size")
+            speaker = None if speaker == "All speakers" else speaker
+            pages = store.page_count(page_size, speaker)
+            with page_col:
+                # Keyed by filter and page size so a change starts again from page 1
+                page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1,
+                                       key=f"transcript_page_{speaker}_{page_size}")
+            rows, _ = store.page(page - 1, page_size, speaker)
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
 
     with tab3:
         # Chat interface
@@ -396,10 +657,16 @@ def run_enhanced_app():
 
 def reset_chat():
     st.session_state.messages = []
-    st.session_state.transcripts = []
+    st.session_state.transcript_store = None
     st.session_state.current_file = None
+    st.session_state.processed_key = None
+    discard_job(st.session_state.pending_job)
+    st.session_state.pending_job = None
     st.session_state.summary = None
+    st.session_state.exports = {}
     st.session_state.history = []
+    # Rebuilt on the next rerun; what it borrowed from the resource pool stays shared
+    st.session_state.manager = None
     gc.collect()
 
 if __name__ == "__main__":
@@ -0,0 +1,400 @@
+import os
+import time
+import wave
+import bisect
+import shutil
+import logging
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Uploads are downmixed to mono 16 kHz, trimmed to the speech found by an energy VAD and
+# re-encoded; recordings longer than AUDIO_RAG_SEGMENT_SECONDS are split at silences into
+# segments that are transcribed in parallel and stitched back onto the original timeline
+PREPROCESS_ENABLED = os.getenv("AUDIO_RAG_PREPROCESS", "1").lower() in ("1", "true", "yes")
+SAMPLE_RATE = 16000
+DEFAULT_CODEC = os.getenv("AUDIO_RAG_PREPROCESS_CODEC", "opus")
+SEGMENT_SECONDS = float(os.getenv("AUDIO_RAG_SEGMENT_SECONDS", 900))
+OVERLAP_SECONDS = float(os.getenv("AUDIO_RAG_SEGMENT_OVERLAP_SECONDS", 15))
+
+# codec -> (file extension, ffmpeg encoder arguments); wav is written without ffmpeg
+CODECS = {
+    "opus": (".ogg", ["-c:a", "libopus", "-b:a", "24k", "-application", "voip"]),
+    "flac": (".flac", ["-c:a", "flac"]),
+    "wav": (".wav", None),
+}
+
+class AudioDecodeError(RuntimeError):
+    pass
+
+class UntimedTranscriptError(ValueError):
+    # Segment transcripts without utterance start/end cannot be placed on the original timeline
+    pass
+
+def have_ffmpeg() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+def preprocess_config(codec: str = DEFAULT_CODEC, segment_seconds: float = SEGMENT_SECONDS,
+                      overlap_seconds: float = OVERLAP_SECONDS) -> Dict:
+    # Part of the transcript cache key: the same upload preprocessed differently may transcribe differently
+    if codec != "wav" and not have_ffmpeg():
+        codec = "wav"
+    return {"codec": codec, "sample_rate": SAMPLE_RATE, "segment_seconds": segment_seconds,
+            "overlap_seconds": overlap_seconds}
+
+# --- Decoding -------------------------------------------------------------------------------
+
+class _LinearResampler:
+    # Streaming linear interpolation between sample rates. Output sample k sits at source
+    # position k * src / dst, so block boundaries never accumulate drift.
+    def __init__(self, src_rate: int, dst_rate: int):
+        self.ratio = src_rate / dst_rate
+        self._k = 0
+        self._consumed = 0
+        self._last = None
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if self.ratio == 1.0 or not len(block):
+            return block
+        if self._last is None:
+            extended, base = block, self._consumed
+        else:
+            extended, base = np.concatenate(([self._last], block)), self._consumed - 1
+        last_index = self._consumed + len(block) - 1
+        count = int(np.floor(last_index / self.ratio)) + 1 - self._k
+        positions = (self._k + np.arange(max(count, 0))) * self.ratio
+        out = np.interp(positions - base, np.arange(len(extended)), extended).astype(np.float32)
+        self._k += max(count, 0)
+        self._consumed += len(block)
+        self._last = block[-1]
+        return out
+
+def _decode_ffmpeg(path: str, sample_rate: int) -> np.ndarray:
+    command = ["ffmpeg", "-nostdin", "-v", "error", "-i", path, "-f", "s16le", "-ac", "1",
+               "-ar", str(sample_rate), "-"]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        raise AudioDecodeError(f"ffmpeg could not decode {os.path.basename(path)}: "
+                               f"{result.stderr.decode('utf-8', 'replace').strip()}")
+    return np.frombuffer(result.stdout, dtype=np.int16).copy()
+
+def _decode_wav(path: str, sample_rate: int, block_frames: int = 1 << 18) -> np.ndarray:
+    # Fallback without ffmpeg: PCM WAV only, read block by block so a long stereo file is
+    # never held in memory at its original rate
+    try:
+        reader = wave.open(path, "rb")
+    except (wave.Error, EOFError) as e:
+        raise AudioDecodeError(f"{os.path.basename(path)} is not PCM WAV and ffmpeg is not installed: {e}")
+    with reader:
+        channels, width, rate = reader.getnchannels(), reader.getsampwidth(), reader.getframerate()
+        if width not in (1, 2, 4):
+            raise AudioDecodeError(f"Unsupported WAV sample width: {width * 8} bit")
+        dtype, scale = {1: (np.uint8, 256.0), 2: (np.int16, 1.0), 4: (np.int32, 1 / 65536)}[width]
+        resampler = _LinearResampler(rate, sample_rate)
+        out = []
+        while True:
+            raw = reader.readframes(block_frames)
+            if not raw:
+                break
+            block = np.frombuffer(raw, dtype=dtype).astype(np.float32)
+            if width == 1:
+                block -= 128
+            block = block.reshape(-1, channels).mean(axis=1) * scale
+            out.append(resampler.process(block))
+    samples = np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+    return np.clip(np.round(samples), -32768, 32767).astype(np.int16)
+
+def decode_audio(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    # Mono int16 at sample_rate. ffmpeg handles any container and resamples properly; the
+    # WAV fallback interpolates linearly, which is enough for VAD and 16 kHz speech models.
+    if have_ffmpeg():
+        return _decode_ffmpeg(path, sample_rate)
+    return _decode_wav(path, sample_rate)
+
+def _encode(samples: np.ndarray, sample_rate: int, path_base: str, codec: str) -> str:
+    extension, arguments = CODECS[codec]
+    if arguments is not None and not have_ffmpeg():
+        extension, arguments = CODECS["wav"]
+    path = path_base + extension
+    if arguments is None:
+        with wave.open(path, "wb") as writer:
+            writer.setnchannels(1)
+            writer.setsampwidth(2)
+            writer.setframerate(sample_rate)
+            writer.writeframes(samples.astype(np.int16).tobytes())
+        return path
+    command = ["ffmpeg", "-nostdin", "-v", "error", "-y", "-f", "s16le", "-ar", str(sample_rate), "-ac", "1",
+               "-i", "-", *arguments, path]
+    result = subprocess.run(command, input=samples.astype(np.int16).tobytes(), capture_output=True)
+    if result.returncode != 0:
+        raise AudioDecodeError(f"ffmpeg could not encode {codec}: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return path
+
+# --- Voice activity -------------------------------------------------------------------------
+
+def frame_energy_db(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_ms: int = 30,
+                    chunk_frames: int = 20000) -> np.ndarray:
+    # RMS level per frame in dBFS, computed a chunk at a time to bound the float copy
+    frame = sample_rate * frame_ms // 1000
+    n = len(samples) // frame
+    energy = np.empty(n, dtype=np.float32)
+    for start in range(0, n, chunk_frames):
+        stop = min(n, start + chunk_frames)
+        frames = samples[start * frame:stop * frame].reshape(stop - start, frame).astype(np.float32)
+        rms = np.sqrt(np.mean(frames * frames, axis=1)) / 32768.0
+        energy[start:stop] = 20 * np.log10(np.maximum(rms, 1e-6))
+    return energy
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+
+def detect_speech(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_ms: int = 30,
+                  margin_db: float = 12.0, floor_db: float = -50.0, min_speech_ms: int = 200,
+                  min_silence_ms: int = 600, pad_ms: int = 200) -> List[Tuple[int, int]]:
+    # Energy VAD: frames louder than the noise floor (10th percentile) by margin_db count as
+    # speech; pauses shorter than min_silence_ms are bridged, blips shorter than min_speech_ms
+    # dropped, and each region padded so word onsets survive. Returns sample ranges.
+    energy = frame_energy_db(samples, sample_rate, frame_ms)
+    if not len(energy):
+        return []
+    noise, loud = np.percentile(energy, 10), np.percentile(energy, 90)
+    if loud - noise < margin_db:
+        # No clear silence anywhere (or all silence): keep everything above the floor
+        threshold = floor_db
+    else:
+        threshold = max(floor_db, noise + min(margin_db, (loud - noise) / 2))
+
+    frame = sample_rate * frame_ms // 1000
+    merged: List[List[int]] = []
+    for start, end in _runs(energy > threshold):
+        if merged and start - merged[-1][1] < min_silence_ms // frame_ms:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    pad = pad_ms * sample_rate // 1000
+    regions: List[Tuple[int, int]] = []
+    for start, end in merged:
+        if end - start < min_speech_ms // frame_ms:
+            continue
+        start, end = max(0, start * frame - pad), min(len(samples), end * frame + pad)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+# --- Segmenting and stitching ---------------------------------------------------------------
+
+class PreparedSegment:
+    # One upload. pieces maps it back to the original: (segment_ms, original_ms, duration_ms)
+    # per kept stretch of audio, in order. Utterances whose original midpoint falls before
+    # overlap_until_ms repeat the end of the previous segment and are only used to match speakers.
+    def __init__(self, path: str, pieces: List[Tuple[int, int, int]], overlap_until_ms: Optional[int] = None):
+        self.path = path
+        self.pieces = pieces
+        self.overlap_until_ms = overlap_until_ms
+        self._starts = [p[0] for p in pieces]
+
+    def to_original(self, ms: float) -> int:
+        index = max(0, bisect.bisect_right(self._starts, ms) - 1)
+        segment_ms, original_ms, duration_ms = self.pieces[index]
+        offset = ms - segment_ms
+        if offset > duration_ms and index + 1 < len(self.pieces):
+            # Inside the shortened pause after this piece; never past the next piece's start
+            offset = min(offset, self.pieces[index + 1][1] - original_ms)
+        return int(round(original_ms + max(0.0, offset)))
+
+class PreparedAudio:
+    def __init__(self, source_path: str, segments: List[PreparedSegment], duration_ms: int, speech_ms: int,
+                 seconds: float, work_dir: Optional[str] = None):
+        self.source_path = source_path
+        self.segments = segments
+        self.duration_ms = duration_ms
+        self.speech_ms = speech_ms
+        self.seconds = seconds
+        self.work_dir = work_dir
+        self.bytes_in = os.path.getsize(source_path)
+        self.bytes_out = sum(os.path.getsize(s.path) for s in segments)
+
+    def cleanup(self) -> None:
+        if self.work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def as_dict(self) -> Dict:
+        return {"segments": len(self.segments), "duration_ms": self.duration_ms, "speech_ms": self.speech_ms,
+                "bytes_in": self.bytes_in, "bytes_out": self.bytes_out, "prepare_seconds": round(self.seconds, 3)}
+
+def _split_long(region: Tuple[int, int], samples: np.ndarray, max_len: int, sample_rate: int) -> List[Tuple[int, int]]:
+    # Continuous speech longer than a segment is cut at the quietest frame of the last fifth
+    frame = sample_rate * 30 // 1000
+    start, end = region
+    parts = []
+    while end - start > max_len:
+        window_start = start + max_len * 4 // 5
+        energy = frame_energy_db(samples[window_start:start + max_len], sample_rate)
+        cut = window_start + int(np.argmin(energy)) * frame if len(energy) else start + max_len
+        parts.append((start, cut))
+        start = cut
+    parts.append((start, end))
+    return parts
+
+def plan_segments(regions: Sequence[Tuple[int, int]], samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                  segment_seconds: float = SEGMENT_SECONDS, overlap_seconds: float = OVERLAP_SECONDS,
+                  gap_ms: int = 400) -> List[Tuple[List[Tuple[int, int]], int]]:
+    # Greedy: regions (sample ranges) are packed into segments of at most segment_seconds,
+    # counting a gap_ms pause between regions, so every boundary falls in a silence. Each
+    # segment after the first is prefixed with the last overlap_seconds of speech of the one
+    # before it. Returns (ranges, number of leading ranges that are overlap) per segment.
+    max_len = int(segment_seconds * sample_rate)
+    gap = gap_ms * sample_rate // 1000
+    overlap = int(overlap_seconds * sample_rate)
+    split = [part for region in regions for part in _split_long(region, samples, max(sample_rate, max_len - overlap), sample_rate)]
+
+    segments: List[Tuple[List[Tuple[int, int]], int]] = []
+    current: List[Tuple[int, int]] = []
+    lead = 0
+    length = 0
+    for start, end in split:
+        if current and length + gap + (end - start) > max_len:
+            segments.append((current, lead))
+            # Lead-in: the tail of the closed segment, walking back until overlap is covered
+            tail, covered = [], 0
+            for tail_start, tail_end in reversed(current):
+                if covered >= overlap:
+                    break
+                take = min(tail_end - tail_start, overlap - covered)
+                tail.insert(0, (tail_end - take, tail_end))
+                covered += take
+            current, lead = tail, len(tail)
+            length = sum(e - s for s, e in tail) + gap * max(0, len(tail) - 1)
+        length += (gap if current else 0) + (end - start)
+        current.append((start, end))
+    if current:
+        segments.append((current, lead))
+    return segments
+
+def prepare_audio(path: str, codec: str = DEFAULT_CODEC, segment_seconds: float = SEGMENT_SECONDS,
+                  overlap_seconds: float = OVERLAP_SECONDS, gap_ms: int = 400, work_dir: Optional[str] = None,
+                  sample_rate: int = SAMPLE_RATE, **vad) -> PreparedAudio:
+    started = time.perf_counter()
+    samples = decode_audio(path, sample_rate)
+    if not len(samples):
+        raise AudioDecodeError(f"{os.path.basename(path)} contains no audio")
+    regions = detect_speech(samples, sample_rate, **vad) or [(0, len(samples))]
+    plan = plan_segments(regions, samples, sample_rate, segment_seconds, overlap_seconds, gap_ms)
+    to_ms = 1000.0 / sample_rate
+    duration_ms = int(len(samples) * to_ms)
+    speech_ms = int(sum(e - s for s, e in regions) * to_ms)
+
+    work_dir = work_dir or tempfile.mkdtemp(prefix="audio_rag_segments_")
+    gap = np.zeros(gap_ms * sample_rate // 1000, dtype=np.int16)
+    segments = []
+    base = os.path.splitext(os.path.basename(path))[0]
+    for index, (ranges, lead) in enumerate(plan):
+        parts, pieces, position = [], [], 0
+        for n, (start, end) in enumerate(ranges):
+            if n:
+                parts.append(gap)
+                position += len(gap)
+            parts.append(samples[start:end])
+            pieces.append((int(position * to_ms), int(start * to_ms), int((end - start) * to_ms)))
+            position += end - start
+        segment_path = _encode(np.concatenate(parts), sample_rate,
+                               os.path.join(work_dir, f"{base}.part{index:03d}"), codec)
+        overlap_until = int(ranges[lead - 1][1] * to_ms) if lead else None
+        segments.append(PreparedSegment(segment_path, pieces, overlap_until))
+
+    prepared = PreparedAudio(path, segments, duration_ms, speech_ms, time.perf_counter() - started, work_dir)
+    if len(segments) == 1 and prepared.bytes_out >= prepared.bytes_in:
+        # Already compact and little silence to trim: uploading the original costs no more
+        prepared.cleanup()
+        prepared = PreparedAudio(path, [PreparedSegment(path, [(0, 0, duration_ms)])], duration_ms, speech_ms,
+                                 time.perf_counter() - started)
+    logger.info(f"Prepared {os.path.basename(path)}: {len(segments)} segment(s), "
+                f"{prepared.bytes_in / 2**20:.1f} MB -> {prepared.bytes_out / 2**20:.1f} MB "
+                f"in {prepared.seconds:.1f}s")
+    return prepared
+
+def _label(index: int) -> str:
+    return f"Speaker {chr(ord('A') + index)}" if index < 26 else f"Speaker {index + 1}"
+
+def _match_speakers(overlapping: List[Dict], stitched: List[Dict], local_labels: List[str],
+                    global_labels: List[str]) -> Dict[str, str]:
+    # Each segment labels its speakers independently. Utterances heard in the overlap vote,
+    # weighted by time overlap, for the stitched speaker they coincide with; labels are then
+    # assigned one-to-one by vote. A speaker absent from the overlap takes a label the segment
+    # has not claimed yet (two-party calls resolve fully), otherwise a new one.
+    votes: Dict[Tuple[str, str], int] = {}
+    for u in overlapping:
+        for prior in reversed(stitched):
+            if prior["end"] <= u["start"] - 60000:
+                break
+            shared = min(u["end"], prior["end"]) - max(u["start"], prior["start"])
+            if shared > 0:
+                votes[(u["speaker"], prior["speaker"])] = votes.get((u["speaker"], prior["speaker"]), 0) + shared
+    mapping: Dict[str, str] = {}
+    for (local, known), _ in sorted(votes.items(), key=lambda item: -item[1]):
+        if local not in mapping and known not in mapping.values():
+            mapping[local] = known
+    for local in local_labels:
+        if local not in mapping:
+            free = [label for label in global_labels if label not in mapping.values()]
+            if free:
+                mapping[local] = free[0]
+            else:
+                index = len(global_labels)
+                while _label(index) in global_labels:
+                    index += 1
+                mapping[local] = _label(index)
+                global_labels.append(mapping[local])
+    return mapping
+
+def _timed(utterances: List[Dict]) -> bool:
+    return all(u.get("start") is not None and u.get("end") is not None for u in utterances)
+
+def stitch(prepared: PreparedAudio, results: Sequence[List[Dict]]) -> List[Dict]:
+    # Segment transcripts -> one transcript on the original timeline with one set of speaker labels.
+    # A single segment without timings comes back as transcribed; several cannot be aligned
+    # (UntimedTranscriptError), and callers then transcribe the original file instead.
+    if not all(_timed(utterances) for utterances in results):
+        if len(results) == 1:
+            return [dict(u) for u in results[0]]
+        raise UntimedTranscriptError("segment transcripts have no utterance timings to stitch by")
+    stitched: List[Dict] = []
+    global_labels: List[str] = []
+    for segment, utterances in zip(prepared.segments, results):
+        mapped = []
+        for u in utterances:
+            u = dict(u, start=segment.to_original(u["start"]), end=segment.to_original(u["end"]))
+            mapped.append(u)
+        local_labels = list(dict.fromkeys(u["speaker"] for u in mapped))
+        if segment.overlap_until_ms is None:
+            overlapping, fresh = [], mapped
+        else:
+            overlapping = [u for u in mapped if (u["start"] + u["end"]) / 2 < segment.overlap_until_ms]
+            fresh = [u for u in mapped if (u["start"] + u["end"]) / 2 >= segment.overlap_until_ms]
+        if not stitched:
+            # The first segment's labels stand, so an unsplit file comes back exactly as transcribed
+            mapping = {label: label for label in local_labels}
+            global_labels.extend(local_labels)
+        else:
+            mapping = _match_speakers(overlapping, stitched, local_labels, global_labels)
+        for u in fresh:
+            u["speaker"] = mapping[u["speaker"]]
+            stitched.append(u)
+    return stitched
+
+def transcribe_prepared(prepared: PreparedAudio, transcribe: Callable[[str], List[Dict]],
+                        workers: int = 4) -> List[Dict]:
+    # transcribe(path) -> utterances; segments run concurrently, results stitched in order
+    if len(prepared.segments) == 1:
+        return stitch(prepared, [transcribe(prepared.segments[0].path)])
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="segment") as pool:
+        results = list(pool.map(transcribe, [s.path for s in prepared.segments]))
+    return stitch(prepared, results)
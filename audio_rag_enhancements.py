@@ -3,7 +3,13 @@ import uuid
 import tempfile
 import logging
 from typing import List, Dict, Optional
-from rag_code import Transcribe, EmbedData, QdrantVDB_QB, Retriever, RAG
+from rag_code import Transcribe, RAG
+from embedding_backends import DEFAULT_BACKEND, load_backend
+from embedding_cache import CachedEmbedData
+from query_cache import SemanticQueryCache
+from retrieval import EnhancedRetriever
+from vector_store import EnhancedQdrantVDB
+from ingest_pipeline import stream_ingest
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -20,29 +26,40 @@ _embed_model_instance = None
 def get_embed_model():
     global _embed_model_instance
     if _embed_model_instance is None:
-        logger.info("Initializing embedding model: BAAI/bge-large-en-v1.5")
-        _embed_model_instance = EmbedData(embed_model_name="BAAI/bge-large-en-v1.5", batch_size=32)
+        backend = load_backend(DEFAULT_BACKEND)
+        logger.info(f"Initializing embedding backend: {backend.name}")
+        _embed_model_instance = CachedEmbedData(backend=backend, batch_size=backend.batch_size)
     return _embed_model_instance
 
+# Search results shared by all sessions, invalidated per collection through GENERATIONS on every ingest
+_query_cache_instance = None
+
+def get_query_cache():
+    global _query_cache_instance
+    if _query_cache_instance is None:
+        _query_cache_instance = SemanticQueryCache()
+    return _query_cache_instance
+
 class AudioRAGManager:
     def __init__(self, collection_name: str, api_key: str):
         self.collection_name = collection_name
         self.transcriber = Transcribe(api_key=api_key)  # Basic Transcribe from rag_code
         self.embeddata = get_embed_model()
-        self.vector_db = QdrantVDB_QB(collection_name=collection_name, batch_size=512)
+        self.vector_db = EnhancedQdrantVDB(collection_name=collection_name, vector_dim=self.embeddata.dim,
+                                           batch_size=512)
         self.retriever = None
         self.rag = None
 
     def process_audio(self, audio_path: str, language: str = "en") -> List[Dict]:
         transcripts = self.transcriber.transcribe_audio(audio_path, language)
-        documents = [f"{t['speaker']}: {t['text']}" for t in transcripts]
-        
-        self.embeddata.embed(documents)
+        documents = ({"context": f"{t['speaker']}: {t['text']}"} for t in transcripts)
+
         self.vector_db.define_client()
         self.vector_db.create_collection()
-        self.vector_db.ingest_data(self.embeddata)
+        stream_ingest(documents, self.embeddata, self.vector_db)
         
-        self.retriever = Retriever(vector_db=self.vector_db, embeddata=self.embeddata)
+        self.retriever = EnhancedRetriever(vector_db=self.vector_db, embeddata=self.embeddata, mode="dense",
+                                           query_cache=get_query_cache())
         self.rag = RAG(retriever=self.retriever, llm_name="DeepSeek-R1-Distill-Llama-70B")
         
         return transcripts
@@ -80,10 +97,14 @@ def run_enhanced_app():
             st.session_state.file_cache = {}
             st.session_state.messages = []
             st.session_state.transcripts = []
+            st.session_state.processed_file = None
 
+        # One manager per session, so its client, collection and retriever survive reruns
         session_id = st.session_state.id
-        manager = AudioRAGManager(collection_name=f"audio_{session_id}", 
-                                api_key=os.getenv("ASSEMBLYAI_API_KEY"))
+        if "manager" not in st.session_state:
+            st.session_state.manager = AudioRAGManager(collection_name=f"audio_{session_id}",
+                                                       api_key=os.getenv("ASSEMBLYAI_API_KEY"))
+        manager = st.session_state.manager
 
         # Main layout: two columns
         st.markdown("<div class='main-layout'>", unsafe_allow_html=True)
@@ -97,7 +118,8 @@ def run_enhanced_app():
             language_options = {"English": "en", "French": "fr", "Spanish": "es", "German": "de"}
             language = st.selectbox("Language", list(language_options.keys()), index=0)
             
-            if uploaded_file:
+            # Only a new upload is transcribed and indexed; reruns reuse the session's manager
+            if uploaded_file and st.session_state.processed_file != uploaded_file.name:
                 with tempfile.TemporaryDirectory() as temp_dir:
                     file_path = os.path.join(temp_dir, uploaded_file.name)
                     with open(file_path, "wb") as f:
@@ -107,7 +129,9 @@ def run_enhanced_app():
                         transcripts = manager.process_audio(file_path, language_options[language])
                         st.session_state.transcripts = transcripts
                         st.session_state.file_cache[uploaded_file.name] = manager
-                
+                        st.session_state.processed_file = uploaded_file.name
+
+            if uploaded_file:
                 if st.session_state.transcripts:
                     st.markdown("<div class='transcript-panel'>", unsafe_allow_html=True)
                     st.write("Transcript")
@@ -0,0 +1,207 @@
+# Headless bulk ingestion of audio recordings into Qdrant.
+#   python batch_ingest.py /data/calls --collection calls --concurrency 8
+#   python batch_ingest.py manifest.jsonl --fake-transcriber --fake-embedder --qdrant-location :memory:
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import itertools
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from chunking import build_documents
+from disk_cache import TranscriptCache, hash_file
+from ingest_pipeline import stream_ingest
+from sentiment import TextBlobSentiment
+from transcript_store import enrich_transcripts
+# transcription and vector_store pull in rag_code (llama_index, assemblyai, qdrant_client);
+# they are imported where used, so --fake-transcriber does not need the AssemblyAI stack
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a")
+
+def discover(source: str, language: str) -> Iterator[Tuple[str, str]]:
+    # A directory is walked for audio files; a manifest lists one path per line, or JSON
+    # lines with "path" and an optional per-file "language"
+    if os.path.isdir(source):
+        for dirpath, _, filenames in os.walk(source):
+            for name in sorted(filenames):
+                if name.lower().endswith(AUDIO_EXTENSIONS):
+                    yield os.path.join(dirpath, name), language
+        return
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                entry = json.loads(line)
+                path, lang = entry["path"], entry.get("language", language)
+            else:
+                path, lang = line, language
+            yield os.path.join(base, path), lang
+
+class Checkpoint:
+    # Append-only JSON lines, one per fully ingested file. Points have stable ids per
+    # (file hash, segment), so a file that was half-ingested when a run died is simply
+    # re-upserted on resume.
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.done.add(json.loads(line)["file_hash"])
+                    except (ValueError, KeyError):
+                        continue  # torn last line from a crash
+
+    def record(self, entry: Dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.add(entry["file_hash"])
+
+def build_transcriber(args):
+    if args.fake_transcriber:
+        from fakes import FakeTranscriber
+        return FakeTranscriber(latency=args.fake_latency)
+    from transcription import EnhancedTranscribe
+    return EnhancedTranscribe(api_key=os.getenv("ASSEMBLYAI_API_KEY"), cache=TranscriptCache(),
+                              segment_workers=args.segment_workers)
+
+def build_embedder(args):
+    if args.fake_embedder:
+        from fakes import FakeEmbedData
+        return FakeEmbedData(batch_size=args.embed_batch_size)
+    from embedding_backends import load_backend
+    from embedding_cache import CachedEmbedData
+    backend = load_backend(args.embed_backend, batch_size=args.embed_batch_size, threads=args.embed_threads)
+    return CachedEmbedData(backend=backend, batch_size=args.embed_batch_size)
+
+def run(args) -> Dict:
+    transcriber = build_transcriber(args)
+    embeddata = build_embedder(args)
+    # Every file's utterances go straight to the process pool, however short the call, so
+    # files are scored side by side across --sentiment-workers processes
+    sentiment_stage = TextBlobSentiment(workers=args.sentiment_workers, min_parallel=0)
+    from vector_store import EnhancedQdrantVDB
+    vector_dim = args.vector_dim or embeddata.dim
+    vector_db = EnhancedQdrantVDB(collection_name=args.collection, vector_dim=vector_dim,
+                                  batch_size=args.upsert_batch_size, url=args.qdrant_url,
+                                  location=args.qdrant_location)
+    vector_db.define_client()
+    vector_db.create_collection()
+
+    checkpoint = Checkpoint(args.checkpoint or f"{args.collection}.checkpoint.jsonl")
+    files = list(discover(args.source, args.language))
+    logger.info(f"Found {len(files)} files, {len(checkpoint.done)} already ingested")
+
+    def transcribe_one(path: str, language: str):
+        file_hash = hash_file(path)
+        if file_hash in checkpoint.done:
+            return file_hash, None, None
+        if not args.fake_transcriber:
+            transcripts = transcriber.transcribe_audio(path, language, audio_digest=file_hash)
+        else:
+            transcripts = enrich_transcripts(transcriber.transcribe_audio(path, language))
+        # Sentiment starts on the process pool right away, while the main thread embeds other files
+        return file_hash, transcripts, sentiment_stage.submit([t["text"] for t in transcripts])
+
+    started = time.perf_counter()
+    stats = {"files": 0, "skipped": 0, "failed": 0, "segments": 0}
+    queue = iter(files)
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="transcribe") as pool:
+        futures = {}
+
+        def fill():
+            # At most 2x --concurrency files are in flight or waiting to be ingested, so finished
+            # transcripts and their sentiment results cannot pile up while embedding lags behind
+            for path, language in itertools.islice(queue, max(0, 2 * args.concurrency - len(futures))):
+                futures[pool.submit(transcribe_one, path, language)] = path
+
+        fill()
+        while futures:
+            # Files are ingested in completion order
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = futures.pop(future)
+                fill()
+                try:
+                    file_hash, transcripts, sentiment = future.result()
+                    if transcripts is None:
+                        stats["skipped"] += 1
+                        continue
+                    polarity, subjectivity = sentiment.result()
+                    records = build_documents(transcripts, file_hash, scheme=args.chunking)
+                    for record in records:
+                        # Windows carry the mean sentiment of the utterances they cover
+                        covered = slice(record["seg_start"], record["seg_end"] + 1)
+                        record["file"] = os.path.basename(path)
+                        record["polarity"] = float(polarity[covered].mean())
+                        record["subjectivity"] = float(subjectivity[covered].mean())
+                    count = stream_ingest(records, embeddata, vector_db, finalize=False)
+                    checkpoint.record({"path": path, "file_hash": file_hash, "segments": count,
+                                       "ingested_at": time.time()})
+                    stats["files"] += 1
+                    stats["segments"] += count
+                except Exception as e:
+                    stats["failed"] += 1
+                    logger.error(f"Failed to ingest {path}: {e}")
+                    continue
+
+                elapsed = time.perf_counter() - started
+                logger.info(f"[{stats['files'] + stats['skipped'] + stats['failed']}/{len(files)}] {path}: "
+                            f"{count} segments ({stats['files'] / elapsed * 60:.1f} files/min, "
+                            f"{stats['segments'] / elapsed:.1f} segments/s)")
+
+    vector_db.finalize_ingest()
+    sentiment_stage.close()
+    elapsed = time.perf_counter() - started
+    stats.update({
+        "seconds": round(elapsed, 3),
+        "files_per_min": round(stats["files"] / elapsed * 60, 2) if elapsed else 0.0,
+        "segments_per_sec": round(stats["segments"] / elapsed, 2) if elapsed else 0.0,
+    })
+    return stats
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest audio recordings into Qdrant")
+    parser.add_argument("source", help="Directory of recordings or a manifest file")
+    parser.add_argument("--collection", default="audio_batch")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent transcriptions")
+    parser.add_argument("--segment-workers", type=int, default=1,
+                        help="Parallel uploads per long recording; AssemblyAI sees up to "
+                             "--concurrency x --segment-workers requests at once")
+    parser.add_argument("--sentiment-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--embed-backend", default=os.getenv("AUDIO_RAG_EMBED_BACKEND", "bge-large-fp32"),
+                        help="See embedding_backends.BACKENDS")
+    parser.add_argument("--embed-threads", type=int, default=None)
+    parser.add_argument("--embed-batch-size", type=int, default=32)
+    parser.add_argument("--upsert-batch-size", type=int, default=512)
+    parser.add_argument("--chunking", choices=("window", "utterance"), default=None,
+                        help="Defaults to AUDIO_RAG_CHUNKING (window)")
+    parser.add_argument("--vector-dim", type=int, default=None, help="Defaults to the embedder's output size")
+    parser.add_argument("--checkpoint", default=None, help="Defaults to <collection>.checkpoint.jsonl")
+    parser.add_argument("--qdrant-url", default=None)
+    parser.add_argument("--qdrant-location", default=None, help='e.g. ":memory:" for a local client')
+    parser.add_argument("--fake-transcriber", action="store_true", help="Synthetic transcripts, no API calls")
+    parser.add_argument("--fake-latency", type=float, default=0.0)
+    parser.add_argument("--fake-embedder", action="store_true", help="Hashing embedder, no model download")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    stats = run(parse_args(argv))
+    print(json.dumps(stats, indent=2))
+    return 1 if stats["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# Per-utterance documents vs overlapping time/token windows: vectors per hour of audio,
+# ingest time (embed + upsert), retrieval recall and packed-context fact recall per budget.
+#   python -m benchmarks.bench_chunking --utterances 3000
+#   python -m benchmarks.bench_chunking --model BAAI/bge-large-en-v1.5
+import time
+import argparse
+from benchmarks.bench_context import fact_recall
+from benchmarks.bench_retrieval import FIXTURE, build_embedder, evaluate, index_fixture, load_fixture
+from benchmarks.common import emit
+from chunking import build_documents
+from context_builder import ContextBuilder
+from fakes import synthetic_utterances
+from ingest_pipeline import stream_ingest
+from retrieval import EnhancedRetriever
+from vector_store import EnhancedQdrantVDB
+
+def vectors_per_hour(documents, transcripts) -> float:
+    duration_ms = transcripts[-1]["end"] - transcripts[0]["start"]
+    return round(len(documents) / (duration_ms / 3_600_000), 1) if duration_ms else 0.0
+
+def ingest_seconds(documents, embeddata, dim: int, scheme: str) -> float:
+    vector_db = EnhancedQdrantVDB(f"bench_chunking_{scheme}", vector_dim=dim, location=":memory:")
+    vector_db.define_client()
+    vector_db.create_collection()
+    start = time.perf_counter()
+    stream_ingest(iter(documents), embeddata, vector_db)
+    return round(time.perf_counter() - start, 3)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--utterances", type=int, default=2000, help="Synthetic transcript length for ingest timing")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--budget", type=int, nargs="+", default=[1200, 300],
+                        help="Context token budgets for fact recall; 1200 is the app default")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture)
+    synthetic = synthetic_utterances(args.utterances, seed=7)
+    embeddata = build_embedder(args.model)
+    dim = embeddata.dim
+
+    results = {"embedder": args.model or embeddata.embed_model_name, "synthetic_utterances": args.utterances}
+    for scheme in ("utterance", "window"):
+        documents = build_documents(synthetic, "synthetic", scheme=scheme)
+        vector_db, sparse_index = index_fixture(fixture, embeddata, collection=f"bench_chunking_fixture_{scheme}",
+                                                chunking=scheme)
+        retriever = EnhancedRetriever(vector_db=vector_db, embeddata=embeddata, limit=args.k,
+                                      sparse_index=sparse_index)
+        hits = [(retriever.search(q["query"]), q["facts"]) for q in fixture["queries"]]
+        recall = {}
+        for budget in args.budget:
+            builder = ContextBuilder(token_budget=budget)
+            facts = [fact_recall(builder.build(h), f) for h, f in hits]
+            recall[str(budget)] = round(sum(facts) / len(facts), 4)
+        results[scheme] = {
+            "vectors": len(documents),
+            "vectors_per_hour": vectors_per_hour(documents, synthetic),
+            "ingest_seconds": ingest_seconds(documents, embeddata, dim, scheme),
+            "fixture_vectors": len(build_documents(fixture["segments"], "fixture", scheme=scheme)),
+            "hybrid": evaluate(retriever, fixture["queries"], args.k, repeats=1),
+            "fact_recall": recall,
+        }
+    results["vector_reduction"] = round(1 - results["window"]["vectors"] / results["utterance"]["vectors"], 4)
+    emit(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# Prompt size and answer-bearing content: concatenating every hit (the old generate_context,
+# with the old "(Sentiment: x)" decorations) vs ContextBuilder packing, on the fixture call.
+# Quality proxy: share of each query's expected facts that make it into the context. The
+# default budget is the app's (AUDIO_RAG_CONTEXT_TOKENS); smaller ones show the tradeoff.
+#   python -m benchmarks.bench_context --limit 10 --budget 1200 300 150
+import argparse
+from benchmarks.bench_retrieval import FIXTURE, build_embedder, index_fixture, load_fixture
+from benchmarks.common import emit
+from context_builder import ContextBuilder
+from retrieval import EnhancedRetriever
+from summarizer import estimate_tokens
+
+def concatenated_context(hits) -> str:
+    return "\n\n---\n\n".join(f"{hit.payload['context']} (Sentiment: 0.00)" for hit in hits)
+
+def fact_recall(context: str, facts) -> float:
+    return sum(fact.lower() in context.lower() for fact in facts) / len(facts)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--budget", type=int, nargs="+", default=[1200])
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture)
+    embeddata = build_embedder(args.model)
+    vector_db, sparse_index = index_fixture(fixture, embeddata)
+    retriever = EnhancedRetriever(vector_db=vector_db, embeddata=embeddata, limit=args.limit,
+                                  sparse_index=sparse_index)
+    hits_per_query = [(retriever.search(q["query"]), q["facts"]) for q in fixture["queries"]]
+
+    def summarize(contexts) -> dict:
+        tokens = [estimate_tokens(c) for c, _ in contexts]
+        recall = [fact_recall(c, facts) for c, facts in contexts]
+        return {"mean_context_tokens": round(sum(tokens) / len(tokens), 1),
+                "fact_recall": round(sum(recall) / len(recall), 4)}
+
+    results = {"queries": len(fixture["queries"]), "limit": args.limit,
+               "concatenated": summarize([(concatenated_context(hits), facts) for hits, facts in hits_per_query])}
+    for budget in args.budget:
+        builder = ContextBuilder(token_budget=budget)
+        packed = summarize([(builder.build(hits), facts) for hits, facts in hits_per_query])
+        packed["token_reduction"] = round(
+            1 - packed["mean_context_tokens"] / results["concatenated"]["mean_context_tokens"], 4)
+        results[f"packed_{budget}"] = packed
+    emit(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Embedding backends on CPU: load time, docs/sec, single-query latency, and retrieval quality
+# on the fixture call (recall@k against its labels, top-k overlap with the first backend).
+#   python -m benchmarks.bench_embeddings --threads 4
+#   python -m benchmarks.bench_embeddings --backends bge-large-fp32 bge-small-onnx-int8 --docs 2000
+import time
+import argparse
+import numpy as np
+from benchmarks.bench_retrieval import FIXTURE, load_fixture
+from benchmarks.common import emit, latency_summary, recall_at_k
+from embedding_backends import BACKENDS, load_backend
+from fakes import synthetic_utterances
+
+def top_k(query_vectors: np.ndarray, doc_vectors: np.ndarray, k: int):
+    # Exact cosine ranking (vectors are normalised), so only the embeddings differ between runs
+    return np.argsort(-(query_vectors @ doc_vectors.T), axis=1)[:, :k].tolist()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS),
+                        default=["bge-large-fp32", "bge-large-int8", "bge-large-onnx-int8",
+                                 "bge-base-fp32", "bge-small-fp32", "bge-small-onnx-int8"],
+                        help="The first one is the baseline for top-k overlap")
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--docs", type=int, default=512, help="Synthetic utterances embedded for throughput")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--query-repeats", type=int, default=5)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture)
+    segments = [f"{s['speaker']}: {s['text']}" for s in fixture["segments"]]
+    queries = [q["query"] for q in fixture["queries"]]
+    corpus = [f"{u['speaker']}: {u['text']}" for u in synthetic_utterances(args.docs, seed=11)]
+
+    results = {"docs": args.docs, "threads": args.threads, "batch_size": args.batch_size, "k": args.k}
+    baseline = None
+    for name in args.backends:
+        start = time.perf_counter()
+        try:
+            backend = load_backend(name, batch_size=args.batch_size, threads=args.threads)
+        except ImportError as e:
+            results[name] = {"skipped": str(e)}
+            continue
+        load_seconds = time.perf_counter() - start
+        backend.get_text_embedding_batch(corpus[:args.batch_size])  # warm up
+
+        start = time.perf_counter()
+        backend.get_text_embedding_batch(corpus)
+        docs_per_sec = len(corpus) / (time.perf_counter() - start)
+
+        latencies = []
+        for _ in range(args.query_repeats):
+            for query in queries:
+                start = time.perf_counter()
+                backend.get_query_embedding(query)
+                latencies.append(time.perf_counter() - start)
+
+        ranked = top_k(np.asarray(backend.embed_queries(queries), dtype=np.float32),
+                       np.asarray(backend.get_text_embedding_batch(segments), dtype=np.float32), args.k)
+        recall = sum(recall_at_k(r, q["relevant"], args.k) for r, q in zip(ranked, fixture["queries"])) / len(queries)
+        if baseline is None:
+            baseline = ranked
+        overlap = sum(len(set(r) & set(b)) / args.k for r, b in zip(ranked, baseline)) / len(queries)
+
+        results[name] = {
+            "dim": backend.dim,
+            "load_seconds": round(load_seconds, 2),
+            "docs_per_sec": round(docs_per_sec, 1),
+            "query_latency": latency_summary(latencies),
+            f"recall@{args.k}": round(recall, 4),
+            f"overlap@{args.k}_vs_{args.backends[0]}": round(overlap, 4),
+        }
+        del backend
+    emit(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Peak Python heap and wall time of the old in-memory exports vs the streaming writers.
+#   python -m benchmarks.bench_exports --segments 100000 --formats JSON JSONL Parquet
+import io
+import os
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from benchmarks.common import emit
+from exports import EXPORT_FORMATS, WRITERS
+from fakes import synthetic_utterances
+from transcript_store import format_offset
+
+def enriched(n: int):
+    transcripts = synthetic_utterances(n, seed=3)
+    for t in transcripts:
+        t["timestamp"] = format_offset(t["start"])
+        t["word_count"] = len(t["text"].split())
+        t["sentiment"] = {"polarity": 0.0, "subjectivity": 0.0}
+    return transcripts
+
+def in_memory_json(transcripts, path):
+    # What export_to_json did, plus handing the buffer to the download button
+    data = io.BytesIO(json.dumps(transcripts, indent=2).encode("utf-8"))
+    with open(path, "wb") as f:
+        f.write(data.getvalue())
+
+def measure(fn, transcripts, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(transcripts, path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(elapsed, 3), "peak_heap_mb": round(peak / 2**20, 2),
+            "file_mb": round(os.path.getsize(path) / 2**20, 2)}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--segments", type=int, default=100000)
+    parser.add_argument("--formats", nargs="+", default=["JSON", "JSONL", "Parquet"], choices=list(EXPORT_FORMATS))
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    transcripts = enriched(args.segments)
+    results = {"segments": args.segments}
+    with tempfile.TemporaryDirectory() as tmp:
+        results["json_in_memory"] = measure(in_memory_json, transcripts, os.path.join(tmp, "old.json"))
+        for fmt in args.formats:
+            path = os.path.join(tmp, "export" + EXPORT_FORMATS[fmt][0])
+            try:
+                results[fmt] = measure(WRITERS[fmt], transcripts, path)
+            except RuntimeError as e:
+                results[fmt] = {"skipped": str(e)}
+    emit(results, args.output)
+
+if __name__ == "__main__":
+    main()
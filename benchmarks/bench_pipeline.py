@@ -0,0 +1,170 @@
+# End-to-end pipeline on synthetic recordings of several sizes, fully offline by default:
+# fake transcriber -> sentiment stage -> chunking -> embed -> Qdrant upsert -> search -> RAG.query
+# against a fake streaming LLM. Reports per-stage throughput, latency percentiles and peak RSS.
+#   python -m benchmarks.bench_pipeline --sizes 100 1000 5000 --output run.json
+#   python -m benchmarks.bench_pipeline --output new.json --compare run.json --tolerance 0.2
+# With --compare, regressions beyond the tolerance are listed and the exit status is 1.
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from benchmarks.bench_retrieval import build_embedder
+from benchmarks.common import PeakRSS, compare, emit, latency_summary, load_results, rss_bytes
+from chunking import build_documents
+from fakes import FakeLLM, FakeTranscriber
+from generation import EnhancedRAG
+from ingest_pipeline import iter_batches
+from retrieval import EnhancedRetriever
+from sentiment import TextBlobSentiment, attach_sentiment
+from sparse_index import BM25Index
+from transcript_store import enrich_transcripts
+from vector_store import EnhancedQdrantVDB
+
+BYTES_PER_UTTERANCE = 1024
+
+class Stage:
+    # Times a block, records per-item/per-batch latencies and the RSS high-water mark
+    def __init__(self, items: int = 0):
+        self.items = items
+        self.latencies = []
+        self.result = {}
+
+    def __enter__(self):
+        self._rss = PeakRSS().__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._start
+        self._rss.__exit__(*exc)
+        self.result = {"seconds": round(elapsed, 4),
+                       "items_per_sec": round(self.items / elapsed, 2) if elapsed and self.items else 0.0,
+                       "peak_rss_mb": round(self._rss.peak / 2**20, 1)}
+        if self.latencies:
+            self.result["latency"] = latency_summary(self.latencies)
+
+    def timed(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        value = fn(*args, **kwargs)
+        self.latencies.append(time.perf_counter() - start)
+        return value
+
+def synthetic_queries(transcripts, count: int, seed: int):
+    rng = random.Random(seed)
+    queries = []
+    for t in rng.sample(transcripts, min(count, len(transcripts))):
+        words = t["text"].split()
+        queries.append(" ".join(rng.sample(words, min(4, len(words)))))
+    return queries
+
+def run_size(size: int, args, embeddata, sentiment_stage, tmp: str):
+    stages = {}
+    audio_path = os.path.join(tmp, f"call_{size}.wav")
+    with open(audio_path, "wb") as f:
+        f.truncate(size * BYTES_PER_UTTERANCE)
+
+    with Stage(size) as stage:
+        transcripts = enrich_transcripts(FakeTranscriber(bytes_per_utterance=BYTES_PER_UTTERANCE)
+                                         .transcribe_audio(audio_path, "en"))
+    stages["transcribe"] = stage.result
+
+    with Stage(size) as stage:
+        attach_sentiment(transcripts, *sentiment_stage.analyze_batch([t["text"] for t in transcripts]))
+    stages["sentiment"] = stage.result
+
+    with Stage(size) as stage:
+        documents = build_documents(transcripts, f"bench-{size}", scheme=args.chunking)
+    stages["chunk"] = stage.result
+    stages["chunk"]["documents"] = len(documents)
+
+    with Stage(len(documents)) as stage:
+        embeddings = []
+        for batch in iter_batches((d["context"] for d in documents), embeddata.batch_size):
+            embeddings.extend(stage.timed(embeddata.embed, batch))
+    stages["embed"] = stage.result
+
+    vector_db = EnhancedQdrantVDB(f"bench_pipeline_{size}", vector_dim=embeddata.dim,
+                                  batch_size=args.upsert_batch_size, url=args.qdrant_url,
+                                  location=None if args.qdrant_url else ":memory:")
+    vector_db.define_client()
+    vector_db.create_collection()
+    sparse_index = BM25Index()
+    with Stage(len(documents)) as stage:
+        for start in range(0, len(documents), args.upsert_batch_size):
+            batch = documents[start:start + args.upsert_batch_size]
+            ids = stage.timed(vector_db.ingest_batch, [d["context"] for d in batch],
+                              embeddings[start:start + args.upsert_batch_size], payloads=batch)
+            sparse_index.add(ids, [d["context"] for d in batch], batch)
+        vector_db.finalize_ingest()
+    stages["ingest"] = stage.result
+
+    queries = synthetic_queries(transcripts, args.queries, seed=size)
+    retriever = EnhancedRetriever(vector_db=vector_db, embeddata=embeddata, sparse_index=sparse_index,
+                                  mode=args.retrieval_mode)
+    with Stage(len(queries)) as stage:
+        for query in queries:
+            stage.timed(retriever.search, query)
+    stages["retrieve"] = stage.result
+
+    llm = FakeLLM(latency=args.llm_latency, token_latency=args.token_latency)
+    rag = EnhancedRAG(retriever=retriever, llm_name="fake", llm=llm)
+    first_token = []
+    with Stage(len(queries)) as stage:
+        for query in queries:
+            start = time.perf_counter()
+            for n, _ in enumerate(rag.query(query)):
+                if n == 0:
+                    first_token.append(time.perf_counter() - start)
+            stage.latencies.append(time.perf_counter() - start)
+    stages["generate"] = stage.result
+    stages["generate"]["ttft"] = latency_summary(first_token)
+
+    if args.qdrant_url:
+        vector_db.client.delete_collection(vector_db.collection_name)
+    return stages
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000], help="Utterances per recording")
+    parser.add_argument("--model", default=None, help="Embedding backend / model; defaults to the hashing embedder")
+    parser.add_argument("--chunking", choices=("window", "utterance"), default="window")
+    parser.add_argument("--retrieval-mode", choices=("dense", "sparse", "hybrid"), default="hybrid")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--upsert-batch-size", type=int, default=512)
+    parser.add_argument("--sentiment-workers", type=int, default=None)
+    parser.add_argument("--llm-latency", type=float, default=0.02)
+    parser.add_argument("--token-latency", type=float, default=0.0)
+    parser.add_argument("--qdrant-url", default=None, help="Defaults to an in-process :memory: client")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None, help="Earlier --output file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    embeddata = build_embedder(args.model)
+    sentiment_stage = TextBlobSentiment(workers=args.sentiment_workers)
+    results = {
+        "config": {"sizes": args.sizes, "embedder": args.model or embeddata.embed_model_name,
+                   "chunking": args.chunking, "retrieval_mode": args.retrieval_mode, "queries": args.queries,
+                   "qdrant": args.qdrant_url or ":memory:"},
+        "sizes": {},
+    }
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in args.sizes:
+                results["sizes"][str(size)] = run_size(size, args, embeddata, sentiment_stage, tmp)
+    finally:
+        sentiment_stage.close()
+    results["final_rss_mb"] = round(rss_bytes() / 2**20, 1)
+    emit(results, args.output)
+
+    if args.compare:
+        regressions = compare(results["sizes"], load_results(args.compare).get("sizes", {}), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
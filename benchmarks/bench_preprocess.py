@@ -0,0 +1,80 @@
+# Bytes uploaded and wall-clock transcription time for a long synthetic call: the original
+# WAV sent as one job vs preprocessed (mono 16 kHz, silence trimmed, re-encoded, split at
+# pauses) with segments transcribed in parallel and stitched. Uses FakeSpeechTranscriber,
+# which really listens to the audio, so stitched offsets and speaker labels are checked
+# against the ground truth.
+#   python -m benchmarks.bench_preprocess --minutes 20 --segment-seconds 300 --workers 4
+import os
+import argparse
+import tempfile
+from collections import Counter
+from benchmarks.common import emit, timed
+from audio_preprocess import DEFAULT_CODEC, prepare_audio, preprocess_config, transcribe_prepared
+from fakes import FakeSpeechTranscriber, synthetic_call_audio
+
+def accuracy(utterances, truth):
+    # Offset error of the best-overlapping utterance per true turn, and the share of turns
+    # whose label agrees with the majority mapping of transcript labels to true speakers
+    matches = []
+    for t in truth:
+        best = max(utterances, key=lambda u: min(u["end"], t["end"]) - max(u["start"], t["start"]))
+        matches.append((best, t))
+    votes = Counter((u["speaker"], t["speaker"]) for u, t in matches)
+    mapping = {}
+    for (label, speaker), _ in votes.most_common():
+        mapping.setdefault(label, speaker)
+    errors = [abs(u["start"] - t["start"]) for u, t in matches]
+    return {"utterances": len(utterances),
+            "mean_offset_error_ms": round(sum(errors) / len(errors), 1), "max_offset_error_ms": max(errors),
+            "speaker_accuracy": round(sum(mapping[u["speaker"]] == t["speaker"] for u, t in matches) / len(matches), 4),
+            "speaker_labels": len({u["speaker"] for u in utterances})}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=20)
+    parser.add_argument("--sample-rate", type=int, default=44100)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--speakers", type=int, default=2)
+    parser.add_argument("--codec", default=DEFAULT_CODEC)
+    parser.add_argument("--segment-seconds", type=float, default=300)
+    parser.add_argument("--overlap-seconds", type=float, default=15)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--upload-mbps", type=float, default=200, help="Simulated upload bandwidth, Mbit/s")
+    parser.add_argument("--realtime-factor", type=float, default=0.005, help="Simulated processing seconds per audio second")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "call.wav")
+        truth = synthetic_call_audio(path, args.minutes * 60, sample_rate=args.sample_rate,
+                                     channels=args.channels, speakers=args.speakers, seed=7)
+        results = {"config": {"minutes": args.minutes, "sample_rate": args.sample_rate, "channels": args.channels,
+                              "codec": preprocess_config(args.codec)["codec"], "segment_seconds": args.segment_seconds,
+                              "workers": args.workers, "upload_mbps": args.upload_mbps}}
+
+        def transcriber():
+            return FakeSpeechTranscriber(upload_bytes_per_sec=args.upload_mbps * 1e6 / 8,
+                                         realtime_factor=args.realtime_factor)
+
+        baseline = transcriber()
+        utterances, seconds = timed(baseline.transcribe_audio, path)
+        results["original"] = {"bytes_uploaded": baseline.bytes_uploaded, "seconds": round(seconds, 3),
+                               **accuracy(utterances, truth)}
+
+        fake = transcriber()
+        prepared = prepare_audio(path, codec=args.codec, segment_seconds=args.segment_seconds,
+                                 overlap_seconds=args.overlap_seconds)
+        try:
+            utterances, seconds = timed(transcribe_prepared, prepared, fake.transcribe_audio, args.workers)
+        finally:
+            prepared.cleanup()
+        results["preprocessed"] = {"bytes_uploaded": fake.bytes_uploaded, **prepared.as_dict(),
+                                   "seconds": round(prepared.seconds + seconds, 3), **accuracy(utterances, truth)}
+
+    results["bytes_reduction"] = round(1 - results["preprocessed"]["bytes_uploaded"]
+                                       / results["original"]["bytes_uploaded"], 4)
+    results["speedup"] = round(results["original"]["seconds"] / results["preprocessed"]["seconds"], 2)
+    emit(results, args.output)
+
+if __name__ == "__main__":
+    main()
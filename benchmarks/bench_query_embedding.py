@@ -0,0 +1,69 @@
+# Query-embedding throughput and latency for N concurrent chat sessions sharing one model:
+# one model call per query (the old path) vs QueryEmbedder micro-batches.
+#   python -m benchmarks.bench_query_embedding --sessions 1 8 32 --queries 50
+#   python -m benchmarks.bench_query_embedding --backend bge-small-onnx-int8 --sessions 16
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import emit, latency_summary
+from fakes import FakeEmbedData, synthetic_utterances
+from resource_pool import QueryEmbedder
+
+def run(embed, sessions: int, queries: int, think: float, texts):
+    latencies = []
+
+    def session(seed: int):
+        rng = random.Random(seed)
+        for _ in range(queries):
+            # Closed loop: a session asks its next question some time after the last answer
+            time.sleep(rng.expovariate(1 / think) if think else 0)
+            query = rng.choice(texts)
+            start = time.perf_counter()
+            embed(query)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(session, range(sessions)))
+    seconds = time.perf_counter() - start
+    return {"seconds": round(seconds, 3), "queries_per_second": round(len(latencies) / seconds, 1),
+            "latency": latency_summary(latencies)}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--queries", type=int, default=50, help="Queries per session")
+    parser.add_argument("--think", type=float, default=0.05, help="Mean seconds between a session's queries")
+    parser.add_argument("--backend", default=None, help="embedding_backends name; a simulated model if omitted")
+    parser.add_argument("--call-latency", type=float, default=0.02, help="Simulated model: seconds per call")
+    parser.add_argument("--text-latency", type=float, default=0.002, help="Simulated model: seconds per query")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    if args.backend:
+        from embedding_backends import load_backend
+        model = load_backend(args.backend)
+    else:
+        model = FakeEmbedData(call_latency=args.call_latency, text_latency=args.text_latency)
+    texts = [u["text"] for u in synthetic_utterances(500, seed=5)]
+    model.embed_queries(texts[:2])
+
+    results = {"config": vars(args)}
+    for n in args.sessions:
+        embedder = QueryEmbedder(model.embed_queries, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+        direct = run(model.get_query_embedding, n, args.queries, args.think, texts)
+        batched = run(embedder.get_query_embedding, n, args.queries, args.think, texts)
+        batched["embedder"] = embedder.stats()
+        results[str(n)] = {
+            "direct": direct,
+            "batched": batched,
+            "throughput_gain": round(batched["queries_per_second"] / direct["queries_per_second"], 2),
+            "p99_reduction": round(1 - batched["latency"]["p99_ms"] / direct["latency"]["p99_ms"], 4),
+        }
+    emit(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Upstream LLM calls and answer latency for concurrent sessions asking overlapping questions,
+# straight to the LLM vs through ResponseCache (hits replay, identical in-flight requests coalesce).
+#   python -m benchmarks.bench_response_cache --sessions 8 --questions 20 --distinct 5
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import emit, latency_summary
+from fakes import FakeLLM
+from response_cache import ResponseCache, response_delta
+
+CONTEXT = "[00:01:12] Speaker A: the refund reference is 4471\n\n---\n\n[00:02:40] Speaker B: thanks"
+TEMPLATE = "Context:\n{context}\n\nQuestion: {query}\nAnswer:"
+
+def run(args, cache):
+    llm = FakeLLM(latency=args.llm_latency, token_latency=args.token_latency)
+    questions = [f"question {i} about the refund?" for i in range(args.distinct)]
+    latencies, first_tokens = [], []
+
+    def ask(query: str) -> str:
+        prompt = TEMPLATE.format(context=CONTEXT, query=query)
+        start = time.perf_counter()
+        if cache is None:
+            stream = llm.stream_complete(prompt)
+        else:
+            key = ResponseCache.key_for("fake", TEMPLATE, CONTEXT, query)
+            stream = cache.stream(key, lambda: llm.stream_complete(prompt))
+        text = ""
+        for chunk in stream:
+            if not text:
+                first_tokens.append(time.perf_counter() - start)
+            text += response_delta(chunk)
+        latencies.append(time.perf_counter() - start)
+        return text
+
+    def session(seed: int):
+        rng = random.Random(seed)
+        return [ask(rng.choice(questions)) for _ in range(args.questions)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        answers = list(pool.map(session, range(args.sessions)))
+    result = {"seconds": round(time.perf_counter() - start, 3), "llm_calls": llm.calls,
+              "latency": latency_summary(latencies), "ttft": latency_summary(first_tokens)}
+    if cache is not None:
+        result["cache"] = cache.stats()
+    return result, answers
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--questions", type=int, default=20, help="Questions per session")
+    parser.add_argument("--distinct", type=int, default=5, help="Distinct questions across all sessions")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--token-latency", type=float, default=0.005)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    uncached, expected = run(args, None)
+    cached, answers = run(args, ResponseCache())
+    results = {"config": vars(args), "uncached": uncached, "cached": cached,
+               "answers_identical": answers == expected,
+               "llm_call_reduction": round(1 - cached["llm_calls"] / uncached["llm_calls"], 4)}
+    emit(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Latency and recall@k of dense, sparse (BM25) and hybrid retrieval on a fixture call.
+#   python -m benchmarks.bench_retrieval                      # hashing embedder, no model download
+#   python -m benchmarks.bench_retrieval --model bge-small-onnx-int8    # or any Hugging Face model id
+import os
+import json
+import time
+import argparse
+from typing import List
+from benchmarks.common import emit, latency_summary, recall_at_k
+from chunking import build_documents
+from ingest_pipeline import stream_ingest
+from retrieval import EnhancedRetriever
+from sparse_index import BM25Index
+from vector_store import EnhancedQdrantVDB
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "support_call.json")
+
+def load_fixture(path: str = FIXTURE):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def build_embedder(model: str):
+    # model: an embedding_backends.BACKENDS name, or a Hugging Face model id for rag_code's loader
+    if model:
+        from embedding_backends import BACKENDS, load_backend
+        from embedding_cache import CachedEmbedData
+        if model in BACKENDS:
+            return CachedEmbedData(backend=load_backend(model))
+        return CachedEmbedData(embed_model_name=model)
+    from fakes import FakeEmbedData
+    return FakeEmbedData()
+
+def index_fixture(fixture, embeddata, collection: str = "bench_retrieval", chunking: str = "window"):
+    vector_db = EnhancedQdrantVDB(collection, vector_dim=embeddata.dim,
+                                  location=":memory:")
+    vector_db.define_client()
+    vector_db.create_collection()
+    sparse_index = BM25Index()
+    records = build_documents(fixture["segments"], "fixture", scheme=chunking)
+    stream_ingest(records, embeddata, vector_db,
+                  on_batch=lambda ids, batch: sparse_index.add(ids, [r["context"] for r in batch], batch))
+    return vector_db, sparse_index
+
+def covered_segments(points) -> List[int]:
+    # Fixture utterances covered by each hit, in rank order; a window covers several
+    segments = []
+    for p in points:
+        first = p.payload.get("seg_start", p.payload["segment"])
+        last = p.payload.get("seg_end", p.payload["segment"])
+        segments.extend(s for s in range(first, last + 1) if s not in segments)
+    return segments
+
+def evaluate(retriever, queries, k: int, repeats: int):
+    latencies, recalls, routes = [], [], {}
+    for _ in range(repeats):
+        for q in queries:
+            start = time.perf_counter()
+            result = retriever.search(q["query"])
+            latencies.append(time.perf_counter() - start)
+            covered = covered_segments(result[:k])
+            recalls.append(recall_at_k(covered, q["relevant"], len(covered)) if covered else 0.0)
+            routes[retriever.last_route] = routes.get(retriever.last_route, 0) + 1
+    return {f"recall@{k}": round(sum(recalls) / len(recalls), 4), "latency": latency_summary(latencies),
+            "routes": routes}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=None, help="Embedding model; defaults to the offline hashing embedder")
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--chunking", choices=("window", "utterance"), default="window")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture)
+    embeddata = build_embedder(args.model)
+    vector_db, sparse_index = index_fixture(fixture, embeddata, chunking=args.chunking)
+    results = {"segments": len(fixture["segments"]), "chunking": args.chunking, "queries": len(fixture["queries"]),
+               "embedder": args.model or embeddata.embed_model_name}
+    for mode in ("dense", "sparse", "hybrid"):
+        retriever = EnhancedRetriever(vector_db=vector_db, embeddata=embeddata, limit=args.k,
+                                      sparse_index=sparse_index, mode=mode)
+        results[mode] = evaluate(retriever, fixture["queries"], args.k, args.repeats)
+    emit(results, args.output)
+
+if __name__ == "__main__":
+    main()
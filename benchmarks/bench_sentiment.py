@@ -0,0 +1,49 @@
+# Per-segment TextBlob loop vs the batched SentimentStage on a synthetic transcript.
+#   python -m benchmarks.bench_sentiment --utterances 10000
+import os
+import time
+import json
+import argparse
+from textblob import TextBlob
+from fakes import synthetic_utterances
+from sentiment import TextBlobSentiment
+
+def per_segment_loop(texts):
+    # What EnhancedTranscribe.transcribe_audio used to do
+    results = []
+    for text in texts:
+        blob = TextBlob(text)
+        results.append({"polarity": blob.sentiment.polarity, "subjectivity": blob.sentiment.subjectivity})
+    return results
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--utterances", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    texts = [u["text"] for u in synthetic_utterances(args.utterances)]
+    serial = TextBlobSentiment(workers=1)
+    pooled = TextBlobSentiment(workers=args.workers)
+    # Start the pool outside the timed region; it is created once per process in the app
+    pooled.analyze_batch(texts[:pooled.min_parallel])
+
+    results = {
+        "utterances": len(texts),
+        "workers": args.workers,
+        "loop_seconds": timed(per_segment_loop, texts),
+        "batch_serial_seconds": timed(serial.analyze_batch, texts),
+        "batch_pool_seconds": timed(pooled.analyze_batch, texts),
+    }
+    results["pool_speedup"] = results["loop_seconds"] / results["batch_pool_seconds"]
+    pooled.close()
+    serial.close()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Cold-start costs, each measured in a fresh interpreter:
+#   import_seconds      - `import HEMP4` vs importing rag_code eagerly, as HEMP4 used to
+#   first_paint_seconds - first full script run under streamlit.testing's AppTest
+#   first_query_seconds - interpreter start until the warmed-up model returns a query vector
+#   python -m benchmarks.bench_startup --repeats 3
+import os
+import sys
+import argparse
+import subprocess
+from benchmarks.common import emit, percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_APP = """
+import time; start = time.perf_counter()
+import HEMP4
+print(time.perf_counter() - start)
+"""
+
+IMPORT_EAGER = """
+import time; start = time.perf_counter()
+import rag_code, qdrant_client, assemblyai, pandas
+print(time.perf_counter() - start)
+"""
+
+FIRST_PAINT = """
+import time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+AppTest.from_file("HEMP4.py", default_timeout=600).run()
+print(time.perf_counter() - start)
+"""
+
+FIRST_QUERY = """
+import time; start = time.perf_counter()
+import HEMP4
+HEMP4.get_embed_model().embed_model.get_query_embedding("what was the refund reference?")
+print(time.perf_counter() - start)
+"""
+
+def measure(code: str, repeats: int, env: dict):
+    samples = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+        if out.returncode != 0:
+            return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "failed"}
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return {"median_seconds": round(percentile(samples, 50), 3), "max_seconds": round(max(samples), 3),
+            "samples": [round(x, 3) for x in samples]}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    results = {
+        "import_seconds": measure(IMPORT_APP, args.repeats, env),
+        "eager_import_seconds": measure(IMPORT_EAGER, args.repeats, env),
+        "first_paint_seconds": measure(FIRST_PAINT, args.repeats, env),
+        "first_query_seconds": measure(FIRST_QUERY, args.repeats, env),
+    }
+    emit(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Map-reduce summarization against the fake LLM: chunk count, peak concurrency, wall-clock,
+# and how many LLM calls a re-summarize and an appended recording cost with the chunk cache.
+#   python -m benchmarks.bench_summarize --utterances 3000 --workers 8
+import time
+import argparse
+import tempfile
+from benchmarks.common import emit
+from disk_cache import DiskCache
+from fakes import FakeLLM, synthetic_utterances
+from summarizer import HierarchicalSummarizer, chunk_transcript
+
+def run(summarizer, llm, transcripts):
+    calls_before = llm.calls
+    start = time.perf_counter()
+    summarizer.summarize(transcripts)
+    return {"seconds": round(time.perf_counter() - start, 3), "llm_calls": llm.calls - calls_before}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--utterances", type=int, default=3000)
+    parser.add_argument("--appended", type=int, default=200)
+    parser.add_argument("--token-budget", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    transcripts = synthetic_utterances(args.utterances)
+    extended = transcripts + synthetic_utterances(args.appended, seed=1)
+    results = {"utterances": args.utterances, "chunks": len(chunk_transcript(transcripts, args.token_budget))}
+
+    with tempfile.TemporaryDirectory() as cache_root:
+        for label, workers in (("serial", 1), ("concurrent", args.workers)):
+            llm = FakeLLM(latency=args.latency)
+            cache = DiskCache(f"summaries-{label}", root=cache_root)
+            summarizer = HierarchicalSummarizer(llm, "fake", token_budget=args.token_budget,
+                                                max_workers=workers, cache=cache)
+            results[label] = {
+                "cold": run(summarizer, llm, transcripts),
+                "resummarize": run(summarizer, llm, transcripts),
+                "appended": run(summarizer, llm, extended),
+                "peak_concurrency": llm.max_concurrent,
+            }
+    emit(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Search latency and Qdrant memory: one collection per session vs one shared collection
+# filtered by tenant.
+#   python -m benchmarks.bench_tenancy --sessions 200 --points-per-session 300
+#   python -m benchmarks.bench_tenancy --qdrant-url http://localhost:6333   # server memory from /metrics
+import time
+import random
+import argparse
+import urllib.request
+import numpy as np
+from qdrant_client import QdrantClient
+from benchmarks.common import emit, latency_summary, rss_bytes
+from retrieval import EnhancedRetriever
+from vector_store import EnhancedQdrantVDB
+
+def server_memory(url: str) -> int:
+    with urllib.request.urlopen(f"{url.rstrip('/')}/metrics", timeout=5) as response:
+        for line in response.read().decode("utf-8").splitlines():
+            if line.startswith("memory_resident_bytes"):
+                return int(float(line.split()[-1]))
+    return 0
+
+def memory(args) -> int:
+    return server_memory(args.qdrant_url) if args.qdrant_url else rss_bytes()
+
+def random_vectors(rng: np.random.Generator, n: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def build(client, args, shared: bool):
+    rng = np.random.default_rng(0)
+    dbs = []
+    for i in range(args.sessions):
+        if shared:
+            db = EnhancedQdrantVDB("bench_shared", vector_dim=args.dim, client=client, tenant=f"session-{i}")
+        else:
+            db = EnhancedQdrantVDB(f"bench_session_{i}", vector_dim=args.dim, client=client)
+        db.create_collection()
+        vectors = random_vectors(rng, args.points_per_session, args.dim)
+        payloads = [{"context": f"session {i} segment {j}", "file_hash": f"file-{i}", "segment": j,
+                     "speaker": f"Speaker {'AB'[j % 2]}", "start_ms": j * 4000}
+                    for j in range(args.points_per_session)]
+        db.ingest_batch([p["context"] for p in payloads], vectors, payloads)
+        db.finalize_ingest()
+        dbs.append(db)
+    return dbs
+
+def measure(dbs, args):
+    rng = np.random.default_rng(1)
+    picker = random.Random(1)
+    queries = random_vectors(rng, args.queries, args.dim)
+    latencies = []
+    for query in queries:
+        retriever = EnhancedRetriever(vector_db=picker.choice(dbs), embeddata=None, limit=args.k)
+        start = time.perf_counter()
+        retriever.dense_search(query.tolist(), args.k)
+        latencies.append(time.perf_counter() - start)
+    return latency_summary(latencies)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--points-per-session", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--qdrant-url", default=None, help="Defaults to an in-process :memory: client")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = {"sessions": args.sessions, "points_per_session": args.points_per_session, "dim": args.dim}
+    for label, shared in (("per_session", False), ("shared", True)):
+        client = QdrantClient(url=args.qdrant_url) if args.qdrant_url else QdrantClient(location=":memory:")
+        before = memory(args)
+        started = time.perf_counter()
+        dbs = build(client, args, shared)
+        results[label] = {
+            "build_seconds": round(time.perf_counter() - started, 3),
+            "memory_delta_bytes": memory(args) - before,
+            "collections": len({db.collection_name for db in dbs}),
+            "search": measure(dbs, args),
+        }
+        for name in {db.collection_name for db in dbs}:
+            client.delete_collection(name)
+        EnhancedQdrantVDB._ready_collections.clear()
+        client.close()
+    emit(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Per-rerun cost of the statistics panel and transcript tab: rescanning transcript dicts and
+# building a full DataFrame (the old path) vs TranscriptStore aggregates and one page.
+#   python -m benchmarks.bench_transcript_store --segments 1000 10000 100000
+import time
+import argparse
+from benchmarks.common import emit
+from benchmarks.bench_exports import enriched
+from transcript_store import TranscriptStore
+
+def old_rerun(transcripts):
+    import pandas as pd
+    word_counts = [t["word_count"] for t in transcripts]
+    polarities = [t["sentiment"]["polarity"] for t in transcripts]
+    stats = {"total_segments": len(transcripts), "avg_word_count": sum(word_counts) / len(word_counts),
+             "avg_sentiment": sum(polarities) / len(polarities),
+             "speakers": len(set(t["speaker"] for t in transcripts))}
+    df = pd.DataFrame(transcripts)
+    df_display = df[["timestamp", "speaker", "text", "sentiment"]].copy()
+    df_display["sentiment"] = df_display["sentiment"].apply(lambda x: f"P={x['polarity']:.2f}, S={x['subjectivity']:.2f}")
+    return stats, df_display
+
+def store_rerun(store, page_size):
+    import pandas as pd
+    rows, _ = store.page(0, page_size)
+    return store.statistics(), store.speaker_stats(), store.sentiment_timeline(60, by_speaker=True), pd.DataFrame(rows)
+
+def best_of(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return round(min(times) * 1000, 3)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--segments", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = {}
+    for n in args.segments:
+        transcripts = enriched(n)
+        start = time.perf_counter()
+        store = TranscriptStore.from_transcripts(transcripts)
+        build_ms = round((time.perf_counter() - start) * 1000, 3)
+        results[str(n)] = {
+            "old_rerun_ms": best_of(lambda: old_rerun(transcripts), args.repeats),
+            "store_build_ms": build_ms,
+            # The timeline is memoized after the first rerun, as in the app
+            "store_rerun_ms": best_of(lambda: store_rerun(store, args.page_size), args.repeats),
+        }
+    emit(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# Wall-clock for N transcription jobs: one at a time vs the scheduler's in-flight cap,
+# against the in-process fake backend.
+#   python -m benchmarks.bench_transcription_jobs --jobs 20 --latency 1.0 --max-in-flight 8
+import json
+import time
+import argparse
+from fakes import FakeTranscriptionBackend
+from transcription_jobs import TranscriptionScheduler
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    args = parser.parse_args()
+
+    results = {"jobs": args.jobs, "latency": args.latency}
+    for label, cap in (("serial", 1), ("scheduled", args.max_in_flight)):
+        backend = FakeTranscriptionBackend(latency=args.latency)
+        scheduler = TranscriptionScheduler(backend, max_in_flight=cap, poll_initial=0.1, poll_max=0.5)
+        start = time.perf_counter()
+        jobs = [scheduler.submit(f"call_{i}.wav") for i in range(args.jobs)]
+        for job in jobs:
+            job.future.result()
+        results[f"{label}_seconds"] = round(time.perf_counter() - start, 3)
+        results[f"{label}_peak_in_flight"] = backend.max_concurrent
+        results[f"{label}_polls"] = sum(job.polls for job in jobs)
+        scheduler.shutdown()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
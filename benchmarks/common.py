@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+import threading
+from typing import Dict, List, Optional, Sequence
+
+def percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = int(rank), min(int(rank) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def latency_summary(seconds: Sequence[float]) -> Dict[str, float]:
+    return {
+        "count": len(seconds),
+        "mean_ms": round(sum(seconds) / len(seconds) * 1000, 3) if seconds else 0.0,
+        "p50_ms": round(percentile(seconds, 50) * 1000, 3),
+        "p95_ms": round(percentile(seconds, 95) * 1000, 3),
+        "p99_ms": round(percentile(seconds, 99) * 1000, 3),
+    }
+
+def rss_bytes() -> int:
+    # Current resident set size of this process
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+class PeakRSS:
+    # High-water RSS while the block runs, sampled on a background thread
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = rss_bytes()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def recall_at_k(retrieved: List, relevant: Sequence, k: int) -> float:
+    if not relevant:
+        return 0.0
+    return len(set(retrieved[:k]) & set(relevant)) / min(len(relevant), k)
+
+def emit(results: Dict, output: Optional[str] = None) -> None:
+    text = json.dumps(results, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+def load_results(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.2, path: str = "") -> List[str]:
+    # Regressions beyond `tolerance` (relative) between two emitted result trees. Keys ending in
+    # _ms, seconds or _mb are lower-is-better; keys containing per_sec are higher-is-better.
+    regressions = []
+    for key, value in current.items():
+        where = f"{path}.{key}" if path else key
+        before = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict) and isinstance(before, dict):
+            regressions.extend(compare(value, before, tolerance, where))
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not isinstance(before, (int, float)):
+            continue
+        if not before:
+            continue
+        change = (value - before) / abs(before)
+        if key.endswith(("_ms", "seconds", "_mb")) and change > tolerance:
+            regressions.append(f"{where}: {before} -> {value} (+{change:.0%})")
+        elif "per_sec" in key and change < -tolerance:
+            regressions.append(f"{where}: {before} -> {value} ({change:.0%})")
+    return regressions
@@ -0,0 +1,82 @@
+import os
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+from summarizer import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+def _line(t: Dict) -> str:
+    return f"{t['speaker']}: {t['text']}" if t.get("speaker") else t["text"]
+
+def utterance_documents(transcripts: Sequence[Dict], file_hash: Optional[str] = None) -> List[Dict]:
+    # One document per utterance (the original scheme)
+    return [{
+        "context": _line(t),
+        "text": t["text"],
+        "file_hash": file_hash,
+        "segment": i,
+        "seg_start": i,
+        "seg_end": i,
+        "speaker": t.get("speaker", ""),
+        "speakers": [t.get("speaker", "")],
+        "start_ms": t.get("start"),
+        "end_ms": t.get("end"),
+    } for i, t in enumerate(transcripts)]
+
+def window_bounds(transcripts: Sequence[Dict], max_tokens: int, max_ms: Optional[int],
+                  overlap: int) -> List[Tuple[int, int]]:
+    # Greedy [start, end) utterance windows closed on whichever of max_tokens / max_ms is hit
+    # first; each window repeats the last `overlap` utterances of the previous one. Boundaries
+    # only depend on earlier utterances, so appending to a recording keeps earlier windows.
+    bounds, start, n = [], 0, len(transcripts)
+    while start < n:
+        end, used = start, 0
+        while end < n:
+            cost = estimate_tokens(_line(transcripts[end]))
+            first, last = transcripts[start].get("start"), transcripts[end].get("end")
+            too_long = max_ms is not None and first is not None and last is not None and last - first > max_ms
+            if end > start and (used + cost > max_tokens or too_long):
+                break
+            used += cost
+            end += 1
+        bounds.append((start, end))
+        if end >= n:
+            break
+        start = max(end - overlap, start + 1)
+    return bounds
+
+def window_documents(transcripts: Sequence[Dict], file_hash: Optional[str] = None,
+                     max_tokens: int = 160, max_ms: Optional[int] = 45000, overlap: int = 1) -> List[Dict]:
+    documents = []
+    for index, (start, end) in enumerate(window_bounds(transcripts, max_tokens, max_ms, overlap)):
+        window = transcripts[start:end]
+        speakers = list(dict.fromkeys(t.get("speaker", "") for t in window))
+        documents.append({
+            "context": "\n".join(_line(t) for t in window),
+            "lines": [[t.get("speaker", ""), t["text"]] for t in window],
+            "file_hash": file_hash,
+            # Window ids depend on the settings, so re-chunking with new settings never
+            # overwrites only part of a file's old points
+            "chunker": f"window-{max_tokens}-{max_ms}-{overlap}",
+            "segment": index,
+            "seg_start": start,
+            "seg_end": end - 1,
+            "speaker": speakers[0],
+            "speakers": speakers,
+            "start_ms": window[0].get("start"),
+            "end_ms": window[-1].get("end"),
+        })
+    return documents
+
+def build_documents(transcripts: Sequence[Dict], file_hash: Optional[str] = None,
+                    scheme: Optional[str] = None) -> List[Dict]:
+    scheme = scheme or os.getenv("AUDIO_RAG_CHUNKING", "window")
+    if scheme == "utterance":
+        return utterance_documents(transcripts, file_hash)
+    if scheme != "window":
+        raise ValueError(f"Unknown chunking scheme: {scheme}")
+    max_ms = int(os.getenv("AUDIO_RAG_CHUNK_MS", 45000))
+    return window_documents(transcripts, file_hash,
+                            max_tokens=int(os.getenv("AUDIO_RAG_CHUNK_TOKENS", 160)),
+                            max_ms=max_ms if max_ms > 0 else None,
+                            overlap=int(os.getenv("AUDIO_RAG_CHUNK_OVERLAP", 1)))
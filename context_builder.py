@@ -0,0 +1,156 @@
+import logging
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from summarizer import estimate_tokens
+from transcript_store import format_offset
+
+logger = logging.getLogger(__name__)
+
+def _shingles(text: str, size: int = 3) -> Set[Tuple[str, ...]]:
+    words = text.lower().split()
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def _jaccard(a: Set, b: Set) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+class _Span:
+    # A run of consecutive segments from one file: segment -> (speaker, text), plus the best
+    # score of any hit covering each segment
+    def __init__(self, score: float, file_hash: Optional[str], parts: Dict[int, Tuple[str, str]],
+                 start_ms: Optional[int], end_ms: Optional[int]):
+        self.score = score
+        self.file_hash = file_hash
+        self.parts = parts
+        self.part_scores = {segment: score for segment in parts}
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+
+    @property
+    def first(self) -> int:
+        return min(self.parts)
+
+    @property
+    def last(self) -> int:
+        return max(self.parts)
+
+    def speaker_at(self, segment: int) -> str:
+        return self.parts[segment][0]
+
+    def trimmed(self, budget: int) -> Optional["_Span"]:
+        # The best-scoring segments that fit in budget tokens, for a span too long to take whole;
+        # ties go to the earlier segment
+        kept, used = {}, estimate_tokens("[00:00:00] ")
+        for segment in sorted(self.parts, key=lambda s: (-self.part_scores[s], s)):
+            speaker, text = self.parts[segment]
+            cost = estimate_tokens(f"{speaker}: {text}") + 1
+            if used + cost <= budget:
+                kept[segment] = self.parts[segment]
+                used += cost
+        if not kept:
+            return None
+        span = _Span(max(self.part_scores[s] for s in kept), self.file_hash, kept,
+                     self.start_ms if min(kept) == self.first else None, self.end_ms)
+        span.part_scores = {s: self.part_scores[s] for s in kept}
+        return span
+
+    def render(self) -> str:
+        lines, previous, previous_segment = [], None, None
+        for segment in sorted(self.parts):
+            speaker, text = self.parts[segment]
+            if previous_segment is not None and segment != previous_segment + 1:
+                lines.append("…")  # segments left out of a trimmed span
+                previous = None
+            if speaker == previous:
+                lines[-1] += " " + text
+            else:
+                lines.append(f"{speaker}: {text}")
+            previous, previous_segment = speaker, segment
+        header = f"[{format_offset(self.start_ms)}]" if self.start_ms is not None else ""
+        return (header + " " if header else "") + "\n".join(lines)
+
+def _span_from_payload(payload: Dict, score: float, position: int) -> _Span:
+    # Window chunks are keyed by the utterances they cover, so overlapping windows merge
+    if payload.get("lines") and payload.get("seg_start") is not None:
+        parts = {payload["seg_start"] + i: (speaker, text) for i, (speaker, text) in enumerate(payload["lines"])}
+        return _Span(score, payload.get("file_hash"), parts, payload.get("start_ms"), payload.get("end_ms"))
+    # Hits without segment metadata (older collections) become one-off spans keyed by rank
+    segment = payload.get("seg_start", payload.get("segment"))
+    speaker = payload.get("speaker", "")
+    text = payload.get("text")
+    if text is None:
+        text = payload.get("context", "")
+        if speaker and text.startswith(f"{speaker}: "):
+            text = text[len(speaker) + 2:]
+    if segment is None:
+        return _Span(score, f"unknown-{position}", {0: (speaker, text)}, None, None)
+    return _Span(score, payload.get("file_hash"), {segment: (speaker, text)},
+                 payload.get("start_ms"), payload.get("end_ms"))
+
+class ContextBuilder:
+    # Turns retriever hits into a prompt context: overlapping or adjacent same-speaker hits
+    # are merged into one span, near-duplicate spans are dropped, and spans are added in score
+    # order until token_budget is spent, then rendered in transcript order. A span too long for
+    # what is left of the budget contributes its best-scoring segments instead of nothing, so
+    # merging many overlapping windows never pushes the answer-bearing ones out.
+    def __init__(self, token_budget: int = 1200, dedup_threshold: float = 0.8):
+        self.token_budget = token_budget
+        self.dedup_threshold = dedup_threshold
+        self.last_stats: Dict = {}
+
+    def _merge(self, spans: List[_Span]) -> List[_Span]:
+        merged: List[_Span] = []
+        for span in sorted(spans, key=lambda s: (str(s.file_hash), s.first)):
+            current = merged[-1] if merged else None
+            if current is not None and current.file_hash == span.file_hash and (
+                    span.first <= current.last
+                    or (span.first == current.last + 1
+                        and span.speaker_at(span.first) == current.speaker_at(current.last))):
+                current.parts.update(span.parts)
+                for segment, score in span.part_scores.items():
+                    current.part_scores[segment] = max(current.part_scores.get(segment, score), score)
+                current.score = max(current.score, span.score)
+                starts = [t for t in (current.start_ms, span.start_ms) if t is not None]
+                ends = [t for t in (current.end_ms, span.end_ms) if t is not None]
+                current.start_ms = min(starts) if starts else None
+                current.end_ms = max(ends) if ends else None
+            else:
+                merged.append(span)
+        return merged
+
+    def spans(self, hits: Sequence) -> List[_Span]:
+        spans = []
+        for position, hit in enumerate(hits):
+            payload = hit.payload if hasattr(hit, "payload") else hit["payload"]
+            score = hit.score if hasattr(hit, "score") else hit.get("score", 0.0)
+            spans.append(_span_from_payload(payload or {}, score, position))
+        return self._merge(spans)
+
+    def build(self, hits: Sequence) -> str:
+        selected: List[Tuple[_Span, str, Set]] = []
+        used = 0
+        candidates = sorted(self.spans(hits), key=lambda s: s.score, reverse=True)
+        dropped = trimmed = 0
+        for span in candidates:
+            rendered = span.render()
+            shingles = _shingles(" ".join(text for _, text in span.parts.values()))
+            if any(_jaccard(shingles, other) >= self.dedup_threshold for _, _, other in selected):
+                dropped += 1
+                continue
+            cost = estimate_tokens(rendered)
+            if used + cost > self.token_budget:
+                span = span.trimmed(self.token_budget - used)
+                if span is None:
+                    continue  # a shorter, lower-scored span may still fit
+                rendered = span.render()
+                cost = estimate_tokens(rendered)
+                if used + cost > self.token_budget:
+                    continue
+                trimmed += 1
+            selected.append((span, rendered, shingles))
+            used += cost
+
+        selected.sort(key=lambda item: (str(item[0].file_hash), item[0].first))
+        self.last_stats = {"hits": len(hits), "spans": len(candidates), "duplicates": dropped,
+                           "trimmed": trimmed, "selected": len(selected), "tokens": used}
+        return "\n\n---\n\n".join(rendered for _, rendered, _ in selected)
@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Shared by every Streamlit session and every process on the host
+DEFAULT_CACHE_ROOT = os.getenv(
+    "AUDIO_RAG_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "audio_rag")
+)
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_json(value: Any) -> str:
+    return hash_bytes(json.dumps(value, sort_keys=True, default=str).encode("utf-8"))
+
+class DiskCache:
+    # Content-addressed file cache. Writes go through a temp file + os.replace so concurrent
+    # readers never see partial entries; eviction is by age first, then least recently used
+    # until the namespace fits in max_bytes. Writes keep a running size total, so the directory
+    # is only walked when that total crosses max_bytes or once per sweep_interval for expiry.
+    def __init__(self, namespace: str, root: str = DEFAULT_CACHE_ROOT,
+                 max_bytes: int = 512 * 1024 * 1024, max_age_seconds: float = 30 * 24 * 3600,
+                 suffix: str = ".json", sweep_interval: float = 3600.0):
+        self.directory = os.path.join(root, namespace)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.suffix = suffix
+        self.sweep_interval = sweep_interval
+        # Size of the namespace as of the last walk plus what this process wrote since; other
+        # processes' writes are picked up by the next walk
+        self._total: Optional[int] = None
+        self._last_sweep = 0.0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def get_path(self, key: str) -> Optional[str]:
+        path = self.path_for(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if time.time() - stat.st_mtime > self.max_age_seconds:
+            self._remove(path)
+            return None
+        # mtime doubles as the LRU clock
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def get_json(self, key: str) -> Optional[Any]:
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+
+    def put_json(self, key: str, value: Any) -> str:
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        return self.put_bytes(key, data)
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        def write(tmp_path: str) -> None:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+        return self.put_file(key, write)
+
+    def put_file(self, key: str, write: Callable[[str], None]) -> str:
+        # write(tmp_path) streams the entry to disk; it only becomes visible once complete
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            size = os.path.getsize(tmp_path)
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        if self._total is not None:
+            self._total += size - replaced
+        if (self._total is None or self._total > self.max_bytes
+                or time.time() - self._last_sweep > self.sweep_interval):
+            self.evict()
+        return path
+
+    def evict(self) -> None:
+        now = time.time()
+        entries: List[Tuple[float, int, str]] = []
+        for dirpath, _, filenames in os.walk(self.directory):
+            for name in filenames:
+                if not name.endswith(self.suffix) or name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if now - stat.st_mtime > self.max_age_seconds:
+                    self._remove(path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        # Trimmed to 90% so the next writes have headroom before another walk
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes if total <= self.max_bytes else int(self.max_bytes * 0.9)
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            self._remove(path)
+            total -= size
+        self._total = total
+        self._last_sweep = now
+
+    def clear(self) -> None:
+        for dirpath, _, filenames in os.walk(self.directory):
+            for name in filenames:
+                self._remove(os.path.join(dirpath, name))
+        self._total = 0
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+class TranscriptCache(DiskCache):
+    # Bump when the cached transcript shape changes
+    VERSION = 1
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("max_bytes", int(os.getenv("AUDIO_RAG_TRANSCRIPT_CACHE_BYTES", 256 * 1024 * 1024)))
+        super().__init__("transcripts", **kwargs)
+
+    def key_for(self, audio_digest: str, language: Optional[str], config: Dict) -> str:
+        return hash_json({
+            "version": self.VERSION,
+            "audio": audio_digest,
+            "language": language,
+            "config": config,
+        })
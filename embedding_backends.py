@@ -0,0 +1,117 @@
+import os
+import re
+import time
+import logging
+from typing import Dict, List, Optional, Sequence
+from disk_cache import DEFAULT_CACHE_ROOT
+
+logger = logging.getLogger(__name__)
+
+BGE_QUERY_INSTRUCTION = "Represent this sentence for searching relevant passages: "
+
+# name -> model, runtime ("torch" / "onnx") and weight quantization (None / "int8")
+BACKENDS: Dict[str, Dict] = {
+    "bge-large-fp32": {"model": "BAAI/bge-large-en-v1.5", "runtime": "torch", "quantize": None},
+    "bge-large-int8": {"model": "BAAI/bge-large-en-v1.5", "runtime": "torch", "quantize": "int8"},
+    "bge-large-onnx": {"model": "BAAI/bge-large-en-v1.5", "runtime": "onnx", "quantize": None},
+    "bge-large-onnx-int8": {"model": "BAAI/bge-large-en-v1.5", "runtime": "onnx", "quantize": "int8"},
+    "bge-base-fp32": {"model": "BAAI/bge-base-en-v1.5", "runtime": "torch", "quantize": None},
+    "bge-base-onnx-int8": {"model": "BAAI/bge-base-en-v1.5", "runtime": "onnx", "quantize": "int8"},
+    "bge-small-fp32": {"model": "BAAI/bge-small-en-v1.5", "runtime": "torch", "quantize": None},
+    "bge-small-int8": {"model": "BAAI/bge-small-en-v1.5", "runtime": "torch", "quantize": "int8"},
+    "bge-small-onnx": {"model": "BAAI/bge-small-en-v1.5", "runtime": "onnx", "quantize": None},
+    "bge-small-onnx-int8": {"model": "BAAI/bge-small-en-v1.5", "runtime": "onnx", "quantize": "int8"},
+}
+
+DEFAULT_BACKEND = os.getenv("AUDIO_RAG_EMBED_BACKEND", "bge-large-fp32")
+
+class SentenceTransformerBackend:
+    # Exposes the llama_index embedding methods rag_code relies on (get_text_embedding_batch,
+    # get_query_embedding, ...) on top of a sentence-transformers model, plus embed_queries
+    # for batches of queries. Vectors are L2-normalised, as HuggingFaceEmbedding returns them.
+    def __init__(self, name: str, model, model_name: str, runtime: str, quantize: Optional[str],
+                 batch_size: int = 32, query_instruction: str = BGE_QUERY_INSTRUCTION):
+        self.name = name
+        self.model = model
+        self.model_name = model_name
+        self.runtime = runtime
+        self.quantize = quantize
+        self.batch_size = batch_size
+        self.query_instruction = query_instruction
+        self.dim = model.get_sentence_embedding_dimension()
+        # Quantized or exported weights give (slightly) different vectors, so they get their
+        # own embedding store; plain fp32 torch shares the store of the original model
+        if runtime == "torch" and quantize is None:
+            self.cache_name = model_name
+        else:
+            self.cache_name = f"{model_name}@{runtime}-{quantize or 'fp32'}"
+
+    def _encode(self, texts: Sequence[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        vectors = self.model.encode(list(texts), batch_size=self.batch_size, normalize_embeddings=True,
+                                    convert_to_numpy=True, show_progress_bar=False)
+        return vectors.tolist()
+
+    def get_text_embedding_batch(self, texts: List[str], **kwargs) -> List[List[float]]:
+        return self._encode(texts)
+
+    def get_text_embedding(self, text: str) -> List[float]:
+        return self._encode([text])[0]
+
+    def embed_queries(self, queries: Sequence[str]) -> List[List[float]]:
+        return self._encode([self.query_instruction + q for q in queries])
+
+    def get_query_embedding(self, query: str) -> List[float]:
+        return self.embed_queries([query])[0]
+
+def _load_torch(model_name: str, quantize: Optional[str], threads: Optional[int]):
+    import torch
+    from sentence_transformers import SentenceTransformer
+    if threads:
+        torch.set_num_threads(threads)
+    model = SentenceTransformer(model_name, device="cpu")
+    if quantize == "int8":
+        # Dynamic quantization: Linear weights stored as int8, activations quantized per batch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+def _load_onnx(model_name: str, quantize: Optional[str], threads: Optional[int]):
+    # Needs sentence-transformers >= 3.2 with optimum[onnxruntime]
+    from sentence_transformers import SentenceTransformer
+    model_kwargs = {"provider": "CPUExecutionProvider"}
+    if threads:
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        model_kwargs["session_options"] = options
+    if quantize is None:
+        return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+    # The int8 graph is exported once per model and host ISA, then loaded from the local cache
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+    config = os.getenv("AUDIO_RAG_ONNX_QUANT_CONFIG", "avx2")
+    export_dir = os.path.join(DEFAULT_CACHE_ROOT, "onnx", re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+    file_name = f"onnx/model_qint8_{config}.onnx"
+    if not os.path.exists(os.path.join(export_dir, file_name)):
+        logger.info(f"Exporting int8 ONNX model for {model_name} ({config})")
+        exported = SentenceTransformer(model_name, device="cpu", backend="onnx")
+        exported.save(export_dir)
+        export_dynamic_quantized_onnx_model(exported, config, export_dir)
+    return SentenceTransformer(export_dir, device="cpu", backend="onnx",
+                               model_kwargs={**model_kwargs, "file_name": file_name})
+
+def load_backend(name: str = DEFAULT_BACKEND, batch_size: int = 32,
+                 threads: Optional[int] = None) -> SentenceTransformerBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {name!r}; choose one of {', '.join(BACKENDS)}")
+    spec = BACKENDS[name]
+    if threads is None and os.getenv("AUDIO_RAG_EMBED_THREADS"):
+        threads = int(os.getenv("AUDIO_RAG_EMBED_THREADS"))
+    loader = _load_onnx if spec["runtime"] == "onnx" else _load_torch
+    start = time.perf_counter()
+    model = loader(spec["model"], spec["quantize"], threads)
+    logger.info(f"Loaded embedding backend {name} in {time.perf_counter() - start:.1f}s")
+    return SentenceTransformerBackend(name, model, spec["model"], spec["runtime"], spec["quantize"],
+                                      batch_size=batch_size)
@@ -0,0 +1,264 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from typing import Dict, List, Sequence
+import numpy as np
+from rag_code import EmbedData, batch_iterate
+from disk_cache import DEFAULT_CACHE_ROOT
+from metrics import span
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    return unicodedata.normalize("NFC", " ".join(text.split()))
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+class _FileLock:
+    # Exclusive lock shared by threads in this process and by other processes on the host
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fh = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        self._fh = open(self.path, "a+b")
+        self._fh.seek(0)
+        if os.name == "nt":
+            msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self._fh.seek(0)
+            if os.name == "nt":
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            self._fh.close()
+        finally:
+            self._fh = None
+            self._thread_lock.release()
+
+class EmbeddingStore:
+    # Append-only on-disk store for one embedding model: vectors.bin is a row-major matrix
+    # read through np.memmap, index.tsv maps "<text hash>\t<row>". Rows are never rewritten,
+    # so readers only need to pick up whatever was appended since they last looked.
+    def __init__(self, model_name: str, root: str = DEFAULT_CACHE_ROOT,
+                 dtype: str = os.getenv("AUDIO_RAG_EMBEDDING_CACHE_DTYPE", "float16")):
+        self.model_name = model_name
+        self.directory = os.path.join(root, "embeddings", re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        os.makedirs(self.directory, exist_ok=True)
+        self.dtype = np.dtype(dtype)
+        self.dim = None
+        self._vectors_path = os.path.join(self.directory, "vectors.bin")
+        self._index_path = os.path.join(self.directory, "index.tsv")
+        self._meta_path = os.path.join(self.directory, "meta.json")
+        self._lock = _FileLock(os.path.join(self.directory, ".lock"))
+        self._index: Dict[str, int] = {}
+        self._index_offset = 0
+        self._matrix = None
+        self._refresh_lock = threading.Lock()
+        self._load_meta()
+        if self.dim is not None:
+            with self._lock:
+                self._drop_torn_tail()
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._index)
+
+    def _load_meta(self) -> None:
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.dim = meta["dim"]
+            self.dtype = np.dtype(meta["dtype"])
+
+    def _drop_torn_tail(self) -> int:
+        # A write interrupted mid-row (or mid-line) leaves a partial tail; appending after it
+        # would misalign every later row, so it is cut back to whole rows and whole lines.
+        # Callers hold self._lock. Returns the number of whole rows in vectors.bin.
+        row_bytes = self.dim * self.dtype.itemsize
+        try:
+            size = os.path.getsize(self._vectors_path)
+        except FileNotFoundError:
+            return 0
+        rows = size // row_bytes
+        if size != rows * row_bytes:
+            logger.warning(f"Dropping {size - rows * row_bytes} bytes of a partial row from {self._vectors_path}")
+            os.truncate(self._vectors_path, rows * row_bytes)
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "r+b") as f:
+                # Index lines are well under 4 KiB, so the last newline is within the tail
+                size = f.seek(0, os.SEEK_END)
+                start = max(0, size - 4096)
+                f.seek(start)
+                end = start + f.read().rfind(b"\n") + 1
+                if end != size:
+                    logger.warning(f"Dropping a partial line from {self._index_path}")
+                    f.truncate(end)
+        return rows
+
+    def _refresh(self) -> None:
+        with self._refresh_lock:
+            if self.dim is None:
+                self._load_meta()
+                if self.dim is None:
+                    return
+            try:
+                index_size = os.path.getsize(self._index_path)
+            except FileNotFoundError:
+                return
+            if index_size == self._index_offset:
+                return
+
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                f.seek(self._index_offset)
+                for line in f:
+                    # A line without its newline is still being written by another process
+                    if not line.endswith("\n"):
+                        break
+                    key, row = line.rstrip("\n").split("\t")
+                    self._index[key] = int(row)
+                    self._index_offset += len(line.encode("utf-8"))
+
+            rows = os.path.getsize(self._vectors_path) // (self.dim * self.dtype.itemsize)
+            if rows:
+                self._matrix = np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+
+    def lookup(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        self._refresh()
+        found = {}
+        for key in keys:
+            row = self._index.get(key)
+            if row is not None and self._matrix is not None and row < self._matrix.shape[0]:
+                found[key] = np.asarray(self._matrix[row], dtype=np.float32)
+        return found
+
+    def add(self, keys: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        if not keys:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self._load_meta()
+            if self.dim is None:
+                self.dim = int(matrix.shape[1])
+                with open(self._meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"model": self.model_name, "dim": self.dim, "dtype": self.dtype.name}, f)
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"Embedding dim {matrix.shape[1]} does not match store dim {self.dim}")
+
+            self._refresh()
+            new_rows = [i for i, key in enumerate(keys) if key not in self._index]
+            if not new_rows:
+                return
+            first_row = self._drop_torn_tail()
+            with open(self._vectors_path, "ab") as f:
+                f.write(matrix[new_rows].astype(self.dtype).tobytes())
+            # Vectors are flushed before the index points at them
+            with open(self._index_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{keys[i]}\t{first_row + n}\n" for n, i in enumerate(new_rows)))
+        self._refresh()
+
+class CachedEmbedData(EmbedData):
+    # EmbedData backed by an EmbeddingStore: texts already embedded by this model (in any
+    # session or process) are read from disk and only misses go through the model.
+    def __init__(self, embed_model_name: str = "BAAI/bge-large-en-v1.5", batch_size: int = 32,
+                 store: EmbeddingStore = None, backend=None):
+        # backend: an embedding_backends backend used in place of rag_code's HuggingFaceEmbedding
+        self.backend = backend
+        if backend is not None:
+            embed_model_name = backend.model_name
+        super().__init__(embed_model_name=embed_model_name, batch_size=batch_size)
+        if store is None:
+            store = EmbeddingStore(backend.cache_name if backend is not None else embed_model_name)
+        self.store = store
+        self._dim = backend.dim if backend is not None else None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.model_seconds = 0.0
+        self._stats_lock = threading.Lock()
+
+    def _load_embed_model(self):
+        if self.backend is not None:
+            return self.backend
+        return super()._load_embed_model()
+
+    @property
+    def dim(self) -> int:
+        # Collections are sized from the model rather than a hardcoded 1024
+        if self._dim is None:
+            self._dim = self.store.dim or len(self.embed_model.get_text_embedding("dimension probe"))
+        return self._dim
+
+    def embed_queries(self, queries: Sequence[str]) -> List[List[float]]:
+        if hasattr(self.embed_model, "embed_queries"):
+            return self.embed_model.embed_queries(list(queries))
+        return [self.embed_model.get_query_embedding(q) for q in queries]
+
+    def _embed_misses(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        with span("embed.model", texts=len(texts)):
+            vectors = self.embed_model.get_text_embedding_batch(texts)
+        with self._stats_lock:
+            self.model_seconds += time.perf_counter() - start
+        return vectors
+
+    def _embed_cached(self, contexts: List[str]) -> List[List[float]]:
+        with span("embed", texts=len(contexts)):
+            return self._embed_with_store(contexts)
+
+    def _embed_with_store(self, contexts: List[str]) -> List[List[float]]:
+        keys = [text_key(c) for c in contexts]
+        found = self.store.lookup(keys)
+
+        # Deduplicate within the request too, so repeated boilerplate is embedded once
+        pending: Dict[str, str] = {}
+        for key, context in zip(keys, contexts):
+            if key not in found and key not in pending:
+                pending[key] = context
+        for batch_keys in batch_iterate(list(pending), self.batch_size):
+            vectors = self._embed_misses([pending[k] for k in batch_keys])
+            self.store.add(batch_keys, vectors)
+            found.update(zip(batch_keys, np.asarray(vectors, dtype=np.float32)))
+
+        with self._stats_lock:
+            self.cache_hits += len(contexts) - len(pending)
+            self.cache_misses += len(pending)
+        return [found[k].tolist() for k in keys]
+
+    def generate_embedding(self, context):
+        return self._embed_cached(list(context))
+
+    def embed(self, contexts):
+        # The instance is a process-wide singleton, so results are returned to the caller
+        # rather than accumulated on self.embeddings
+        return self._embed_cached(list(contexts))
+
+    def cache_stats(self) -> Dict:
+        with self._stats_lock:
+            lookups = self.cache_hits + self.cache_misses
+            per_miss = self.model_seconds / self.cache_misses if self.cache_misses else 0.0
+            return {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+                "model_seconds": round(self.model_seconds, 3),
+                "est_saved_seconds": round(self.cache_hits * per_miss, 3),
+            }
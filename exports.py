@@ -0,0 +1,128 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Iterable, Iterator, Optional
+from disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# format -> (file extension, mime type)
+EXPORT_FORMATS = {
+    "PDF": (".pdf", "application/pdf"),
+    "JSON": (".json", "application/json"),
+    "JSONL": (".jsonl", "application/x-ndjson"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+def transcript_digest(transcripts: Iterable[Dict]) -> str:
+    # Hashed one segment at a time, so the transcript is never serialized as a whole
+    digest = hashlib.sha256()
+    for t in transcripts:
+        digest.update(json.dumps(t, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+def iter_rows(transcripts: Iterable[Dict]) -> Iterator[Dict]:
+    # Flat, fixed-schema view of enriched segments for tabular formats
+    for t in transcripts:
+        sentiment = t.get("sentiment") or {}
+        yield {
+            "timestamp": t.get("timestamp"),
+            "speaker": t.get("speaker"),
+            "text": t.get("text"),
+            "start_ms": t.get("start"),
+            "end_ms": t.get("end"),
+            "word_count": t.get("word_count"),
+            "polarity": sentiment.get("polarity"),
+            "subjectivity": sentiment.get("subjectivity"),
+        }
+
+def write_jsonl(transcripts: Iterable[Dict], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for t in transcripts:
+            f.write(json.dumps(t, ensure_ascii=False))
+            f.write("\n")
+
+def write_json(transcripts: Iterable[Dict], path: str) -> None:
+    # Same document json.dumps(transcripts, indent=2) produced, written element by element
+    empty = True
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for t in transcripts:
+            f.write("\n  " if empty else ",\n  ")
+            f.write(json.dumps(t, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+            empty = False
+        f.write("]" if empty else "\n]")
+
+def write_parquet(transcripts: Iterable[Dict], path: str, row_group_size: int = 10000) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    schema = pa.schema([
+        ("timestamp", pa.string()), ("speaker", pa.string()), ("text", pa.string()),
+        ("start_ms", pa.int64()), ("end_ms", pa.int64()), ("word_count", pa.int32()),
+        ("polarity", pa.float32()), ("subjectivity", pa.float32()),
+    ])
+    # Only one row group is buffered at a time
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        batch = []
+        for row in iter_rows(transcripts):
+            batch.append(row)
+            if len(batch) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+def write_pdf(transcripts: Iterable[Dict], path: str, font_path: Optional[str] = None) -> None:
+    from fpdf import FPDF
+    font_path = font_path or os.getenv("AUDIO_RAG_PDF_FONT")
+    pdf = FPDF()
+    if font_path and os.path.exists(font_path):
+        # A Unicode TTF (e.g. DejaVuSans.ttf) renders any script
+        pdf.add_font("Transcript", "", font_path, uni=True)
+        family, clean = "Transcript", str
+    else:
+        # Core fonts are latin-1 only; anything else degrades to "?" instead of failing
+        family, clean = "Arial", lambda text: str(text).encode("latin-1", "replace").decode("latin-1")
+    pdf.add_page()
+    pdf.set_font(family, size=12)
+    pdf.cell(200, 10, txt="Audio Transcript Analysis", ln=True, align="C")
+    pdf.ln(10)
+
+    for t in transcripts:
+        pdf.multi_cell(0, 10, clean(f"[{t['timestamp']}] {t['speaker']}: {t['text']}"))
+        sentiment = t.get("sentiment")
+        if sentiment:
+            pdf.multi_cell(0, 10, f"Sentiment: P={sentiment['polarity']:.2f}, S={sentiment['subjectivity']:.2f}")
+        pdf.ln(5)
+    # Written straight to the file rather than returned as a string and re-encoded
+    pdf.output(path)
+
+WRITERS = {"PDF": write_pdf, "JSON": write_json, "JSONL": write_jsonl, "Parquet": write_parquet}
+
+class ExportCache(DiskCache):
+    # Rendered exports keyed by (transcript digest, format), shared across sessions. An
+    # artifact is rendered at most once per transcript and served from disk afterwards.
+    VERSION = 1
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("max_bytes", int(os.getenv("AUDIO_RAG_EXPORT_CACHE_BYTES", 1024 * 1024 * 1024)))
+        kwargs.setdefault("max_age_seconds", 7 * 24 * 3600)
+        super().__init__("exports", suffix="", **kwargs)
+
+    def key_for(self, digest: str, fmt: str) -> str:
+        return f"{digest}-v{self.VERSION}{EXPORT_FORMATS[fmt][0]}"
+
+    def render(self, transcripts: Iterable[Dict], fmt: str, digest: Optional[str] = None) -> str:
+        # Read twice (digest, then the writer): a list or a TranscriptStore, not a generator
+        if fmt not in WRITERS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        key = self.key_for(digest or transcript_digest(transcripts), fmt)
+        path = self.get_path(key)
+        if path is None:
+            path = self.put_file(key, lambda tmp_path: WRITERS[fmt](transcripts, tmp_path))
+        return path
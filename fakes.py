@@ -0,0 +1,263 @@
+import os
+import time
+import asyncio
+import random
+import hashlib
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+
+# Offline stand-ins for the hosted services, used by benchmarks and the batch CLI
+
+_WORDS = (
+    "account billing refund order delivery issue thanks please customer support agent "
+    "product update invoice payment schedule meeting follow call number address email "
+    "cancel upgrade plan price discount problem resolved great terrible happy sorry"
+).split()
+
+_FILLERS = ["yeah", "ok", "right", "mm-hmm", "sure", "got it"]
+
+def synthetic_utterances(n: int, seed: int = 0, speakers: int = 2,
+                         mean_words: int = 14, filler_ratio: float = 0.2) -> List[Dict]:
+    # Deterministic transcript with AssemblyAI-like utterance dicts (times in ms)
+    rng = random.Random(seed)
+    utterances = []
+    clock = 0
+    for i in range(n):
+        if rng.random() < filler_ratio:
+            text = rng.choice(_FILLERS)
+        else:
+            length = max(3, int(rng.gauss(mean_words, mean_words / 3)))
+            text = " ".join(rng.choice(_WORDS) for _ in range(length))
+        speaker = i % speakers if rng.random() < 0.8 else rng.randrange(speakers)
+        duration = 350 * len(text.split()) + rng.randint(0, 400)
+        utterances.append({
+            "speaker": f"Speaker {chr(ord('A') + speaker)}",
+            "text": text,
+            "start": clock,
+            "end": clock + duration,
+        })
+        clock += duration + rng.randint(100, 800)
+    return utterances
+
+class FakeTranscriber:
+    # Same interface as rag_code.Transcribe; utterance count scales with file size
+    def __init__(self, latency: float = 0.0, bytes_per_utterance: int = 32000):
+        self.latency = latency
+        self.bytes_per_utterance = bytes_per_utterance
+
+    def transcribe_audio(self, audio_path: str, language: Optional[str] = None) -> List[Dict]:
+        if self.latency:
+            time.sleep(self.latency)
+        size = os.path.getsize(audio_path)
+        seed = int(hashlib.sha1(audio_path.encode("utf-8")).hexdigest()[:8], 16)
+        return synthetic_utterances(max(1, size // self.bytes_per_utterance), seed=seed)
+
+# Pitch of each synthetic speaker's voice; FakeSpeechTranscriber tells speakers apart by it
+_VOICE_HZ = (170.0, 260.0, 350.0, 440.0)
+
+def synthetic_call_audio(path: str, seconds: float, sample_rate: int = 44100, channels: int = 2,
+                         speakers: int = 2, seed: int = 0, pause_ratio: float = 0.05) -> List[Dict]:
+    # Writes a PCM WAV of a call: syllable-modulated tones per speaker, short gaps between
+    # turns, and now and then a long hold/pause. Returns the ground-truth utterances (ms).
+    import wave
+    rng = np.random.default_rng(seed)
+    truth = []
+    with wave.open(path, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        clock, turn = 0.0, 0
+        while clock < seconds:
+            if rng.random() < pause_ratio:
+                silence = rng.uniform(5.0, 30.0)
+            else:
+                silence = rng.uniform(0.8, 1.6)
+            duration = rng.uniform(1.5, 8.0)
+            speaker = turn % speakers if rng.random() < 0.8 else int(rng.integers(speakers))
+            turn += 1
+            t = np.arange(int(duration * sample_rate)) / sample_rate
+            envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4.0 * t)
+            voice = 9000 * envelope * np.sin(2 * np.pi * _VOICE_HZ[speaker] * t)
+            gap = np.zeros(int(silence * sample_rate))
+            block = np.concatenate([gap, voice]) + rng.normal(0, 30, len(gap) + len(t))
+            pcm = np.clip(block, -32768, 32767).astype(np.int16)
+            writer.writeframes(np.repeat(pcm[:, None], channels, axis=1).tobytes())
+            start = clock + silence
+            truth.append({"speaker": f"Speaker {chr(ord('A') + speaker)}",
+                          "start": int(start * 1000), "end": int((start + duration) * 1000)})
+            clock = start + duration
+    return truth
+
+class FakeSpeechTranscriber:
+    # Listens to the file: every voiced stretch becomes an utterance, labelled by pitch in order
+    # of first appearance within the file, as a hosted diarizer labels each upload afresh.
+    # Sleeps for upload (bytes / upload_bytes_per_sec) plus processing (audio length *
+    # realtime_factor), so bytes sent and parallel segments show up in wall-clock time.
+    def __init__(self, latency: float = 0.2, upload_bytes_per_sec: float = 25e6, realtime_factor: float = 0.005):
+        self.latency = latency
+        self.upload_bytes_per_sec = upload_bytes_per_sec
+        self.realtime_factor = realtime_factor
+        self.bytes_uploaded = 0
+        self._lock = threading.Lock()
+
+    def transcribe_audio(self, audio_path: str, language: Optional[str] = None) -> List[Dict]:
+        from audio_preprocess import SAMPLE_RATE, decode_audio, detect_speech
+        size = os.path.getsize(audio_path)
+        with self._lock:
+            self.bytes_uploaded += size
+        samples = decode_audio(audio_path)
+        time.sleep(self.latency + size / self.upload_bytes_per_sec
+                   + len(samples) / SAMPLE_RATE * self.realtime_factor)
+        utterances, voices = [], []
+        for start, end in detect_speech(samples, min_silence_ms=300, pad_ms=0):
+            spectrum = np.abs(np.fft.rfft(samples[start:end].astype(np.float32)))
+            pitch = (np.argmax(spectrum[1:]) + 1) * SAMPLE_RATE / (end - start)
+            match = next((i for i, hz in enumerate(voices) if abs(hz - pitch) < 0.15 * hz), None)
+            if match is None:
+                voices.append(pitch)
+                match = len(voices) - 1
+            rng = random.Random(start // SAMPLE_RATE)
+            utterances.append({
+                "speaker": f"Speaker {chr(ord('A') + match)}",
+                "text": " ".join(rng.choice(_WORDS) for _ in range(max(3, (end - start) // (SAMPLE_RATE // 3)))),
+                "start": start * 1000 // SAMPLE_RATE,
+                "end": end * 1000 // SAMPLE_RATE,
+            })
+        return utterances
+
+class FakeEmbedData:
+    # Drop-in for EmbedData: signed feature hashing of lowercase tokens, L2-normalised, so
+    # lexical overlap still produces meaningful similarity without loading a model.
+    # call_latency/text_latency simulate a forward pass (fixed cost + per text); like one CPU
+    # model, calls run one at a time.
+    def __init__(self, dim: int = 384, batch_size: int = 32, call_latency: float = 0.0, text_latency: float = 0.0):
+        self.embed_model_name = f"fake-hash-{dim}"
+        self.dim = dim
+        self.batch_size = batch_size
+        self.call_latency = call_latency
+        self.text_latency = text_latency
+        self.calls = 0
+        self.embeddings = []
+        self.embed_model = self
+        self._model_lock = threading.Lock()
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in text.lower().split():
+            h = int(hashlib.md5(token.strip(".,?!:;\"'").encode("utf-8")).hexdigest()[:8], 16)
+            vector[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def _forward(self, texts: List[str]) -> List[List[float]]:
+        with self._model_lock:
+            self.calls += 1
+            if self.call_latency or self.text_latency:
+                time.sleep(self.call_latency + self.text_latency * len(texts))
+            return [self._vector(t) for t in texts]
+
+    def get_text_embedding_batch(self, texts: List[str]) -> List[List[float]]:
+        return self._forward(list(texts))
+
+    def get_text_embedding(self, text: str) -> List[float]:
+        return self._forward([text])[0]
+
+    def get_query_embedding(self, query: str) -> List[float]:
+        return self._forward([query])[0]
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        return self._forward(list(queries))
+
+    def generate_embedding(self, context: List[str]) -> List[List[float]]:
+        return self.get_text_embedding_batch(list(context))
+
+    def embed(self, contexts: List[str]) -> List[List[float]]:
+        return self.get_text_embedding_batch(list(contexts))
+
+class FakeTranscriptionBackend:
+    # In-process stand-in for AssemblyAIBackend (see transcription_jobs.TranscriptionBackend).
+    # Jobs complete `latency` seconds after submission; `max_concurrent` records the peak number
+    # of jobs that were in flight at once, so tests can check the scheduler's cap.
+    def __init__(self, latency: float = 0.5, submit_latency: float = 0.05, utterances: int = 50,
+                 fail_paths: Optional[List[str]] = None):
+        self.latency = latency
+        self.submit_latency = submit_latency
+        self.utterances = utterances
+        self.fail_paths = set(fail_paths or [])
+        self.in_flight = 0
+        self.max_concurrent = 0
+        self._jobs: Dict[str, Dict] = {}
+
+    async def submit(self, audio_path: str, language: Optional[str] = None) -> str:
+        await asyncio.sleep(self.submit_latency)
+        remote_id = f"fake-{len(self._jobs) + 1}"
+        self._jobs[remote_id] = {"path": audio_path, "ready_at": time.monotonic() + self.latency}
+        self.in_flight += 1
+        self.max_concurrent = max(self.max_concurrent, self.in_flight)
+        return remote_id
+
+    async def poll(self, remote_id: str):
+        job = self._jobs[remote_id]
+        if time.monotonic() < job["ready_at"]:
+            return "processing", None, None
+        self.in_flight -= 1
+        if job["path"] in self.fail_paths:
+            return "error", None, f"fake failure for {job['path']}"
+        seed = int(hashlib.sha1(job["path"].encode("utf-8")).hexdigest()[:8], 16)
+        return "completed", synthetic_utterances(self.utterances, seed=seed), None
+
+class FakeCompletion:
+    # Shaped like llama_index's CompletionResponse, including the OpenAI-style raw delta
+    def __init__(self, text: str, delta: Optional[str] = None):
+        self.text = text
+        self.delta = delta
+        self.raw = {"choices": [{"delta": {"content": delta if delta is not None else text}}]}
+
+class FakeLLM:
+    # complete()/stream_complete() with fixed latency; records calls and peak concurrency
+    def __init__(self, latency: float = 0.05, token_latency: float = 0.0, summary_words: int = 60):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.summary_words = summary_words
+        self.calls = 0
+        self.in_flight = 0
+        self.max_concurrent = 0
+        self._lock = threading.Lock()
+
+    def _answer(self, prompt: str) -> str:
+        words = prompt.split()
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        return f"[{digest}] " + " ".join(words[-self.summary_words:])
+
+    def _enter(self):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_concurrent = max(self.max_concurrent, self.in_flight)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def complete(self, prompt: str, **kwargs) -> FakeCompletion:
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            return FakeCompletion(self._answer(prompt))
+        finally:
+            self._exit()
+
+    def stream_complete(self, prompt: str, **kwargs):
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            text = ""
+            for word in self._answer(prompt).split():
+                if self.token_latency:
+                    time.sleep(self.token_latency)
+                delta = word + " "
+                text += delta
+                yield FakeCompletion(text, delta)
+        finally:
+            self._exit()
@@ -0,0 +1,104 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, Optional, Sequence, Union
+from rag_code import RAG
+from context_builder import ContextBuilder
+from disk_cache import DiskCache
+from metrics import instrument_stream, span
+from response_cache import ResponseCache
+from summarizer import HierarchicalSummarizer
+
+logger = logging.getLogger(__name__)
+
+class _ResponseCachingLLM:
+    # Wraps the LLM rag_code streams answers from; stream_complete goes through the response
+    # cache when the prompt belongs to a query() in progress, everything else passes through
+    def __init__(self, llm, rag: "EnhancedRAG"):
+        self._llm = llm
+        self._rag = rag
+
+    def stream_complete(self, prompt: str, **kwargs):
+        key = self._rag.response_key(prompt)
+        if key is None:
+            return self._llm.stream_complete(prompt, **kwargs)
+        return self._rag.response_cache.stream(key, lambda: self._llm.stream_complete(prompt, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+class EnhancedRAG(RAG):
+    # rag_code.RAG with token-budgeted context packing and a map-reduce summarize() for
+    # transcripts longer than one prompt
+    def __init__(self, retriever, llm_name: str = "DeepSeek-R1-Distill-Llama-70B",
+                 summary_cache: Optional[DiskCache] = None, summary_workers: int = 4,
+                 context_builder: Optional[ContextBuilder] = None, llm=None,
+                 response_cache: Optional[ResponseCache] = None, resource_pool=None):
+        # llm: any llama_index-style LLM used instead of rag_code's default client
+        # resource_pool: a resource_pool.ResourcePool; rag_code's client is then built once per
+        # llm_name and shared by every RAG in the process
+        self._llm_override = llm
+        self.resource_pool = resource_pool
+        self.llm_name = llm_name
+        self.response_cache = response_cache
+        # query and packed context of the query() running on this thread, for the cache key
+        self._request = threading.local()
+        super().__init__(retriever=retriever, llm_name=llm_name)
+        self.context_builder = context_builder or ContextBuilder(
+            token_budget=int(os.getenv("AUDIO_RAG_CONTEXT_TOKENS", 1200)))
+        # Leave half of the model's window for the prompt template and the answer
+        token_budget = int(os.getenv("AUDIO_RAG_SUMMARY_CHUNK_TOKENS", 3000))
+        max_context = getattr(self, "max_context_length", None)
+        if max_context:
+            token_budget = min(token_budget, max_context // 2)
+        self.summarizer = HierarchicalSummarizer(self.llm, llm_name, token_budget=token_budget,
+                                                 max_workers=summary_workers, cache=summary_cache)
+
+    def _setup_llm(self):
+        if self._llm_override is not None:
+            llm = self._llm_override
+        elif self.resource_pool is not None:
+            llm = self.resource_pool.get("llm", self.llm_name, super()._setup_llm)
+        else:
+            llm = super()._setup_llm()
+        if self.response_cache is not None:
+            return _ResponseCachingLLM(llm, self)
+        return llm
+
+    def generate_context(self, query: str) -> str:
+        with span("rag.context"):
+            context = self.context_builder.build(self.retriever.search(query))
+        self._request.context = context
+        return context
+
+    def response_key(self, prompt: str) -> Optional[str]:
+        query = getattr(self._request, "query", None)
+        context = getattr(self._request, "context", None)
+        if query is None or context is None:
+            return None
+        if not context or not query:
+            # Nothing retrieved (or asked): replace("") would put a marker between every character,
+            # so the whole prompt is the key
+            return ResponseCache.key_for(self.llm_name, prompt, context, query)
+        # What is left of the prompt once context and query are cut out is the template; the
+        # NUL markers cannot occur in either, so the key is exact for the prompt sent
+        template = prompt.replace(context, "\x00context\x00").replace(query, "\x00query\x00")
+        return ResponseCache.key_for(self.llm_name, template, context, query)
+
+    def query(self, query: str):
+        # TTFT is measured from here, so it includes retrieval and context packing
+        started = time.perf_counter()
+        self._request.query, self._request.context = query, None
+        try:
+            with span("rag.query"):
+                stream = super().query(query)
+        finally:
+            self._request.query = self._request.context = None
+        return instrument_stream(stream, self.llm_name, started=started)
+
+    def summarize(self, transcript: Union[str, Sequence[Dict]]) -> str:
+        # Accepts segment dicts (speaker-aware chunking) or plain text, one utterance per line
+        if isinstance(transcript, str):
+            transcript = [{"text": line} for line in transcript.splitlines() if line.strip()]
+        return self.summarizer.summarize(transcript)
@@ -0,0 +1,73 @@
+import queue
+import logging
+import itertools
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[List]:
+    # Like rag_code.batch_iterate, but for any iterable rather than a sliceable list
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def stream_ingest(records: Iterable[Dict], embeddata, vector_db, batch_size: Optional[int] = None,
+                  queue_size: int = 2, on_batch: Optional[Callable[[List[str], List[Dict]], None]] = None,
+                  finalize: bool = True) -> int:
+    # records -> batches -> embed (producer thread) -> bounded queue -> upsert (caller's thread).
+    # Each record is a Qdrant payload whose "context" field is the text to embed. Batch N+1 is
+    # embedded while batch N is upserted, and at most queue_size + 2 batches are alive at once.
+    batch_size = batch_size or embeddata.batch_size
+    batches: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(item) -> None:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def produce() -> None:
+        try:
+            for batch in iter_batches(records, batch_size):
+                if stop.is_set():
+                    return
+                vectors = embeddata.generate_embedding([r["context"] for r in batch])
+                put((batch, vectors))
+        except BaseException as e:
+            put(e)
+            return
+        put(_DONE)
+
+    producer = threading.Thread(target=produce, name="embed-producer", daemon=True)
+    producer.start()
+    total = 0
+    try:
+        while True:
+            item = batches.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            batch, vectors = item
+            ids = vector_db.ingest_batch([r["context"] for r in batch], vectors, payloads=batch)
+            if on_batch is not None:
+                on_batch(ids, batch)
+            total += len(batch)
+    finally:
+        stop.set()
+        producer.join()
+
+    # Bulk loaders ingesting many files finalize once at the end instead
+    if finalize:
+        vector_db.finalize_ingest()
+    logger.info(f"Ingested {total} points into {vector_db.collection_name}")
+    return total
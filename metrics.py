@@ -0,0 +1,224 @@
+import os
+import time
+import bisect
+import logging
+import threading
+import contextvars
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Off by default; every entry point below returns immediately (or hands back a shared no-op
+# span) when disabled, so instrumented code pays one attribute check per call
+ENABLED = os.getenv("AUDIO_RAG_METRICS", "0").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+RATE_BUCKETS = (1, 5, 10, 20, 40, 80, 160, 320)
+
+def enable(flag: bool = True) -> None:
+    global ENABLED
+    ENABLED = flag
+
+def _pick(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+class Histogram:
+    # Prometheus-style cumulative histogram per label value, plus a small reservoir of recent
+    # observations for exact percentiles in the diagnostics panel
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+                 label: str = "stage", recent: int = 512):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.label = label
+        self._recent_size = recent
+        self._series: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_value: str = "") -> None:
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0,
+                          "recent": deque(maxlen=self._recent_size)}
+                self._series[label_value] = series
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+            series["recent"].append(value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_value, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["counts"]):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="+Inf"}} {series["count"]}')
+                lines.append(f'{self.name}_sum{{{self.label}="{label_value}"}} {series["sum"]:.6f}')
+                lines.append(f'{self.name}_count{{{self.label}="{label_value}"}} {series["count"]}')
+        return lines
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            rows = {}
+            for label_value, series in sorted(self._series.items()):
+                recent = sorted(series["recent"])
+                rows[label_value] = {"count": series["count"], "mean": series["sum"] / series["count"],
+                                     "p50": _pick(recent, 0.50), "p95": _pick(recent, 0.95),
+                                     "p99": _pick(recent, 0.99)}
+            return rows
+
+class Counter:
+    def __init__(self, name: str, help: str, label: str = "stage"):
+        self.name = name
+        self.help = help
+        self.label = label
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value: str = "", amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_value, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{{{self.label}="{label_value}"}} {value:g}')
+        return lines
+
+STAGE_SECONDS = Histogram("audio_rag_stage_seconds", "Wall-clock time per pipeline stage")
+STAGE_ERRORS = Counter("audio_rag_stage_errors_total", "Stages that raised")
+LLM_TTFT = Histogram("audio_rag_llm_time_to_first_token_seconds", "Query start to first streamed token",
+                     label="model")
+LLM_TOKENS_PER_SECOND = Histogram("audio_rag_llm_tokens_per_second", "Streamed tokens per second after the first",
+                                  buckets=RATE_BUCKETS, label="model")
+LLM_RESPONSE_CACHE = Counter("audio_rag_llm_response_cache_total", "RAG answers by response cache outcome",
+                             label="result")
+LLM_SAVED_SECONDS = Counter("audio_rag_llm_saved_seconds_total", "Upstream LLM seconds avoided by caching",
+                            label="cache")
+METRICS = (STAGE_SECONDS, STAGE_ERRORS, LLM_TTFT, LLM_TOKENS_PER_SECOND, LLM_RESPONSE_CACHE, LLM_SAVED_SECONDS)
+
+# Recently finished spans (most recent last) for the diagnostics panel
+RECENT_SPANS: deque = deque(maxlen=200)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("audio_rag_span", default=None)
+
+class Span:
+    def __init__(self, stage: str, attributes: Optional[Dict] = None):
+        self.stage = stage
+        self.attributes = attributes or {}
+        self.parent = None
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._start = 0.0
+        self._token = None
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.parent = parent.stage if parent is not None else None
+        self._token = _current_span.set(self)
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        STAGE_SECONDS.observe(self.duration, self.stage)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(self.stage)
+            self.attributes["error"] = exc_type.__name__
+        RECENT_SPANS.append({"stage": self.stage, "parent": self.parent, "started_at": self.started_at,
+                             "ms": round(self.duration * 1000, 2), **self.attributes})
+        return False
+
+class _NoopSpan:
+    @property
+    def attributes(self) -> Dict:
+        return {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _NoopSpan()
+
+def span(stage: str, **attributes):
+    # with span("qdrant.upsert", points=512): ...
+    if not ENABLED:
+        return _NOOP
+    return Span(stage, attributes)
+
+def observe(stage: str, seconds: float) -> None:
+    # For durations measured elsewhere (e.g. a job's lifetime across threads)
+    if ENABLED:
+        STAGE_SECONDS.observe(seconds, stage)
+
+def instrument_stream(stream: Iterable, model: str, started: Optional[float] = None) -> Iterator:
+    # Wraps a streaming LLM response; records time to first token and tokens/sec, where each
+    # streamed chunk counts as one token
+    if not ENABLED:
+        return iter(stream)
+    return _instrumented(stream, model, started if started is not None else time.perf_counter())
+
+def _instrumented(stream: Iterable, model: str, started: float) -> Iterator:
+    first = None
+    tokens = 0
+    try:
+        for chunk in stream:
+            if first is None:
+                first = time.perf_counter()
+                LLM_TTFT.observe(first - started, model)
+            tokens += 1
+            yield chunk
+    finally:
+        end = time.perf_counter()
+        STAGE_SECONDS.observe(end - started, "llm.stream")
+        if first is not None and tokens > 1 and end > first:
+            LLM_TOKENS_PER_SECOND.observe((tokens - 1) / (end - first), model)
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def snapshot() -> Dict:
+    return {
+        "stages": STAGE_SECONDS.summary(),
+        "ttft": LLM_TTFT.summary(),
+        "tokens_per_second": LLM_TOKENS_PER_SECOND.summary(),
+        "recent_spans": list(RECENT_SPANS)[-50:],
+    }
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_http_server(port: int = int(os.getenv("AUDIO_RAG_METRICS_PORT", 9464)),
+                      host: str = os.getenv("AUDIO_RAG_METRICS_HOST", "127.0.0.1")) -> ThreadingHTTPServer:
+    # Streamlit cannot serve extra routes, so /metrics lives on its own port; loopback only
+    # unless AUDIO_RAG_METRICS_HOST opts in to a wider bind
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Serving Prometheus metrics on http://{host}:{port}/metrics")
+    return server
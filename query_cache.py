@@ -0,0 +1,108 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class GenerationCounter:
+    # Per-scope counters bumped whenever a scope's data changes. Cache entries remember the
+    # generation they were computed at and are unusable once it moves on.
+    def __init__(self):
+        self._counters: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def current(self, scope: Hashable) -> int:
+        return self._counters.get(scope, 0)
+
+    def bump(self, scope: Hashable) -> int:
+        with self._lock:
+            self._counters[scope] = self._counters.get(scope, 0) + 1
+            return self._counters[scope]
+
+# Process-wide; EnhancedQdrantVDB bumps its scope on every ingest
+GENERATIONS = GenerationCounter()
+
+class _Scope:
+    def __init__(self, generation: int):
+        self.generation = generation
+        # key -> (unit query vector, results, created_at)
+        self.entries: "OrderedDict[int, Tuple[np.ndarray, Any, float]]" = OrderedDict()
+        self.next_key = 0
+
+class SemanticQueryCache:
+    # Search results keyed by query embedding: a lookup hits when a cached query's cosine
+    # similarity is at least `threshold`, so rephrasings share an entry. Bounded per scope by
+    # LRU and TTL; a scope is emptied as soon as its generation moves on.
+    def __init__(self, threshold: float = float(os.getenv("AUDIO_RAG_QUERY_CACHE_THRESHOLD", 0.95)),
+                 max_entries: int = 256, max_scopes: int = 1024, ttl_seconds: float = 900.0,
+                 generations: GenerationCounter = GENERATIONS):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_scopes = max_scopes
+        self.ttl_seconds = ttl_seconds
+        self.generations = generations
+        self.hits = 0
+        self.misses = 0
+        self._scopes: "OrderedDict[Hashable, _Scope]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _scope(self, scope: Hashable) -> _Scope:
+        generation = self.generations.current(scope)
+        entry = self._scopes.get(scope)
+        if entry is None or entry.generation != generation:
+            entry = _Scope(generation)
+            self._scopes[scope] = entry
+        self._scopes.move_to_end(scope)
+        while len(self._scopes) > self.max_scopes:
+            self._scopes.popitem(last=False)
+        return entry
+
+    def get(self, scope: Hashable, embedding: Sequence[float]) -> Optional[Any]:
+        query = self._unit(embedding)
+        now = time.time()
+        with self._lock:
+            cached = self._scope(scope)
+            for key in [k for k, (_, _, created) in cached.entries.items() if now - created > self.ttl_seconds]:
+                del cached.entries[key]
+            if cached.entries:
+                keys = list(cached.entries)
+                similarities = np.stack([cached.entries[k][0] for k in keys]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    cached.entries.move_to_end(keys[best])
+                    self.hits += 1
+                    return cached.entries[keys[best]][1]
+            self.misses += 1
+            return None
+
+    def put(self, scope: Hashable, embedding: Sequence[float], results: Any,
+            generation: Optional[int] = None) -> None:
+        # Pass the generation read before searching so results racing an ingest are dropped
+        with self._lock:
+            cached = self._scope(scope)
+            if generation is not None and generation != cached.generation:
+                return
+            cached.entries[cached.next_key] = (self._unit(embedding), results, time.time())
+            cached.next_key += 1
+            while len(cached.entries) > self.max_entries:
+                cached.entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": sum(len(s.entries) for s in self._scopes.values()),
+            }
@@ -0,0 +1,154 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+from metrics import span
+
+logger = logging.getLogger(__name__)
+
+class ResourcePool:
+    # Process-wide clients shared by every session, one per (kind, config). Qdrant clients,
+    # the transcriber and LLM clients are thread-safe and hold connections (gRPC channels,
+    # HTTP pools), so sessions borrow them instead of opening their own on every rerun.
+    # Each resource is built once, outside the pool lock, so a slow build of one kind never
+    # blocks lookups of another.
+    def __init__(self):
+        self._resources: Dict[Tuple[str, Hashable], object] = {}
+        self._building: Dict[Tuple[str, Hashable], threading.Lock] = {}
+        self._created: Dict[str, int] = {}
+        self._reused: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, config: Hashable, build: Callable[[], object]):
+        key = (kind, config)
+        with self._lock:
+            if key in self._resources:
+                self._reused[kind] = self._reused.get(kind, 0) + 1
+                return self._resources[key]
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            with self._lock:
+                if key in self._resources:
+                    self._reused[kind] = self._reused.get(kind, 0) + 1
+                    return self._resources[key]
+            resource = build()
+            with self._lock:
+                self._resources[key] = resource
+                self._building.pop(key, None)
+                self._created[kind] = self._created.get(kind, 0) + 1
+            logger.info(f"Created shared {kind}")
+            return resource
+
+    def qdrant_client(self, url: Optional[str] = None, location: Optional[str] = None):
+        # One client per server; a ":memory:" location is one in-process database for everyone
+        url = url or os.getenv("QDRANT_URL", "http://localhost:6333")
+
+        def build():
+            from qdrant_client import QdrantClient
+            if location:
+                return QdrantClient(location=location)
+            return QdrantClient(url=url, prefer_grpc=True)
+        return self.get("qdrant", location or url, build)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {kind: {"instances": count, "reuses": self._reused.get(kind, 0)}
+                    for kind, count in self._created.items()}
+
+class _Request:
+    __slots__ = ("query", "future", "enqueued")
+
+    def __init__(self, query: str):
+        self.query = query
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+class QueryEmbedder:
+    # Gathers query embeddings requested concurrently (chat turns of different sessions) into
+    # micro-batches for one embed_queries call each. A batch waits at most max_wait seconds
+    # after its oldest request arrived and closes early at max_batch, so a lone query pays at
+    # most max_wait; requests queued while the model is busy go out together in the next
+    # batch without waiting again. Identical queries within a batch are embedded once.
+    def __init__(self, embed_queries: Callable[[List[str]], List[List[float]]],
+                 max_batch: int = int(os.getenv("AUDIO_RAG_QUERY_BATCH", 32)),
+                 max_wait: float = float(os.getenv("AUDIO_RAG_QUERY_BATCH_WAIT_MS", 5)) / 1000):
+        self._embed_queries = embed_queries
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait)
+        self.requests = 0
+        self.served = 0
+        self.batches = 0
+        self.embedded = 0
+        self.largest_batch = 0
+        self.model_seconds = 0.0
+        self._queue: "deque[_Request]" = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, query: str) -> Future:
+        request = _Request(query)
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="query-embedder", daemon=True)
+                self._thread.start()
+            self._queue.append(request)
+            self.requests += 1
+            self._cond.notify()
+        return request.future
+
+    def get_query_embedding(self, query: str) -> List[float]:
+        return self.submit(query).result()
+
+    def embed_queries(self, queries: Sequence[str]) -> List[List[float]]:
+        futures = [self.submit(q) for q in queries]
+        return [f.result() for f in futures]
+
+    def _next_batch(self) -> List[_Request]:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0].enqueued + self.max_wait
+            while len(self._queue) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            queries = list(dict.fromkeys(r.query for r in batch))
+            start = time.perf_counter()
+            try:
+                with span("embed.query_batch", queries=len(queries), requests=len(batch)):
+                    vectors = self._embed_queries(queries)
+            except Exception as e:
+                logger.warning(f"Query embedding failed for a batch of {len(batch)}: {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            with self._cond:
+                self.batches += 1
+                self.served += len(batch)
+                self.embedded += len(queries)
+                self.largest_batch = max(self.largest_batch, len(batch))
+                self.model_seconds += time.perf_counter() - start
+            by_query = dict(zip(queries, vectors))
+            for request in batch:
+                request.future.set_result(list(by_query[request.query]))
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "embedded": self.embedded,
+                "mean_batch": round(self.served / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "model_seconds": round(self.model_seconds, 3),
+                "queued": len(self._queue),
+            }
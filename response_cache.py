@@ -0,0 +1,207 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import metrics
+from disk_cache import hash_json
+
+logger = logging.getLogger(__name__)
+
+def response_delta(chunk) -> str:
+    # The text a streamed chunk adds, read the way the chat loop in HEMP4 reads it
+    raw = getattr(chunk, "raw", None)
+    if isinstance(raw, dict) and raw.get("choices"):
+        return raw["choices"][0].get("delta", {}).get("content") or ""
+    if getattr(chunk, "delta", None) is not None:
+        return chunk.delta
+    if hasattr(chunk, "content"):
+        return chunk.content or ""
+    return str(chunk)
+
+class CachedCompletion:
+    # Replayed stream chunk, shaped like llama_index's CompletionResponse with an OpenAI-style raw delta
+    def __init__(self, text: str, delta: str):
+        self.text = text
+        self.delta = delta
+        self.raw = {"choices": [{"delta": {"content": delta}}]}
+
+class _Entry:
+    def __init__(self, deltas: Tuple[str, ...], seconds: float):
+        self.deltas = deltas
+        self.seconds = seconds
+        self.size = sum(len(d.encode("utf-8")) for d in deltas) + 64
+        self.created_at = time.time()
+
+class _Flight:
+    # One upstream call in progress. Chunks are buffered as they arrive so every subscriber,
+    # early or late, sees the whole stream from the first token.
+    def __init__(self):
+        self.chunks: List = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.seconds = 0.0
+        self._cond = threading.Condition()
+
+    def publish(self, chunk) -> None:
+        with self._cond:
+            self.chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self, seconds: float, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            self.seconds = seconds
+            self.error = error
+            self.done = True
+            self._cond.notify_all()
+
+    def subscribe(self, on_done: Optional[Callable[["_Flight"], None]] = None) -> Iterator:
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.chunks) and not self.done:
+                    self._cond.wait()
+                pending = self.chunks[index:]
+                index += len(pending)
+                finished = self.done and index >= len(self.chunks)
+            yield from pending
+            if finished:
+                if self.error is not None:
+                    raise self.error
+                if on_done is not None:
+                    on_done(self)
+                return
+
+class ResponseCache:
+    # Streamed LLM answers keyed by (model, prompt template, packed context, query), shared by
+    # all sessions. A hit replays the stored deltas as a stream; a request identical to one
+    # still streaming subscribes to it instead of calling the LLM again. Upstream streams are
+    # driven by their own thread, so an abandoned reader (a Streamlit rerun) neither stalls the
+    # other subscribers nor loses the answer. Bounded by total size (LRU) and TTL.
+    def __init__(self, max_bytes: int = int(os.getenv("AUDIO_RAG_RESPONSE_CACHE_BYTES", 32 * 1024 * 1024)),
+                 ttl_seconds: float = float(os.getenv("AUDIO_RAG_RESPONSE_CACHE_TTL", 3600))):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.saved_seconds = 0.0
+        self._bytes = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(model: str, template: str, context: str, query: str) -> str:
+        return hash_json({"model": model, "template": hash_json(template), "context": hash_json(context),
+                          "query": query})
+
+    def _count(self, result: str) -> None:
+        if metrics.ENABLED:
+            metrics.LLM_RESPONSE_CACHE.inc(result)
+
+    def _save(self, seconds: float) -> None:
+        with self._lock:
+            self.saved_seconds += seconds
+        if metrics.ENABLED:
+            metrics.LLM_SAVED_SECONDS.inc("response", seconds)
+
+    def _get(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry.created_at > self.ttl_seconds:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _drop(self, key: str) -> None:
+        self._bytes -= self._entries.pop(key).size
+
+    def _put(self, key: str, entry: _Entry) -> None:
+        if entry.size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        now = time.time()
+        for stale in [k for k, e in self._entries.items() if now - e.created_at > self.ttl_seconds]:
+            self._drop(stale)
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def stream(self, key: str, produce: Callable[[], Iterable]) -> Iterator:
+        # produce() starts the upstream call; it runs at most once per key at a time
+        with self._lock:
+            entry = self._get(key)
+            if entry is not None:
+                self.hits += 1
+            else:
+                flight = self._flights.get(key)
+                if flight is not None:
+                    self.coalesced += 1
+                else:
+                    self.misses += 1
+                    flight = self._flights[key] = _Flight()
+                    threading.Thread(target=self._pump, args=(key, flight, produce), name="llm-stream",
+                                     daemon=True).start()
+                    self._count("miss")
+                    return flight.subscribe()
+        if entry is not None:
+            self._count("hit")
+            self._save(entry.seconds)
+            return self._replay(entry)
+        self._count("coalesced")
+        return flight.subscribe(on_done=lambda f: self._save(f.seconds))
+
+    def _pump(self, key: str, flight: _Flight, produce: Callable[[], Iterable]) -> None:
+        started = time.perf_counter()
+        deltas = []
+        try:
+            for chunk in produce():
+                deltas.append(response_delta(chunk))
+                flight.publish(chunk)
+        except Exception as e:
+            logger.warning(f"LLM stream failed: {e}")
+            with self._lock:
+                self.errors += 1
+                self._flights.pop(key, None)
+            flight.finish(time.perf_counter() - started, e)
+            return
+        seconds = time.perf_counter() - started
+        with self._lock:
+            # Stored before the flight is dropped, so a request arriving now finds one or the other
+            self._put(key, _Entry(tuple(deltas), seconds))
+            self._flights.pop(key, None)
+        flight.finish(seconds)
+
+    @staticmethod
+    def _replay(entry: _Entry) -> Iterator[CachedCompletion]:
+        text = ""
+        for delta in entry.deltas:
+            text += delta
+            yield CachedCompletion(text, delta)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "saved_llm_seconds": round(self.saved_seconds, 3),
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "in_flight": len(self._flights),
+            }
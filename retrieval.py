@@ -0,0 +1,98 @@
+import logging
+from typing import List, Optional
+from qdrant_client import models
+from rag_code import Retriever
+from metrics import span
+from query_cache import GENERATIONS, SemanticQueryCache
+from retrieval_tuner import PROFILES, RetrievalProfiles, search_params_for
+from sparse_index import BM25Index, reciprocal_rank_fusion, to_scored_points
+
+logger = logging.getLogger(__name__)
+
+class EnhancedRetriever(Retriever):
+    # Same dense search as rag_code.Retriever, plus tenant filtering when the vector db is a
+    # shared collection (see EnhancedQdrantVDB.tenant) and optional BM25 fusion.
+    #   mode="dense"  - Qdrant only
+    #   mode="sparse" - BM25 only, no query embedding
+    #   mode="hybrid" - BM25 first; if its top hit covers the query with a clear margin the
+    #                   dense search (and its CPU query embedding) is skipped, otherwise both
+    #                   lists are merged with reciprocal rank fusion
+    # With a query_cache, results for a query embedding close enough to an earlier one are
+    # served without a Qdrant round-trip until the collection (or tenant) is written to again.
+    def __init__(self, vector_db, embeddata, limit: int = 10, sparse_index: Optional[BM25Index] = None,
+                 mode: str = "hybrid", rrf_k: int = 60, sparse_first_confidence: float = 0.8,
+                 query_cache: Optional[SemanticQueryCache] = None, profiles: RetrievalProfiles = PROFILES,
+                 query_embedder=None):
+        super().__init__(vector_db=vector_db, embeddata=embeddata)
+        self.limit = limit
+        self.sparse_index = sparse_index
+        self.mode = mode if sparse_index is not None else "dense"
+        self.rrf_k = rrf_k
+        self.sparse_first_confidence = sparse_first_confidence
+        self.query_cache = query_cache
+        self.profiles = profiles
+        # Anything with get_query_embedding, e.g. a resource_pool.QueryEmbedder that batches the
+        # queries of concurrent sessions; the embedding model itself when None
+        self.query_embedder = query_embedder
+        self.last_route = None
+
+    def search_params(self) -> models.SearchParams:
+        # Tuned profile for the collection's size tier (see retrieval_tuner), if it was tuned for
+        # the quantization the collection has; otherwise rescored 2x-oversampled search
+        points, quantization = self.vector_db.search_layout()
+        return search_params_for(self.profiles.profile_for(points, quantization))
+
+    def dense_search(self, query_embedding: List[float], limit: int) -> List[models.ScoredPoint]:
+        return self.vector_db.client.search(
+            collection_name=self.vector_db.collection_name,
+            query_vector=query_embedding,
+            query_filter=self.vector_db.tenant_filter(),
+            search_params=self.search_params(),
+            limit=limit,
+            timeout=1000,
+        )
+
+    def search(self, query: str):
+        with span("retrieve", mode=self.mode) as current:
+            result = self._search(query)
+            self.vector_db.touch()
+            current.attributes["route"] = self.last_route
+        return result
+
+    def _search(self, query: str):
+        if self.sparse_index is not None and self.vector_db.expired() and len(self.sparse_index):
+            # The janitor deleted this session's points; its lexical mirror must not outlive them
+            logger.info(f"Tenant {self.vector_db.tenant} expired, clearing its sparse index")
+            self.sparse_index.clear()
+        sparse = []
+        if self.mode != "dense" and len(self.sparse_index):
+            with span("retrieve.sparse"):
+                sparse = self.sparse_index.search(query, self.limit)
+            if self.mode == "sparse" or (
+                    sparse and self.sparse_index.confidence(query, sparse) >= self.sparse_first_confidence):
+                self.last_route = "sparse"
+                return to_scored_points(sparse)
+
+        with span("retrieve.embed_query"):
+            embedder = self.query_embedder if self.query_embedder is not None else self.embeddata.embed_model
+            query_embedding = embedder.get_query_embedding(query)
+        if self.query_cache is not None:
+            scope = self.vector_db.cache_scope()
+            generation = GENERATIONS.current(scope)
+            cached = self.query_cache.get(scope, query_embedding)
+            if cached is not None:
+                self.last_route = "cache"
+                return cached
+
+        with span("retrieve.dense"):
+            dense = self.dense_search(query_embedding, self.limit)
+        if not sparse:
+            self.last_route = "dense"
+            result = dense
+        else:
+            self.last_route = "hybrid"
+            result = reciprocal_rank_fusion([dense, to_scored_points(sparse)], k=self.rrf_k, limit=self.limit)
+
+        if self.query_cache is not None:
+            self.query_cache.put(scope, query_embedding, result, generation=generation)
+        return result
@@ -0,0 +1,322 @@
+# Tunes quantized Qdrant search per collection size tier and saves the winning profiles,
+# which EnhancedRetriever then applies at query time.
+#   python retrieval_tuner.py --collection calls --queries 200 --k 10 --target-recall 0.95 --save
+#   python retrieval_tuner.py --synthetic 5000 50000 --dim 384 --save      # offline, generated vectors
+# Latency is only meaningful against a Qdrant server; the in-process client searches brute force.
+import os
+import json
+import time
+import uuid
+import logging
+import argparse
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from qdrant_client import QdrantClient, models
+from disk_cache import DEFAULT_CACHE_ROOT
+
+logger = logging.getLogger(__name__)
+
+PROFILES_PATH = os.getenv("AUDIO_RAG_RETRIEVAL_PROFILES", os.path.join(DEFAULT_CACHE_ROOT, "retrieval_profiles.json"))
+
+# (upper bound on points, tier name), ascending
+SIZE_TIERS = ((10_000, "small"), (100_000, "medium"), (1_000_000, "large"), (float("inf"), "xlarge"))
+
+# What Retriever.search used before tuning: binary quantization, rescored, 2x oversampling
+DEFAULT_PROFILE = {"quantization": "binary", "oversampling": 2.0, "rescore": True, "hnsw_ef": None}
+
+QUANTIZATION_TYPES = ("binary", "scalar", "none")
+
+def tier_for(points: int) -> str:
+    for bound, name in SIZE_TIERS:
+        if points <= bound:
+            return name
+    return SIZE_TIERS[-1][1]
+
+def quantization_config(kind: str):
+    if kind == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    if kind == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8, quantile=0.99, always_ram=True))
+    if kind == "none":
+        return None
+    raise ValueError(f"Unknown quantization type {kind!r}; choose one of {', '.join(QUANTIZATION_TYPES)}")
+
+def search_params_for(profile: Dict) -> models.SearchParams:
+    if profile["quantization"] == "none":
+        quantization = models.QuantizationSearchParams(ignore=True)
+    else:
+        quantization = models.QuantizationSearchParams(ignore=False, rescore=profile["rescore"],
+                                                       oversampling=profile["oversampling"])
+    return models.SearchParams(hnsw_ef=profile.get("hnsw_ef"), quantization=quantization)
+
+class RetrievalProfiles:
+    # Tier -> profile, read from PROFILES_PATH. Missing tiers (or no file) fall back to
+    # DEFAULT_PROFILE, so an untuned install searches exactly as before. The file is re-read
+    # when it changes, so a tuning run takes effect without a restart.
+    def __init__(self, path: str = PROFILES_PATH):
+        self.path = path
+        self._profiles: Dict[str, Dict] = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._profiles, self._mtime = {}, None
+            return
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._profiles = json.load(f).get("tiers", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable retrieval profiles {self.path}: {e}")
+                self._profiles = {}
+            self._mtime = mtime
+
+    def profile_for(self, points: int, quantization: Optional[str] = None) -> Dict:
+        # quantization: what the collection actually has. A profile tuned for another type (the
+        # collection not switched yet, or quantized outside finalize_ingest) is not applied;
+        # the default settings for the actual type are used instead.
+        self._load()
+        entry = self._profiles.get(tier_for(points))
+        profile = dict(DEFAULT_PROFILE, **entry["profile"]) if entry else dict(DEFAULT_PROFILE)
+        if quantization is not None and profile["quantization"] != quantization:
+            profile = dict(DEFAULT_PROFILE, quantization=quantization)
+        return profile
+
+    def save(self, tier: str, profile: Dict, report: Optional[Dict] = None) -> None:
+        with self._lock:
+            data = {"tiers": {}}
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            data.setdefault("tiers", {})[tier] = {"profile": profile, "tuned_at": time.time(), **(report or {})}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.path)
+
+# Process-wide; retrievers share it
+PROFILES = RetrievalProfiles()
+
+# --- Tuning ---------------------------------------------------------------------------------
+
+def _scroll_vectors(client: QdrantClient, collection: str, batch: int = 1024) -> Iterable[Tuple[List, List]]:
+    offset = None
+    while True:
+        points, offset = client.scroll(collection_name=collection, limit=batch, offset=offset,
+                                       with_vectors=True, with_payload=False)
+        if points:
+            yield [p.id for p in points], [p.vector for p in points]
+        if offset is None:
+            return
+
+def _wait_indexed(client: QdrantClient, collection: str, timeout: float = 600.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.get_collection(collection).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(0.5)
+    logger.warning(f"{collection} still optimizing after {timeout:.0f}s; timings may be off")
+
+def sample_queries(client: QdrantClient, collection: str, count: int, seed: int = 0,
+                   pool: int = 20000) -> np.ndarray:
+    # Normalised midpoints of random pairs of stored vectors: near real content, but never an
+    # exact copy of one point (which every setting would trivially find). Pairs are drawn from
+    # the first `pool` points so large collections are not read into memory.
+    rng = np.random.default_rng(seed)
+    batches, loaded = [], 0
+    for _, vectors in _scroll_vectors(client, collection):
+        batches.append(np.asarray(vectors, dtype=np.float32))
+        loaded += len(vectors)
+        if loaded >= pool:
+            break
+    vectors = np.concatenate(batches)
+    pairs = rng.integers(0, len(vectors), size=(count, 2))
+    queries = vectors[pairs[:, 0]] + vectors[pairs[:, 1]]
+    norms = np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries / np.where(norms == 0, 1, norms)
+
+def sweep_grid(oversampling: Sequence[float] = (1.0, 1.5, 2.0, 3.0, 4.0), rescore: Sequence[bool] = (True, False),
+               hnsw_ef: Sequence[Optional[int]] = (None, 64, 128, 256),
+               quantization: Sequence[str] = QUANTIZATION_TYPES) -> List[Dict]:
+    grid = []
+    for kind in quantization:
+        for ef in hnsw_ef:
+            if kind == "none":
+                # Oversampling and rescoring only apply to quantized vectors
+                grid.append({"quantization": kind, "oversampling": 1.0, "rescore": False, "hnsw_ef": ef})
+                continue
+            for factor in oversampling:
+                for flag in rescore:
+                    grid.append({"quantization": kind, "oversampling": factor, "rescore": flag, "hnsw_ef": ef})
+    return grid
+
+def pareto_frontier(results: Sequence[Dict], recall_key: str = "recall", latency_key: str = "p50_ms") -> List[Dict]:
+    # Settings no other setting beats on both recall (higher) and latency (lower), fastest first
+    frontier, best_recall = [], -1.0
+    for r in sorted(results, key=lambda r: (r[latency_key], -r[recall_key])):
+        if r[recall_key] > best_recall:
+            frontier.append(r)
+            best_recall = r[recall_key]
+    return frontier
+
+def choose(frontier: Sequence[Dict], target_recall: float) -> Dict:
+    # Fastest setting meeting the target, else the most accurate one
+    for r in frontier:
+        if r["recall"] >= target_recall:
+            return r
+    return max(frontier, key=lambda r: r["recall"])
+
+class RetrievalTuner:
+    # Copies a collection once per quantization type, builds exact-search ground truth for the
+    # sampled queries, then times every grid setting against it. The copies are deleted after.
+    def __init__(self, client: QdrantClient, collection: str, k: int = 10, repeats: int = 3):
+        self.client = client
+        self.collection = collection
+        self.k = k
+        self.repeats = repeats
+
+    def _vector_params(self) -> models.VectorParams:
+        params = self.client.get_collection(self.collection).config.params.vectors
+        if not isinstance(params, models.VectorParams):
+            raise ValueError("Tuning supports collections with a single unnamed vector")
+        return params
+
+    def _copy(self, kind: str) -> str:
+        params = self._vector_params()
+        name = f"{self.collection}__tune_{kind}_{uuid.uuid4().hex[:6]}"
+        self.client.create_collection(
+            collection_name=name,
+            vectors_config=models.VectorParams(size=params.size, distance=params.distance, on_disk=params.on_disk),
+            quantization_config=quantization_config(kind),
+            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0),
+        )
+        for ids, vectors in _scroll_vectors(self.client, self.collection):
+            self.client.upsert(collection_name=name, points=models.Batch(ids=ids, vectors=vectors), wait=True)
+        self.client.update_collection(collection_name=name,
+                                      optimizer_config=models.OptimizersConfigDiff(indexing_threshold=20000))
+        _wait_indexed(self.client, name)
+        return name
+
+    def _search(self, collection: str, query: np.ndarray, params: models.SearchParams) -> List:
+        return [p.id for p in self.client.search(collection_name=collection, query_vector=query.tolist(),
+                                                 search_params=params, limit=self.k, with_payload=False)]
+
+    def _measure(self, collection: str, queries: np.ndarray, truth: List[set], profile: Dict) -> Dict:
+        params = search_params_for(profile)
+        latencies, recalls = [], []
+        for _ in range(self.repeats):
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                found = self._search(collection, query, params)
+                latencies.append(time.perf_counter() - start)
+                recalls.append(len(expected.intersection(found)) / max(1, len(expected)))
+        latencies.sort()
+        return dict(profile, recall=round(float(np.mean(recalls)), 4),
+                    p50_ms=round(latencies[len(latencies) // 2] * 1000, 3),
+                    p95_ms=round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000, 3))
+
+    def run(self, queries: int = 200, grid: Optional[List[Dict]] = None, target_recall: float = 0.95,
+            seed: int = 0) -> Dict:
+        grid = grid or sweep_grid()
+        points = self.client.count(self.collection, exact=True).count
+        sample = sample_queries(self.client, self.collection, queries, seed=seed)
+        exact = models.SearchParams(exact=True, quantization=models.QuantizationSearchParams(ignore=True))
+        truth = [set(self._search(self.collection, q, exact)) for q in sample]
+
+        results = []
+        for kind in dict.fromkeys(p["quantization"] for p in grid):
+            copy = self._copy(kind)
+            try:
+                for profile in (p for p in grid if p["quantization"] == kind):
+                    results.append(self._measure(copy, sample, truth, profile))
+                    logger.info(f"{profile}: recall {results[-1]['recall']}, p50 {results[-1]['p50_ms']} ms")
+            finally:
+                self.client.delete_collection(copy)
+
+        frontier = pareto_frontier(results)
+        chosen = choose(frontier, target_recall)
+        return {"collection": self.collection, "points": points, "tier": tier_for(points), "k": self.k,
+                "queries": len(sample), "target_recall": target_recall,
+                "chosen": {key: chosen[key] for key in DEFAULT_PROFILE},
+                "chosen_metrics": {key: chosen[key] for key in ("recall", "p50_ms", "p95_ms")},
+                "frontier": frontier, "results": results}
+
+def _synthetic_collection(client: QdrantClient, points: int, dim: int, seed: int) -> str:
+    # Clustered unit vectors, loosely shaped like sentence embeddings of one domain
+    rng = np.random.default_rng(seed)
+    name = f"tune_synthetic_{points}"
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(collection_name=name,
+                             vectors_config=models.VectorParams(size=dim, distance=models.Distance.DOT))
+    centers = rng.normal(size=(max(8, points // 500), dim)).astype(np.float32)
+    for start in range(0, points, 2048):
+        n = min(2048, points - start)
+        vectors = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        client.upsert(collection_name=name, points=models.Batch(ids=list(range(start, start + n)),
+                                                                vectors=vectors.tolist()), wait=True)
+    return name
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep quantized search settings and save a profile per size tier")
+    parser.add_argument("--collection", help="Collection to tune on (its size picks the tier)")
+    parser.add_argument("--synthetic", type=int, nargs="*", default=None,
+                        help="Tune on generated collections of these sizes instead")
+    parser.add_argument("--dim", type=int, default=1024, help="Vector size for --synthetic")
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--qdrant-location", default=None, help='e.g. ":memory:" (brute force, recall only)')
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--quantization", nargs="+", choices=QUANTIZATION_TYPES, default=list(QUANTIZATION_TYPES))
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, 1.5, 2.0, 3.0, 4.0])
+    parser.add_argument("--hnsw-ef", type=int, nargs="+", default=[0, 64, 128, 256], help="0 = collection default")
+    parser.add_argument("--save", action="store_true", help=f"Write chosen profiles to {PROFILES_PATH}")
+    parser.add_argument("--output", default=None, help="Full sweep report as JSON")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    client = (QdrantClient(location=args.qdrant_location) if args.qdrant_location
+              else QdrantClient(url=args.qdrant_url, prefer_grpc=True))
+    grid = sweep_grid(oversampling=args.oversampling, hnsw_ef=[ef or None for ef in args.hnsw_ef],
+                      quantization=args.quantization)
+    if args.synthetic:
+        collections = [(_synthetic_collection(client, n, args.dim, seed=n), True) for n in args.synthetic]
+    elif args.collection:
+        collections = [(args.collection, False)]
+    else:
+        parser.error("pass --collection or --synthetic")
+
+    reports = []
+    for collection, generated in collections:
+        try:
+            report = RetrievalTuner(client, collection, k=args.k, repeats=args.repeats).run(
+                queries=args.queries, grid=grid, target_recall=args.target_recall)
+        finally:
+            if generated:
+                client.delete_collection(collection)
+        reports.append(report)
+        print(f"{collection} ({report['points']} points, tier {report['tier']}): {report['chosen']} "
+              f"-> recall {report['chosen_metrics']['recall']}, p50 {report['chosen_metrics']['p50_ms']} ms")
+        for r in report["frontier"]:
+            print(f"  frontier: {r['quantization']:<6} oversampling={r['oversampling']:<4} rescore={r['rescore']!s:<5} "
+                  f"hnsw_ef={r['hnsw_ef']!s:<4} recall={r['recall']:.4f} p50={r['p50_ms']:.2f} ms")
+        if args.save:
+            PROFILES.save(report["tier"], report["chosen"],
+                          {"points": report["points"], "collection": collection, **report["chosen_metrics"]})
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import os
+import math
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from textblob import TextBlob
+from metrics import span
+
+logger = logging.getLogger(__name__)
+
+def _textblob_scores(texts: Sequence[str]) -> Tuple[List[float], List[float]]:
+    # Module-level so it can be pickled into pool workers
+    polarity, subjectivity = [], []
+    for text in texts:
+        sentiment = TextBlob(text).sentiment
+        polarity.append(sentiment.polarity)
+        subjectivity.append(sentiment.subjectivity)
+    return polarity, subjectivity
+
+def _gather(parts: List[Future]) -> Future:
+    # One future for the concatenated (polarity, subjectivity) of chunk futures, in order
+    result: Future = Future()
+    remaining = [len(parts)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        try:
+            scores = [part.result() for part in parts]
+        except BaseException as e:
+            result.set_exception(e)
+            return
+        result.set_result((np.asarray([v for p, _ in scores for v in p], dtype=np.float32),
+                           np.asarray([v for _, s in scores for v in s], dtype=np.float32)))
+
+    for part in parts:
+        part.add_done_callback(done)
+    return result
+
+class SentimentStage:
+    # Pluggable sentiment stage: scores for N segments come back as two float32 arrays of
+    # length N (polarity, subjectivity) aligned with the input order. Submissions from
+    # concurrent sessions run side by side rather than queueing behind one another.
+    def __init__(self, submit_workers: int = 4):
+        self._submitter = ThreadPoolExecutor(max_workers=max(1, submit_workers), thread_name_prefix="sentiment")
+
+    def analyze_batch(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        # Runs in the background so callers can overlap it with embedding and ingest
+        return self._submitter.submit(self.analyze_batch, list(texts))
+
+    def close(self) -> None:
+        self._submitter.shutdown(wait=False)
+
+class TextBlobSentiment(SentimentStage):
+    # Batches of at least min_parallel texts are split into one chunk per worker (between
+    # min_chunk and chunk_size texts) and submitted straight to the process pool, so a
+    # transcript of normal length is scored in parallel and several transcripts share the pool.
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 500, min_parallel: int = 200,
+                 min_chunk: int = 50):
+        self.workers = workers or int(os.getenv("AUDIO_RAG_SENTIMENT_WORKERS", os.cpu_count() or 1))
+        super().__init__(submit_workers=self.workers)
+        self.chunk_size = chunk_size
+        self.min_chunk = min_chunk
+        # Below this many texts a pool round-trip costs more than scoring them in-process
+        self.min_parallel = min_parallel
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _parallel(self, texts: List[str]) -> bool:
+        return self.workers > 1 and bool(texts) and len(texts) >= self.min_parallel
+
+    def _chunks(self, texts: List[str]) -> List[List[str]]:
+        size = min(self.chunk_size, max(self.min_chunk, math.ceil(len(texts) / self.workers)))
+        return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+    def analyze_batch(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        texts = list(texts)
+        with span("sentiment", texts=len(texts)):
+            if not self._parallel(texts):
+                polarity, subjectivity = _textblob_scores(texts)
+                return np.asarray(polarity, dtype=np.float32), np.asarray(subjectivity, dtype=np.float32)
+            return self._submit_chunks(texts).result()
+
+    def _submit_chunks(self, texts: List[str]) -> Future:
+        pool = self._get_pool()
+        return _gather([pool.submit(_textblob_scores, chunk) for chunk in self._chunks(texts)])
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        # Pool-sized batches skip the submitter thread and go to the process pool directly
+        texts = list(texts)
+        if self._parallel(texts):
+            return self._submit_chunks(texts)
+        return super().submit(texts)
+
+    def close(self) -> None:
+        super().close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+def attach_sentiment(transcripts: List[Dict], polarity: np.ndarray, subjectivity: np.ndarray) -> List[Dict]:
+    for t, p, s in zip(transcripts, polarity.tolist(), subjectivity.tolist()):
+        t["sentiment"] = {"polarity": p, "subjectivity": s}
+    return transcripts
@@ -0,0 +1,127 @@
+import re
+import math
+import logging
+import threading
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+# qdrant_client is imported on first use; HEMP4 creates the index before the page paints
+if TYPE_CHECKING:
+    from qdrant_client import models
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_'.][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "a about an and any anything are as at be but by did do does for from had has have he her him his how "
+    "i if in is it its me my of on or our say said she so tell that the their them there they this to was "
+    "we were what when where which who why will with you your".split()
+)
+
+def _stem(token: str) -> str:
+    # Plural folding only; enough for "refunds"/"refund" without mangling codes like "xr-200"
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss") and token.isalpha():
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(t) for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+class BM25Index:
+    # In-memory inverted index over transcript segments, keyed by the same point ids as Qdrant
+    # so its hits can be fused with dense results. Append-only, like the collection it mirrors;
+    # cleared when the janitor expires the tenant.
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_lengths: List[int] = []
+        self._ids: List[str] = []
+        self._payloads: List[Dict] = []
+        self._positions: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._doc_lengths.clear()
+            self._ids.clear()
+            self._payloads.clear()
+            self._positions.clear()
+            self._total_length = 0
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], payloads: Optional[Sequence[Dict]] = None) -> None:
+        with self._lock:
+            for n, (point_id, text) in enumerate(zip(ids, texts)):
+                if point_id in self._positions:
+                    continue  # re-ingested segment with a stable id
+                doc = len(self._ids)
+                tokens = tokenize(text)
+                for term, tf in Counter(tokens).items():
+                    self._postings.setdefault(term, {})[doc] = tf
+                self._positions[point_id] = doc
+                self._ids.append(point_id)
+                self._payloads.append(payloads[n] if payloads is not None else {"context": text})
+                self._doc_lengths.append(len(tokens))
+                self._total_length += len(tokens)
+
+    def idf(self, term: str) -> float:
+        df = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self._ids) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float, Dict]]:
+        terms = set(tokenize(query))
+        if not terms or not self._ids:
+            return []
+        avg_length = self._total_length / len(self._ids) or 1.0
+        scores: Dict[int, float] = {}
+        with self._lock:
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = self.idf(term)
+                for doc, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc] / avg_length)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(self._ids[doc], score, self._payloads[doc]) for doc, score in ranked]
+
+    def confidence(self, query: str, hits: List[Tuple[str, float, Dict]], margin: float = 1.5) -> float:
+        # Share of the query's IDF mass matched by the top hit, zeroed when the runner-up is
+        # too close to call. 1.0 means the top segment contains every (rare) query term.
+        terms = set(tokenize(query))
+        if not hits or not terms:
+            return 0.0
+        if len(hits) > 1 and hits[0][1] < margin * hits[1][1]:
+            return 0.0
+        top_terms = set(tokenize(hits[0][2].get("context", "")))
+        weights = {term: self.idf(term) for term in terms}
+        total = sum(weights.values())
+        return sum(w for term, w in weights.items() if term in top_terms) / total if total else 0.0
+
+def to_scored_points(hits: List[Tuple[str, float, Dict]]) -> List["models.ScoredPoint"]:
+    from qdrant_client import models
+    return [models.ScoredPoint(id=point_id, version=0, score=score, payload=payload)
+            for point_id, score, payload in hits]
+
+def reciprocal_rank_fusion(result_lists: Sequence[Sequence["models.ScoredPoint"]], k: int = 60,
+                           limit: int = 10) -> List["models.ScoredPoint"]:
+    from qdrant_client import models
+    fused: Dict[str, float] = {}
+    points: Dict[str, "models.ScoredPoint"] = {}
+    for results in result_lists:
+        for rank, point in enumerate(results):
+            key = str(point.id)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank + 1)
+            points.setdefault(key, point)
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [models.ScoredPoint(id=points[key].id, version=points[key].version, score=score,
+                               payload=points[key].payload) for key, score in ranked]
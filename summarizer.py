@@ -0,0 +1,108 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+from disk_cache import DiskCache, hash_json
+
+logger = logging.getLogger(__name__)
+
+MAP_PROMPT = (
+    "Below is one part of a transcript of a recorded conversation. Summarize what each speaker "
+    "said in this part, keeping names, numbers and decisions.\n\n{text}\n\nSummary:"
+)
+
+REDUCE_PROMPT = (
+    "Below are summaries of consecutive parts of one conversation, in order. Combine them into a "
+    "single coherent summary of the whole conversation, keeping names, numbers and decisions.\n\n"
+    "{text}\n\nSummary:"
+)
+
+def estimate_tokens(text: str) -> int:
+    # Rough word-piece estimate; avoids loading the model's tokenizer for budgeting
+    return max(1, int(len(text.split()) * 1.3))
+
+def chunk_transcript(transcripts: Sequence[Dict], token_budget: int) -> List[str]:
+    # Greedy, utterance-aligned chunks. Once a chunk is mostly full it is closed at the next
+    # speaker change rather than mid-turn. Boundaries depend only on what came before, so
+    # appending to a recording leaves every earlier chunk (and its cached summary) unchanged.
+    chunks, lines, used, last_speaker = [], [], 0, None
+    for t in transcripts:
+        speaker = t.get("speaker") or ""
+        line = f"{speaker}: {t['text']}" if speaker else t["text"]
+        cost = estimate_tokens(line)
+        speaker_change = last_speaker is not None and speaker != last_speaker
+        if lines and (used + cost > token_budget or (speaker_change and used >= 0.8 * token_budget)):
+            chunks.append("\n".join(lines))
+            lines, used = [], 0
+        if cost > token_budget:
+            # A single monologue longer than the budget is split on word boundaries
+            words = line.split()
+            step = max(1, int(token_budget / 1.3))
+            for i in range(0, len(words), step):
+                chunks.append(" ".join(words[i:i + step]))
+        else:
+            lines.append(line)
+            used += cost
+        last_speaker = speaker
+    if lines:
+        chunks.append("\n".join(lines))
+    return chunks
+
+class HierarchicalSummarizer:
+    # Map-reduce summarization: chunk summaries run concurrently on a bounded pool, then are
+    # combined (recursively, if they still exceed the budget). Every LLM call is cached on
+    # disk by (model, prompt, input) hash, so re-summarizing only pays for changed chunks.
+    def __init__(self, llm, model_name: str, token_budget: int = 3000, max_workers: int = 4,
+                 cache: Optional[DiskCache] = None, map_prompt: str = MAP_PROMPT,
+                 reduce_prompt: str = REDUCE_PROMPT):
+        self.llm = llm
+        self.model_name = model_name
+        self.token_budget = token_budget
+        self.max_workers = max_workers
+        self.cache = cache
+        self.map_prompt = map_prompt
+        self.reduce_prompt = reduce_prompt
+        self.llm_calls = 0
+        self.cache_hits = 0
+        self._stats_lock = threading.Lock()
+
+    def _complete(self, template: str, text: str) -> str:
+        key = hash_json({"model": self.model_name, "prompt": template, "text": text})
+        if self.cache is not None:
+            cached = self.cache.get_json(key)
+            if cached is not None:
+                with self._stats_lock:
+                    self.cache_hits += 1
+                return cached["summary"]
+        response = self.llm.complete(template.format(text=text))
+        summary = str(getattr(response, "text", response)).strip()
+        with self._stats_lock:
+            self.llm_calls += 1
+        if self.cache is not None:
+            self.cache.put_json(key, {"summary": summary})
+        return summary
+
+    def _map(self, template: str, texts: List[str]) -> List[str]:
+        if len(texts) == 1:
+            return [self._complete(template, texts[0])]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="summarize") as pool:
+            return list(pool.map(lambda text: self._complete(template, text), texts))
+
+    def _reduce(self, summaries: List[str]) -> str:
+        while len(summaries) > 1:
+            groups = chunk_transcript([{"text": s} for s in summaries], self.token_budget)
+            if len(groups) == len(summaries) and len(groups) > 1:
+                # Each summary alone fills the budget; pair them up so the tree still shrinks
+                groups = ["\n\n".join(summaries[i:i + 2]) for i in range(0, len(summaries), 2)]
+            summaries = self._map(self.reduce_prompt, groups)
+        return summaries[0]
+
+    def summarize(self, transcripts: Sequence[Dict]) -> str:
+        chunks = chunk_transcript(transcripts, self.token_budget)
+        if not chunks:
+            return ""
+        logger.info(f"Summarizing {len(chunks)} chunks with up to {self.max_workers} workers")
+        return self._reduce(self._map(self.map_prompt, chunks))
+
+    def stats(self) -> Dict:
+        return {"llm_calls": self.llm_calls, "cache_hits": self.cache_hits}
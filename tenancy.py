@@ -0,0 +1,7 @@
+import os
+
+# Collection layout, read by the app before qdrant_client is imported, so it stays free of
+# heavy imports. "session": one Qdrant collection per browser session; "shared": one
+# collection for every session, isolated by a tenant payload filter (see vector_store)
+COLLECTION_MODE = os.getenv("AUDIO_RAG_COLLECTION_MODE", "session")
+SHARED_COLLECTION = os.getenv("AUDIO_RAG_SHARED_COLLECTION", "audio_rag_shared")
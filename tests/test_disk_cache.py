@@ -0,0 +1,50 @@
+# Size-bounded eviction of DiskCache without a directory walk per write.
+#   python -m pytest tests
+import os
+import disk_cache
+from disk_cache import DiskCache
+
+REAL_WALK = os.walk
+
+def namespace_bytes(cache):
+    return sum(os.path.getsize(os.path.join(dirpath, name))
+               for dirpath, _, names in REAL_WALK(cache.directory) for name in names)
+
+def count_walks(monkeypatch):
+    walks = []
+
+    def walk(*args, **kwargs):
+        walks.append(args[0])
+        return REAL_WALK(*args, **kwargs)
+    monkeypatch.setattr(disk_cache.os, "walk", walk)
+    return walks
+
+def test_writes_to_a_full_cache_rarely_walk_it(tmp_path, monkeypatch):
+    cache = DiskCache("full", root=str(tmp_path), max_bytes=20_000)
+    entry = b"x" * 400
+    for i in range(60):
+        cache.put_bytes(f"{i:040x}", entry)
+    assert namespace_bytes(cache) <= cache.max_bytes
+
+    walks = count_walks(monkeypatch)
+    for i in range(60, 560):
+        cache.put_bytes(f"{i:040x}", entry)
+        assert namespace_bytes(cache) <= cache.max_bytes + len(entry)
+    # Each over-limit walk trims to 90%, leaving room for several writes before the next one
+    assert 0 < len(walks) <= 500 // 5
+
+def test_running_total_matches_disk(tmp_path):
+    cache = DiskCache("total", root=str(tmp_path), max_bytes=10_000)
+    for i in range(100):
+        cache.put_bytes(f"{i % 30:040x}", b"y" * (50 + i))
+    assert cache._total == namespace_bytes(cache)
+    cache.clear()
+    assert cache._total == 0 == namespace_bytes(cache)
+
+def test_sweep_interval_expires_entries_without_size_pressure(tmp_path, monkeypatch):
+    cache = DiskCache("aged", root=str(tmp_path), max_age_seconds=60, sweep_interval=0)
+    old = cache.put_bytes("a" * 40, b"old")
+    os.utime(old, (0, 0))
+    walks = count_walks(monkeypatch)
+    cache.put_bytes("b" * 40, b"new")
+    assert walks and not os.path.exists(old)
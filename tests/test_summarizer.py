@@ -0,0 +1,60 @@
+# Offline map-reduce summarization against the fake LLM: chunk boundaries, the worker cap and
+# the per-chunk cache.
+#   python -m pytest tests
+import pytest
+from disk_cache import DiskCache
+from fakes import FakeLLM, synthetic_utterances
+from summarizer import HierarchicalSummarizer, chunk_transcript
+
+@pytest.fixture
+def transcripts():
+    return synthetic_utterances(600)
+
+def make_summarizer(tmp_path, llm, max_workers=4, token_budget=300):
+    return HierarchicalSummarizer(llm, "fake", token_budget=token_budget, max_workers=max_workers,
+                                  cache=DiskCache("summaries", root=str(tmp_path)))
+
+@pytest.mark.parametrize("appended", [1, 25, 300])
+def test_appending_keeps_earlier_chunk_boundaries(transcripts, appended):
+    chunks = chunk_transcript(transcripts, 300)
+    extended = chunk_transcript(transcripts + synthetic_utterances(appended, seed=1), 300)
+    assert len(chunks) > 2
+    # Only the last chunk may take on the appended utterances
+    assert extended[:len(chunks) - 1] == chunks[:-1]
+    assert extended[len(chunks) - 1].startswith(chunks[-1])
+
+def test_every_prefix_chunks_consistently(transcripts):
+    full = chunk_transcript(transcripts, 300)
+    for end in range(1, len(transcripts), 37):
+        prefix = chunk_transcript(transcripts[:end], 300)
+        assert prefix[:-1] == full[:len(prefix) - 1]
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_concurrent_llm_calls_stay_within_max_workers(tmp_path, transcripts, max_workers):
+    llm = FakeLLM(latency=0.02)
+    summarizer = make_summarizer(tmp_path, llm, max_workers=max_workers)
+    assert summarizer.summarize(transcripts)
+    assert llm.calls > max_workers
+    assert llm.max_concurrent <= max_workers
+
+def test_resummarizing_unchanged_transcript_makes_no_llm_calls(tmp_path, transcripts):
+    llm = FakeLLM(latency=0.0)
+    summary = make_summarizer(tmp_path, llm).summarize(transcripts)
+    calls = llm.calls
+    # A fresh summarizer over the same cache, as after a rerun or in another session
+    assert make_summarizer(tmp_path, llm).summarize(transcripts) == summary
+    assert llm.calls == calls
+
+def test_appended_transcript_only_summarizes_changed_chunks(tmp_path, transcripts):
+    llm = FakeLLM(latency=0.0)
+    summarizer = make_summarizer(tmp_path, llm)
+    summarizer.summarize(transcripts)
+    cold = llm.calls
+    summarizer.summarize(transcripts + synthetic_utterances(20, seed=1))
+    assert 0 < llm.calls - cold < cold
+    assert summarizer.stats()["cache_hits"] >= len(chunk_transcript(transcripts, 300)) - 1
+
+def test_empty_transcript(tmp_path):
+    llm = FakeLLM(latency=0.0)
+    assert make_summarizer(tmp_path, llm).summarize([]) == ""
+    assert llm.calls == 0
@@ -0,0 +1,24 @@
+# TranscriptStore is the app's only copy of a transcript, so reading it back must give the
+# segment dicts exports and the summarizer used to get.
+#   python -m pytest tests
+import copy
+from benchmarks.bench_exports import enriched
+from exports import transcript_digest
+from transcript_store import TranscriptStore, enrich_transcripts
+
+def test_records_round_trip():
+    transcripts = enriched(2500)
+    store = TranscriptStore.from_transcripts(copy.deepcopy(transcripts))
+    assert list(store) == transcripts
+    # Iterable more than once, so ExportCache can hash it and then render it
+    assert transcript_digest(store) == transcript_digest(transcripts)
+
+def test_untimed_segments_without_sentiment():
+    transcripts = enrich_transcripts([{"speaker": "A", "text": "hello there"}, {"speaker": "B", "text": "hi"}])
+    assert list(TranscriptStore.from_transcripts(transcripts)) == transcripts
+
+def test_sentiment_set_later_is_read_back():
+    transcripts = enrich_transcripts([{"speaker": "A", "text": "fine", "start": 0, "end": 900}])
+    store = TranscriptStore.from_transcripts(transcripts)
+    store.set_sentiment(0, [0.125], [0.6])
+    assert next(iter(store))["sentiment"] == {"polarity": 0.125, "subjectivity": 0.6}
@@ -0,0 +1,275 @@
+import math
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+def format_offset(ms: Optional[float]) -> str:
+    if ms is None:
+        return "--:--:--"
+    seconds = int(ms // 1000)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def enrich_transcripts(transcripts: List[Dict]) -> List[Dict]:
+    for t in transcripts:
+        t.update({
+            "timestamp": format_offset(t.get("start")),
+            "word_count": len(t["text"].split())
+        })
+    return transcripts
+
+# column -> dtype; times are ms with -1 for unknown, sentiment is NaN until it is attached.
+# Sentiment stays float64 so records read back from the store export the scores as computed
+_COLUMNS = {
+    "speaker": np.int32,
+    "start": np.int64,
+    "end": np.int64,
+    "word_count": np.int32,
+    "polarity": np.float64,
+    "subjectivity": np.float64,
+}
+
+class TranscriptStore:
+    # Enriched transcript segments held column-wise: one NumPy array per numeric field
+    # (speaker as an index into `speakers`) plus the text column. Appends grow the arrays
+    # geometrically and fold the new rows into running totals, so statistics() and
+    # speaker_stats() cost O(speakers) however long the transcript is, and page() formats
+    # only the rows on screen.
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self._columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in _COLUMNS.items()}
+        self.text: List[str] = []
+        self.speakers: List[str] = []
+        self._speaker_ids: Dict[str, int] = {}
+        self._words = 0
+        self._polarity_sum = 0.0
+        self._polarity_count = 0
+        # Per speaker, indexed by speaker id
+        self._speaker_segments = np.zeros(0, dtype=np.int64)
+        self._speaker_words = np.zeros(0, dtype=np.int64)
+        self._speaker_ms = np.zeros(0, dtype=np.int64)
+        self._speaker_polarity_sum = np.zeros(0, dtype=np.float64)
+        self._speaker_polarity_count = np.zeros(0, dtype=np.int64)
+        # Bumped on every change; derived views are memoized against it
+        self.version = 0
+        self._memo: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_transcripts(cls, transcripts: Sequence[Dict]) -> "TranscriptStore":
+        store = cls(capacity=max(1024, len(transcripts)))
+        store.append(transcripts)
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Dict]:
+        # The enriched segment dicts, rebuilt a block at a time, so exports and the summarizer
+        # read the store instead of a second copy of the transcript kept alongside it
+        columns, size = self._columns, self._size
+        for first in range(0, size, 1024):
+            block = slice(first, min(size, first + 1024))
+            values = {name: columns[name][block].tolist() for name in _COLUMNS}
+            for n, i in enumerate(range(block.start, block.stop)):
+                start, end, polarity = values["start"][n], values["end"][n], values["polarity"][n]
+                record = {"speaker": self.speakers[values["speaker"][n]], "text": self.text[i]}
+                if start >= 0:
+                    record["start"] = start
+                if end >= 0:
+                    record["end"] = end
+                record["timestamp"] = format_offset(start if start >= 0 else None)
+                record["word_count"] = values["word_count"][n]
+                if not math.isnan(polarity):
+                    record["sentiment"] = {"polarity": polarity, "subjectivity": values["subjectivity"][n]}
+                yield record
+
+    def column(self, name: str) -> np.ndarray:
+        # Read-only view of the filled part of a column
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def _speaker_id(self, speaker: str) -> int:
+        index = self._speaker_ids.get(speaker)
+        if index is None:
+            index = self._speaker_ids[speaker] = len(self.speakers)
+            self.speakers.append(speaker)
+        return index
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        capacity = len(self._columns["speaker"])
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name, array in self._columns.items():
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._columns[name] = grown
+
+    def _grow_speakers(self) -> None:
+        missing = len(self.speakers) - len(self._speaker_segments)
+        if missing > 0:
+            for name in ("_speaker_segments", "_speaker_words", "_speaker_ms", "_speaker_polarity_sum",
+                         "_speaker_polarity_count"):
+                array = getattr(self, name)
+                setattr(self, name, np.concatenate([array, np.zeros(missing, dtype=array.dtype)]))
+
+    def _fold(self, rows: slice, sign: int = 1) -> None:
+        # Adds (or with sign=-1 removes) rows' sentiment to the running totals
+        polarity = self._columns["polarity"][rows]
+        known = ~np.isnan(polarity)
+        speakers = self._columns["speaker"][rows][known]
+        values = polarity[known].astype(np.float64)
+        n = len(self.speakers)
+        self._polarity_sum += sign * float(values.sum())
+        self._polarity_count += sign * int(known.sum())
+        self._speaker_polarity_sum += sign * np.bincount(speakers, weights=values, minlength=n)
+        self._speaker_polarity_count += sign * np.bincount(speakers, minlength=n)
+
+    def append(self, transcripts: Sequence[Dict]) -> None:
+        if not transcripts:
+            return
+        with self._lock:
+            count = len(transcripts)
+            self._reserve(count)
+            rows = slice(self._size, self._size + count)
+            columns = self._columns
+            nan = float("nan")
+            columns["speaker"][rows] = [self._speaker_id(t.get("speaker") or "") for t in transcripts]
+            columns["start"][rows] = [-1 if t.get("start") is None else t["start"] for t in transcripts]
+            columns["end"][rows] = [-1 if t.get("end") is None else t["end"] for t in transcripts]
+            columns["word_count"][rows] = [t["word_count"] if "word_count" in t else len(t["text"].split())
+                                           for t in transcripts]
+            columns["polarity"][rows] = [(t.get("sentiment") or {}).get("polarity", nan) for t in transcripts]
+            columns["subjectivity"][rows] = [(t.get("sentiment") or {}).get("subjectivity", nan) for t in transcripts]
+            self.text.extend(t["text"] for t in transcripts)
+            self._size += count
+
+            self._grow_speakers()
+            n = len(self.speakers)
+            speakers = columns["speaker"][rows]
+            words = columns["word_count"][rows]
+            timed = (columns["start"][rows] >= 0) & (columns["end"][rows] >= 0)
+            durations = np.where(timed, columns["end"][rows] - columns["start"][rows], 0)
+            self._words += int(words.sum())
+            self._speaker_segments += np.bincount(speakers, minlength=n)
+            self._speaker_words += np.bincount(speakers, weights=words, minlength=n).astype(np.int64)
+            self._speaker_ms += np.bincount(speakers, weights=durations, minlength=n).astype(np.int64)
+            self._fold(rows)
+            self._changed()
+
+    def set_sentiment(self, start: int, polarity: np.ndarray, subjectivity: np.ndarray) -> None:
+        # Sentiment for rows start..start+len(polarity), e.g. when the sentiment stage finishes
+        # after the segments were appended; only those rows are re-folded into the totals
+        with self._lock:
+            rows = slice(start, min(self._size, start + len(polarity)))
+            count = rows.stop - rows.start
+            self._fold(rows, sign=-1)
+            self._columns["polarity"][rows] = np.asarray(polarity[:count], dtype=np.float64)
+            self._columns["subjectivity"][rows] = np.asarray(subjectivity[:count], dtype=np.float64)
+            self._fold(rows)
+            self._changed()
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._memo.clear()
+
+    def statistics(self) -> Dict:
+        if not self._size:
+            return {}
+        return {
+            "total_segments": self._size,
+            "avg_word_count": self._words / self._size,
+            "avg_sentiment": self._polarity_sum / self._polarity_count if self._polarity_count else 0.0,
+            "speakers": len(self.speakers),
+        }
+
+    def speaker_stats(self) -> Dict[str, List]:
+        # Column-oriented (ready for a DataFrame), one row per speaker in order of first appearance
+        total_ms = int(self._speaker_ms.sum())
+        with np.errstate(invalid="ignore", divide="ignore"):
+            polarity = np.where(self._speaker_polarity_count > 0,
+                                self._speaker_polarity_sum / self._speaker_polarity_count, np.nan)
+        return {
+            "speaker": list(self.speakers),
+            "segments": self._speaker_segments.tolist(),
+            "words": self._speaker_words.tolist(),
+            "talk_seconds": (self._speaker_ms / 1000).round(1).tolist(),
+            "talk_share": (self._speaker_ms / total_ms).round(3).tolist() if total_ms else [0.0] * len(self.speakers),
+            "avg_polarity": polarity.round(3).tolist(),
+        }
+
+    def sentiment_timeline(self, bins: int = 60, by_speaker: bool = False) -> Dict[str, List]:
+        # Mean polarity per time bin (NaN where nobody spoke), from a single bincount over
+        # segment midpoints; per speaker, one column each
+        key = ("timeline", bins, by_speaker)
+        if key in self._memo:
+            return self._memo[key]
+        start, end = self.column("start"), self.column("end")
+        polarity = self.column("polarity")
+        usable = (start >= 0) & (end >= 0) & ~np.isnan(polarity)
+        span_ms = int(end[usable].max()) if usable.any() else 0
+        if not span_ms:
+            return {"minute": []}
+        bins = max(1, bins)
+        width = span_ms / bins
+        middle = (start[usable] + end[usable]) / 2
+        index = np.minimum((middle / width).astype(np.int64), bins - 1)
+        values = polarity[usable].astype(np.float64)
+        timeline = {"minute": ((np.arange(bins) + 0.5) * width / 60000).round(2).tolist()}
+        if by_speaker:
+            speakers = self.column("speaker")[usable]
+            n = len(self.speakers)
+            cells = speakers * bins + index
+            sums = np.bincount(cells, weights=values, minlength=n * bins).reshape(n, bins)
+            counts = np.bincount(cells, minlength=n * bins).reshape(n, bins)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = np.where(counts > 0, sums / counts, np.nan)
+            for speaker, row in zip(self.speakers, means):
+                timeline[speaker] = row.round(3).tolist()
+        else:
+            sums = np.bincount(index, weights=values, minlength=bins)
+            counts = np.bincount(index, minlength=bins)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                timeline["polarity"] = np.where(counts > 0, sums / counts, np.nan).round(3).tolist()
+        self._memo[key] = timeline
+        return timeline
+
+    def _rows_for(self, speaker: Optional[str]) -> Optional[np.ndarray]:
+        # Row indices of one speaker (None: every row); one vectorized comparison, memoized
+        if speaker is None:
+            return None
+        key = ("filter", speaker)
+        if key not in self._memo:
+            speaker_id = self._speaker_ids.get(speaker, -1)
+            self._memo[key] = np.flatnonzero(self.column("speaker") == speaker_id)
+        return self._memo[key]
+
+    def page_count(self, page_size: int = 100, speaker: Optional[str] = None) -> int:
+        indices = self._rows_for(speaker)
+        total = self._size if indices is None else len(indices)
+        return max(1, math.ceil(total / page_size))
+
+    def page(self, page: int = 0, page_size: int = 100, speaker: Optional[str] = None) -> Tuple[Dict[str, List], int]:
+        # One page of the transcript view plus the number of pages; only page rows are formatted
+        indices = self._rows_for(speaker)
+        total = self._size if indices is None else len(indices)
+        pages = max(1, math.ceil(total / page_size))
+        page = min(max(0, page), pages - 1)
+        first, last = page * page_size, min(total, (page + 1) * page_size)
+        rows = np.arange(first, last) if indices is None else indices[first:last]
+
+        columns = self._columns
+        timestamps, sentiment = [], []
+        for i in rows.tolist():
+            start = int(columns["start"][i])
+            timestamps.append(format_offset(None if start < 0 else start))
+            polarity, subjectivity = columns["polarity"][i], columns["subjectivity"][i]
+            sentiment.append("" if np.isnan(polarity) else f"P={polarity:.2f}, S={subjectivity:.2f}")
+        return {
+            "timestamp": timestamps,
+            "speaker": [self.speakers[s] for s in columns["speaker"][rows].tolist()],
+            "text": [self.text[i] for i in rows.tolist()],
+            "sentiment": sentiment,
+        }, pages
@@ -0,0 +1,187 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import CancelledError
+from typing import List, Dict, Optional
+from rag_code import Transcribe
+from disk_cache import TranscriptCache, hash_file
+from metrics import span
+from transcript_store import enrich_transcripts
+from audio_preprocess import (PREPROCESS_ENABLED, AudioDecodeError, PreparedAudio, UntimedTranscriptError,
+                              prepare_audio, preprocess_config, stitch, transcribe_prepared)
+from sentiment import SentimentStage, TextBlobSentiment
+from transcription_jobs import Job, TranscriptionScheduler
+
+logger = logging.getLogger(__name__)
+
+class EnhancedTranscribe(Transcribe):
+    # Anything that changes what AssemblyAI returns belongs here, since it is part of the cache key
+    transcription_config = {"backend": "assemblyai", "speaker_labels": True}
+
+    def __init__(self, api_key: str, cache: Optional[TranscriptCache] = None,
+                 sentiment_stage: Optional[SentimentStage] = None,
+                 scheduler: Optional[TranscriptionScheduler] = None,
+                 preprocess: bool = PREPROCESS_ENABLED, segment_workers: int = 4):
+        super().__init__(api_key)
+        self.sentiment_stage = sentiment_stage or TextBlobSentiment()
+        self.cache = cache
+        self.scheduler = scheduler
+        self.preprocess = preprocess
+        self.segment_workers = segment_workers
+        # Scheduler jobs of each preprocessed upload still running, by the upload's job id
+        self._segment_jobs: Dict[int, List[Job]] = {}
+        self._cancelled = set()
+        self._segments_lock = threading.Lock()
+        if preprocess:
+            self.transcription_config = dict(self.transcription_config, preprocess=preprocess_config())
+    
+    def analyze_sentiment(self, text: str) -> Dict[str, float]:
+        polarity, subjectivity = self.sentiment_stage.analyze_batch([text])
+        return {"polarity": float(polarity[0]), "subjectivity": float(subjectivity[0])}
+
+    def _cached(self, audio_path: str, language: Optional[str], audio_digest: Optional[str]):
+        if self.cache is None:
+            return None, None
+        key = self.cache.key_for(audio_digest or hash_file(audio_path), language, self.transcription_config)
+        transcripts = self.cache.get_json(key)
+        if transcripts is not None:
+            logger.info(f"Transcript cache hit for {os.path.basename(audio_path)}")
+        return key, transcripts
+
+    def _prepare(self, audio_path: str) -> Optional[PreparedAudio]:
+        # None means upload the original file as before
+        if not self.preprocess:
+            return None
+        try:
+            config = self.transcription_config["preprocess"]
+            with span("transcribe.preprocess"):
+                return prepare_audio(audio_path, codec=config["codec"], segment_seconds=config["segment_seconds"],
+                                     overlap_seconds=config["overlap_seconds"])
+        except (AudioDecodeError, OSError) as e:
+            logger.warning(f"Preprocessing skipped for {os.path.basename(audio_path)}: {e}")
+            return None
+
+    def submit_transcription(self, audio_path: str, language: Optional[str] = None,
+                             audio_digest: Optional[str] = None) -> Job:
+        # Non-blocking variant of transcribe_audio; the job's future resolves to the same result
+        key, transcripts = self._cached(audio_path, language, audio_digest)
+        if transcripts is not None:
+            return Job.completed(audio_path, enrich_transcripts(transcripts), language)
+
+        def postprocess(result: List[Dict]) -> List[Dict]:
+            if self.cache is not None:
+                self.cache.put_json(key, result)
+            return enrich_transcripts(result)
+
+        if not self.preprocess:
+            return self.scheduler.submit(audio_path, language, postprocess=postprocess)
+        # Decoding and splitting take seconds on long files, so they run off the script thread;
+        # the returned job tracks the segment jobs the scheduler runs for it
+        job = Job(audio_path, language)
+        with self._segments_lock:
+            self._segment_jobs[job.id] = []
+        threading.Thread(target=self._run_segmented, args=(job, postprocess), name="preprocess", daemon=True).start()
+        return job
+
+    def cancel_transcription(self, job: Job) -> None:
+        # Stops a job from submit_transcription and drops it from the scheduler; for a
+        # preprocessed upload that is every segment job it has submitted or will submit
+        with self._segments_lock:
+            segmented = job.id in self._segment_jobs
+            if segmented:
+                self._cancelled.add(job.id)
+                children = list(self._segment_jobs[job.id])
+        if not segmented:
+            self.scheduler.cancel(job)
+            self.scheduler.forget(job)
+            return
+        for child in children:
+            self.scheduler.cancel(child)
+            self.scheduler.forget(child)
+
+    def _submit_segments(self, job: Job, paths: List[str]) -> List[Job]:
+        with self._segments_lock:
+            if job.id in self._cancelled:
+                raise CancelledError()
+            children = [self.scheduler.submit(path, job.language) for path in paths]
+            self._segment_jobs[job.id].extend(children)
+        return children
+
+    def _run_segmented(self, job: Job, postprocess) -> None:
+        def set_state(state: str) -> None:
+            job.state = state
+            job.updated_at = time.time()
+
+        try:
+            set_state("preprocessing")
+            prepared = self._prepare(job.audio_path)
+            try:
+                paths = [s.path for s in prepared.segments] if prepared else [job.audio_path]
+                segment_jobs = self._submit_segments(job, paths)
+                results = []
+                try:
+                    for segment_job in segment_jobs:
+                        set_state(f"transcribing ({len(results)}/{len(segment_jobs)} segments done)"
+                                  if len(segment_jobs) > 1 else "transcribing")
+                        results.append(segment_job.future.result())
+                        self.scheduler.forget(segment_job)
+                except BaseException:
+                    # One failed segment fails the file; the others stop holding scheduler slots
+                    for segment_job in segment_jobs:
+                        self.scheduler.cancel(segment_job)
+                        self.scheduler.forget(segment_job)
+                    raise
+            finally:
+                if prepared is not None:
+                    prepared.cleanup()
+            try:
+                utterances = stitch(prepared, results) if prepared else results[0]
+            except UntimedTranscriptError as e:
+                logger.warning(f"{e}; transcribing {os.path.basename(job.audio_path)} unsegmented")
+                set_state("transcribing")
+                whole, = self._submit_segments(job, [job.audio_path])
+                try:
+                    utterances = whole.future.result()
+                finally:
+                    self.scheduler.forget(whole)
+            result = postprocess(utterances)
+        except CancelledError:
+            set_state("cancelled")
+            job.future.cancel()
+            return
+        except Exception as e:
+            job.error = str(e)
+            set_state("error")
+            job.future.set_exception(e)
+            return
+        finally:
+            with self._segments_lock:
+                self._segment_jobs.pop(job.id, None)
+                self._cancelled.discard(job.id)
+        set_state("completed")
+        job.future.set_result(result)
+
+    def transcribe_audio(self, audio_path: str, language: Optional[str] = None,
+                         audio_digest: Optional[str] = None) -> List[Dict]:
+        # Sentiment is a separate stage (see sentiment_stage.submit) so it can overlap with embedding
+        key, transcripts = self._cached(audio_path, language, audio_digest)
+        if transcripts is None:
+            with span("transcribe"):
+                prepared = self._prepare(audio_path)
+                if prepared is None:
+                    transcripts = super().transcribe_audio(audio_path, language)
+                else:
+                    try:
+                        transcripts = transcribe_prepared(
+                            prepared, lambda path: super(EnhancedTranscribe, self).transcribe_audio(path, language),
+                            workers=self.segment_workers)
+                    except UntimedTranscriptError as e:
+                        logger.warning(f"{e}; transcribing {os.path.basename(audio_path)} unsegmented")
+                        transcripts = super().transcribe_audio(audio_path, language)
+                    finally:
+                        prepared.cleanup()
+            if self.cache is not None:
+                self.cache.put_json(key, transcripts)
+
+        return enrich_transcripts(transcripts)
@@ -0,0 +1,203 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import itertools
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import Callable, Dict, List, Optional, Tuple
+from metrics import observe, span
+
+logger = logging.getLogger(__name__)
+
+class TranscriptionError(RuntimeError):
+    pass
+
+class TranscriptionBackend:
+    # A hosted (or fake) transcription service: submit returns a remote job id, poll
+    # returns (state, utterances, error) with state one of queued/processing/completed/error
+    async def submit(self, audio_path: str, language: Optional[str] = None) -> str:
+        raise NotImplementedError
+
+    async def poll(self, remote_id: str) -> Tuple[str, Optional[List[Dict]], Optional[str]]:
+        raise NotImplementedError
+
+class AssemblyAIBackend(TranscriptionBackend):
+    def __init__(self, api_key: str, speaker_labels: bool = True):
+        import assemblyai as aai
+        aai.settings.api_key = api_key
+        self._aai = aai
+        self._transcriber = aai.Transcriber()
+        self.speaker_labels = speaker_labels
+
+    async def submit(self, audio_path: str, language: Optional[str] = None) -> str:
+        config = self._aai.TranscriptionConfig(speaker_labels=self.speaker_labels, language_code=language)
+        # The SDK is blocking; upload + submit run on the default executor
+        loop = asyncio.get_running_loop()
+        transcript = await loop.run_in_executor(None, lambda: self._transcriber.submit(audio_path, config=config))
+        return transcript.id
+
+    async def poll(self, remote_id: str) -> Tuple[str, Optional[List[Dict]], Optional[str]]:
+        loop = asyncio.get_running_loop()
+        transcript = await loop.run_in_executor(None, self._aai.Transcript.get_by_id, remote_id)
+        status = transcript.status
+        if status == self._aai.TranscriptStatus.completed:
+            utterances = [{
+                "speaker": f"Speaker {u.speaker}",
+                "text": u.text,
+                "start": u.start,
+                "end": u.end,
+            } for u in transcript.utterances or []]
+            return "completed", utterances, None
+        if status == self._aai.TranscriptStatus.error:
+            return "error", None, transcript.error
+        return str(status.value if hasattr(status, "value") else status), None, None
+
+class Job:
+    _ids = itertools.count(1)
+
+    def __init__(self, audio_path: str, language: Optional[str] = None):
+        self.id = next(self._ids)
+        self.audio_path = audio_path
+        self.language = language
+        self.state = "pending"
+        self.remote_id: Optional[str] = None
+        self.error: Optional[str] = None
+        self.polls = 0
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.future: Future = Future()
+
+    @classmethod
+    def completed(cls, audio_path: str, result, language: Optional[str] = None) -> "Job":
+        job = cls(audio_path, language)
+        job.state = "completed"
+        job.future.set_result(result)
+        return job
+
+    @property
+    def elapsed(self) -> float:
+        return (self.updated_at if self.future.done() else time.time()) - self.created_at
+
+    def as_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "file": os.path.basename(self.audio_path),
+            "state": self.state,
+            "polls": self.polls,
+            "elapsed": round(self.elapsed, 1),
+            "error": self.error,
+        }
+
+class TranscriptionScheduler:
+    # Runs transcription jobs on a private asyncio loop in a daemon thread so the Streamlit
+    # script thread never blocks on AssemblyAI. At most max_in_flight jobs are submitted or
+    # polled at once across all sessions; polling backs off exponentially with jitter.
+    def __init__(self, backend: TranscriptionBackend, max_in_flight: int = 4,
+                 poll_initial: float = 1.0, poll_max: float = 15.0, backoff: float = 1.6,
+                 timeout: float = 3 * 3600, on_status: Optional[Callable[[Job], None]] = None):
+        self.backend = backend
+        self.max_in_flight = max_in_flight
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.backoff = backoff
+        self.timeout = timeout
+        self.on_status = on_status
+        self._jobs: Dict[int, Job] = {}
+        self._tasks: Dict[int, Future] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="transcription-jobs", daemon=True)
+        self._thread.start()
+        self._semaphore = asyncio.run_coroutine_threadsafe(self._make_semaphore(), self._loop).result()
+
+    async def _make_semaphore(self) -> asyncio.Semaphore:
+        return asyncio.Semaphore(self.max_in_flight)
+
+    def submit(self, audio_path: str, language: Optional[str] = None,
+               postprocess: Optional[Callable[[List[Dict]], List[Dict]]] = None) -> Job:
+        # postprocess runs off-loop on the job's result before the future resolves
+        job = Job(audio_path, language)
+        self._jobs[job.id] = job
+        task = asyncio.run_coroutine_threadsafe(self._run(job, postprocess), self._loop)
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda t: self._resolve(job, t))
+        return job
+
+    def cancel(self, job: Job) -> bool:
+        # Stops waiting for a slot or polling; the job's future ends up cancelled
+        task = self._tasks.get(job.id)
+        return task is not None and task.cancel()
+
+    def jobs(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def forget(self, job: Job) -> None:
+        self._jobs.pop(job.id, None)
+        self._tasks.pop(job.id, None)
+
+    def shutdown(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    def _set_state(self, job: Job, state: str, error: Optional[str] = None) -> None:
+        job.state = state
+        job.error = error
+        job.updated_at = time.time()
+        if self.on_status is not None:
+            try:
+                self.on_status(job)
+            except Exception as e:
+                logger.warning(f"Job status callback failed: {e}")
+
+    def _resolve(self, job: Job, task: Future) -> None:
+        try:
+            job.future.set_result(task.result())
+        except (CancelledError, asyncio.CancelledError):
+            # Raised as BaseException on the loop side; the job's future is resolved either way
+            if job.state != "cancelled":
+                self._set_state(job, "cancelled")
+            job.future.cancel()
+        except Exception as e:
+            self._set_state(job, "error", str(e))
+            job.future.set_exception(e)
+
+    async def _run(self, job: Job, postprocess):
+        try:
+            return await self._transcribe(job, postprocess)
+        except asyncio.CancelledError:
+            # async with has already given the slot back
+            self._set_state(job, "cancelled")
+            raise
+
+    async def _transcribe(self, job: Job, postprocess):
+        waiting = time.perf_counter()
+        async with self._semaphore:
+            observe("transcribe.wait_slot", time.perf_counter() - waiting)
+            self._set_state(job, "submitting")
+            with span("transcribe.submit"):
+                job.remote_id = await self.backend.submit(job.audio_path, job.language)
+            self._set_state(job, "queued")
+
+            delay = self.poll_initial
+            while True:
+                await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+                with span("transcribe.poll"):
+                    state, utterances, error = await self.backend.poll(job.remote_id)
+                job.polls += 1
+                if state == "error":
+                    raise TranscriptionError(error or "transcription failed")
+                if state == "completed":
+                    break
+                if state != job.state:
+                    self._set_state(job, state)
+                if time.time() - job.created_at > self.timeout:
+                    raise TranscriptionError(f"Timed out after {self.timeout:.0f}s")
+                delay = min(delay * self.backoff, self.poll_max)
+
+        if postprocess is not None:
+            loop = asyncio.get_running_loop()
+            utterances = await loop.run_in_executor(None, postprocess, utterances)
+        self._set_state(job, "completed")
+        observe("transcribe.job", job.elapsed)
+        return utterances
@@ -0,0 +1,249 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from qdrant_client import QdrantClient, models
+from rag_code import QdrantVDB_QB
+from metrics import span
+from query_cache import GENERATIONS
+from retrieval_tuner import PROFILES, quantization_config
+from tenancy import SHARED_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+# Payload fields indexed in the shared collection
+TENANT_INDEXES = {
+    "tenant": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True),
+    "file_hash": models.PayloadSchemaType.KEYWORD,
+    "speaker": models.PayloadSchemaType.KEYWORD,
+    "start_ms": models.PayloadSchemaType.INTEGER,
+    "last_seen": models.PayloadSchemaType.FLOAT,
+}
+
+def point_id(payload: Dict) -> str:
+    # Segments of a known file get a stable id, so re-ingesting the file overwrites its points
+    if "file_hash" in payload and "segment" in payload:
+        name = f"{payload.get('tenant', '')}/{payload['file_hash']}/{payload['segment']}"
+        if payload.get("chunker"):
+            name += f"/{payload['chunker']}"
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, name))
+    return str(uuid.uuid4())
+
+class EnhancedQdrantVDB(QdrantVDB_QB):
+    # Adds batch-at-a-time ingestion so callers can stream embeddings into Qdrant instead of
+    # handing over a fully materialised EmbedData. `location=":memory:"` gives a local client.
+    # With a tenant set, every session shares one collection and is isolated by an indexed
+    # "tenant" payload field instead of getting a collection of its own.
+
+    # Collections this process already created or verified, to skip collection_exists calls
+    _ready_collections = set()
+    _ready_lock = threading.Lock()
+    # (collection, tenant) pairs the janitor expired in this process; cleared on the next write
+    _expired_tenants = set()
+
+    def __init__(self, collection_name: str, vector_dim: int = 1024, batch_size: int = 512,
+                 url: Optional[str] = None, location: Optional[str] = None,
+                 client: Optional[QdrantClient] = None, tenant: Optional[str] = None,
+                 touch_interval: float = 60.0):
+        super().__init__(collection_name=collection_name, vector_dim=vector_dim, batch_size=batch_size)
+        self.url = url or os.getenv("QDRANT_URL", "http://localhost:6333")
+        self.location = location
+        self.client = client if client is not None else getattr(self, "client", None)
+        self.tenant = tenant
+        self.touch_interval = touch_interval
+        self._last_touch = 0.0
+        self._layout: Optional[Tuple[int, str]] = None
+        self._layout_checked = 0.0
+
+    def define_client(self):
+        # Reuse the existing client; each new one opens another gRPC channel
+        if self.client is not None:
+            return
+        if self.location:
+            self.client = QdrantClient(location=self.location)
+        else:
+            self.client = QdrantClient(url=self.url, prefer_grpc=True)
+
+    def create_collection(self):
+        # In-memory clients are each their own database; servers are identified by address
+        server = id(self.client) if self.location == ":memory:" else (self.location or self.url)
+        ready_key = (server, self.collection_name)
+        if ready_key in self._ready_collections:
+            return
+        with self._ready_lock, span("qdrant.create_collection"):
+            if ready_key in self._ready_collections:
+                return
+            exists = self.client.collection_exists(collection_name=self.collection_name)
+            super().create_collection()
+            if self.tenant is not None and not exists:
+                # Per-tenant HNSW graphs instead of one global graph; searches always filter by tenant
+                self.client.update_collection(
+                    collection_name=self.collection_name,
+                    hnsw_config=models.HnswConfigDiff(payload_m=16, m=0),
+                )
+                for field, schema in TENANT_INDEXES.items():
+                    self.client.create_payload_index(collection_name=self.collection_name,
+                                                     field_name=field, field_schema=schema)
+            self._ready_collections.add(ready_key)
+
+    def cache_scope(self):
+        # What a cached search result depends on; bumped on every write to it
+        return (self.collection_name, self.tenant)
+
+    @classmethod
+    def mark_expired(cls, collection_name: str, tenants) -> None:
+        for tenant in tenants:
+            cls._expired_tenants.add((collection_name, tenant))
+            GENERATIONS.bump((collection_name, tenant))
+
+    def expired(self) -> bool:
+        # The janitor deleted this tenant's points; anything mirrored outside Qdrant is stale
+        return self.tenant is not None and (self.collection_name, self.tenant) in self._expired_tenants
+
+    def tenant_filter(self) -> Optional[models.Filter]:
+        if self.tenant is None:
+            return None
+        return models.Filter(must=[models.FieldCondition(key="tenant", match=models.MatchValue(value=self.tenant))])
+
+    def touch(self, force: bool = False) -> None:
+        # Keeps the janitor away from a session that is still in use; throttled per instance.
+        # Every point of the tenant is stamped, so all of them are at least as recent as _last_touch
+        now = time.time()
+        if self.tenant is None or (not force and now - self._last_touch < self.touch_interval):
+            return
+        self._last_touch = now
+        self.client.set_payload(collection_name=self.collection_name, payload={"last_seen": now},
+                                points=self.tenant_filter(), wait=False)
+
+    def delete_tenant(self) -> None:
+        if self.tenant is not None:
+            self.client.delete(collection_name=self.collection_name,
+                               points_selector=models.FilterSelector(filter=self.tenant_filter()))
+            GENERATIONS.bump(self.cache_scope())
+
+    def ingest_batch(self, contexts: Sequence[str], embeddings: Sequence[Sequence[float]],
+                     payloads: Optional[Sequence[Dict]] = None) -> List[str]:
+        if payloads is None:
+            payloads = [{"context": context} for context in contexts]
+        if self.tenant is not None:
+            # The tenant's earlier points are refreshed along with the new ones (touch covers
+            # the whole tenant), so no file of a session in use falls behind the janitor's cutoff
+            self.touch()
+            payloads = [dict(payload, tenant=self.tenant, last_seen=time.time()) for payload in payloads]
+            self._expired_tenants.discard((self.collection_name, self.tenant))
+        ids = [point_id(payload) for payload in payloads]
+        with span("qdrant.upsert", points=len(ids)):
+            self.client.upsert(
+                collection_name=self.collection_name,
+                points=models.Batch(ids=ids, vectors=[list(v) for v in embeddings], payloads=list(payloads)),
+                wait=True,
+            )
+        GENERATIONS.bump(self.cache_scope())
+        return ids
+
+    def search_layout(self, max_age: float = 300.0) -> Tuple[int, str]:
+        # (points, quantization type) of the whole collection, refreshed at most every max_age
+        # seconds. Both the search profile and finalize_ingest go by these, so a small tenant in
+        # a large shared collection searches with the profile of the index it actually hits.
+        now = time.time()
+        if self._layout is None or now - self._layout_checked > max_age:
+            self._layout = (self.client.count(collection_name=self.collection_name, exact=False).count,
+                            self._quantization())
+            self._layout_checked = now
+        return self._layout
+
+    def point_count(self, max_age: float = 300.0) -> int:
+        return self.search_layout(max_age)[0]
+
+    def _quantization(self) -> str:
+        config = self.client.get_collection(self.collection_name).config.quantization_config
+        if isinstance(config, models.BinaryQuantization):
+            return "binary"
+        if isinstance(config, models.ScalarQuantization):
+            return "scalar"
+        return "none" if config is None else type(config).__name__
+
+    def finalize_ingest(self):
+        # create_collection disables indexing for the bulk upload; turn it back on, with the
+        # quantization the tuned profile asks for. That follows the size of the whole collection,
+        # which in shared mode spans every tenant.
+        with span("qdrant.finalize"):
+            points, current = self.search_layout(max_age=0)
+            kind = PROFILES.profile_for(points)["quantization"]
+            changes = {}
+            if kind != current:
+                changes["quantization_config"] = quantization_config(kind) or models.Disabled.DISABLED
+                logger.info(f"Switching {self.collection_name} to {kind} quantization ({points} points)")
+            self.client.update_collection(
+                collection_name=self.collection_name,
+                optimizer_config=models.OptimizersConfigDiff(indexing_threshold=20000),
+                **changes,
+            )
+            self._layout = (points, kind)
+        # Again after the last batch, so results cached mid-ingest never outlive it
+        GENERATIONS.bump(self.cache_scope())
+
+class SessionJanitor:
+    # Background thread that deletes the points of shared-collection tenants not touched for
+    # ttl_seconds. A tenant expires as a whole, once even its most recently seen point is past
+    # the cutoff, so a session in use never loses part of its data. Runs in one process;
+    # Qdrant applies the deletes for everyone.
+    def __init__(self, client: QdrantClient, collection_name: str = SHARED_COLLECTION,
+                 ttl_seconds: float = 24 * 3600, interval: float = 600.0):
+        self.client = client
+        self.collection_name = collection_name
+        self.ttl_seconds = ttl_seconds
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-janitor", daemon=True)
+
+    def start(self) -> "SessionJanitor":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def sweep(self) -> None:
+        if not self.client.collection_exists(collection_name=self.collection_name):
+            return
+        cutoff = time.time() - self.ttl_seconds
+        expired = models.Filter(must=[models.FieldCondition(key="last_seen", range=models.Range(lt=cutoff))])
+        tenants = {tenant for tenant in self.expired_tenants(expired) if not self.seen_since(tenant, cutoff)}
+        if not tenants:
+            return
+        idle = models.Filter(must=[models.FieldCondition(key="tenant", match=models.MatchAny(any=sorted(tenants)))])
+        self.client.delete(collection_name=self.collection_name,
+                           points_selector=models.FilterSelector(filter=idle))
+        # Cached searches of those tenants are invalidated, and their sessions drop their BM25 mirror
+        EnhancedQdrantVDB.mark_expired(self.collection_name, tenants)
+        logger.info(f"Expired {len(tenants)} sessions idle since {time.ctime(cutoff)} from {self.collection_name}")
+
+    def expired_tenants(self, expired: models.Filter, page_size: int = 1000) -> Set[str]:
+        tenants, offset = set(), None
+        while True:
+            points, offset = self.client.scroll(collection_name=self.collection_name, scroll_filter=expired,
+                                                limit=page_size, offset=offset, with_payload=["tenant"],
+                                                with_vectors=False)
+            tenants.update(p.payload["tenant"] for p in points if p.payload and "tenant" in p.payload)
+            if offset is None:
+                return tenants
+
+    def seen_since(self, tenant: str, cutoff: float) -> bool:
+        recent = models.Filter(must=[
+            models.FieldCondition(key="tenant", match=models.MatchValue(value=tenant)),
+            models.FieldCondition(key="last_seen", range=models.Range(gte=cutoff)),
+        ])
+        points, _ = self.client.scroll(collection_name=self.collection_name, scroll_filter=recent, limit=1,
+                                       with_payload=False, with_vectors=False)
+        return bool(points)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.warning(f"Session janitor sweep failed: {e}")
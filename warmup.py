@@ -0,0 +1,67 @@
+import time
+import logging
+import importlib
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Modules that pull in torch / transformers / llama_index / qdrant_client / assemblyai
+HEAVY_MODULES = ("rag_code", "qdrant_client", "embedding_cache", "vector_store", "retrieval",
+                 "generation", "transcription", "sentiment")
+
+def import_modules(names=HEAVY_MODULES) -> Dict[str, float]:
+    seconds = {}
+    for name in names:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        seconds[name] = round(time.perf_counter() - start, 3)
+    return seconds
+
+class Warmup:
+    # Runs named startup steps in order on a daemon thread so the first page can render
+    # while they load. result(name) blocks until that step is done (or re-raises its error).
+    def __init__(self):
+        self._steps: Dict[str, Dict] = {}
+        self._order: List[str] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, name: str, fn: Callable) -> "Warmup":
+        self._steps[name] = {"fn": fn, "future": Future(), "state": "pending", "seconds": None, "error": None}
+        self._order.append(name)
+        return self
+
+    def start(self) -> "Warmup":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        for name in self._order:
+            step = self._steps[name]
+            step["state"] = "running"
+            start = time.perf_counter()
+            try:
+                result = step["fn"]()
+            except BaseException as e:
+                logger.error(f"Warmup step {name} failed: {e}")
+                step.update(state="error", error=str(e), seconds=time.perf_counter() - start)
+                step["future"].set_exception(e)
+                continue
+            step.update(state="done", seconds=time.perf_counter() - start)
+            step["future"].set_result(result)
+            logger.info(f"Warmup step {name} done in {step['seconds']:.1f}s")
+
+    def result(self, name: str, timeout: Optional[float] = None):
+        self.start()
+        return self._steps[name]["future"].result(timeout=timeout)
+
+    @property
+    def ready(self) -> bool:
+        return all(step["future"].done() for step in self._steps.values())
+
+    def status(self) -> List[Dict]:
+        return [{"step": name, "state": self._steps[name]["state"], "seconds": self._steps[name]["seconds"],
+                 "error": self._steps[name]["error"]} for name in self._order]